@@ -0,0 +1,46 @@
+# **********************************************************************************************
+# 多页面共享服务：APP_DEPLOY_MODE=multipage 时由集成器启动，把应用目录中的本地工具挂载为同一个
+# Streamlit 服务下的页面。各工具共享一个进程内已导入的 pandas/numpy/matplotlib 以及
+# integrator_modules/shared_resources.py 缓存的 PVT 表、数据库连接与典型曲线库，打开工具只是一次页面跳转；
+# 需要进程隔离的工具（APP_ISOLATED_APPS）仍由集成器单独启动。
+# 登录用户经页面地址中的票据传入各会话（见 integrator_modules/page_session.py）。
+# **********************************************************************************************
+import os
+import sys
+
+import streamlit as st
+
+from integrator_modules.app_catalogue import APPS_CATALOGUE_PATH, get_app_catalogue
+from integrator_modules.multipage import collect_page_specs
+from integrator_modules.page_session import bind_session
+
+
+# 与集成器共用应用目录的解析与按修改时间的缓存
+def Read_Page_Specs():
+    catalogue = get_app_catalogue(APPS_CATALOGUE_PATH)
+    return collect_page_specs((entry.Link, entry.Text) for entry in catalogue.entries)
+
+
+def main():
+    bind_session()
+    page_specs = Read_Page_Specs()
+    if not page_specs:
+        st.info("当前没有可挂载为页面的工具")
+        return
+
+    # 工具脚本按各自目录导入同级模块（如 from picture_plot import ...），需加入模块搜索路径
+    for app_path, _, _ in page_specs:
+        app_dir = os.path.dirname(os.path.abspath(app_path))
+        if app_dir not in sys.path:
+            sys.path.append(app_dir)
+
+    pages = [
+        st.Page(app_path, title=title, url_path=url_path, default=(i == 0))
+        for i, (app_path, title, url_path) in enumerate(page_specs)
+    ]
+    st.navigation(pages).run()
+
+
+# **********************************************************************************************
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# **********************************************************************************************
+# 结构对比基准：用回填模式生成一份原始结构（文本时间戳）的数据库，复制后迁移到紧凑结构
+# （整数纪元秒 + 积液代码 + 小时/日汇总与 well_stats，WITHOUT ROWID 与普通 rowid 表各一份），比较文件大小与常用查询的耗时。
+#
+#     python bench_schema.py --wells 50 --days 90 --repeat 5
+# **********************************************************************************************
+import argparse
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from migrate_schema import migrate
+from schema import LEGACY_SCHEMA_VERSION, format_epoch, to_epoch
+from sensor import BACKFILL_DECAY_RATE, WellDataSimulator
+
+# 各结构下的查询：(名称, 原始结构 SQL, 紧凑结构 SQL, 参数生成函数)
+# 单井时间范围扫描取第一口井回填区间中间的一周
+QUERIES = [
+    ('单井一周扫描',
+     '''SELECT timestamp, oil_pressure, instant_flow FROM well_production_data
+        WHERE well_id = ? AND timestamp BETWEEN ? AND ? ORDER BY timestamp''',
+     '''SELECT ts, oil_pressure, instant_flow FROM well_production_samples
+        WHERE well_id = ? AND ts BETWEEN ? AND ? ORDER BY ts''',
+     lambda start, end, legacy: (1, start, end) if legacy else (1, to_epoch(start), to_epoch(end))),
+    ('各井时间范围',
+     'SELECT well_id, MIN(timestamp), MAX(timestamp) FROM well_production_data GROUP BY well_id',
+     'SELECT well_id, MIN(ts), MAX(ts) FROM well_production_samples GROUP BY well_id',
+     lambda start, end, legacy: ()),
+    ('积液状态统计',
+     '''SELECT liquid_accumulation, COUNT(*) FROM well_production_data
+        GROUP BY liquid_accumulation''',
+     '''SELECT l.label, COUNT(*) FROM well_production_samples s
+        JOIN liquid_states l ON l.code = s.liquid_code GROUP BY s.liquid_code''',
+     lambda start, end, legacy: ()),
+    # 紧凑结构读取日汇总（见 rollups.py），原始结构在查询时聚合
+    ('单井日均值趋势',
+     '''SELECT date(timestamp), AVG(oil_pressure), AVG(instant_flow) FROM well_production_data
+        WHERE well_id = ? GROUP BY date(timestamp)''',
+     'SELECT timestamp, oil_pressure_mean, instant_flow_mean FROM well_production_daily WHERE well_id = ?',
+     lambda start, end, legacy: (1,)),
+    # 紧凑结构按主键读取 well_stats，原始结构即 readtime.get_date_range_from_db 原来的查询
+    ('单井日期范围',
+     '''SELECT MIN(d.timestamp), MAX(d.timestamp) FROM well_production_data d
+        JOIN wells w ON d.well_id = w.well_id WHERE w.well_name = ?''',
+     '''SELECT s.first_ts, s.last_ts FROM well_stats s
+        JOIN wells w ON s.well_id = w.well_id WHERE w.well_name = ?''',
+     lambda start, end, legacy: ('气井1',)),
+]
+
+
+def build_legacy(db_path, wells, days):
+    """回填一份原始结构的数据库，返回回填起始时间（纪元秒）"""
+    simulator = WellDataSimulator(db_path=db_path, n_wells=wells, batch_size=5000, queue_size=100000,
+                                  decay_rate=BACKFILL_DECAY_RATE, schema_version=LEGACY_SCHEMA_VERSION)
+    simulator.backfill(days, seed=0)
+    return simulator.sim_start_ts
+
+
+def time_query(db_path, sql, params, repeat):
+    """每次重新打开连接（冷缓存之外尽量接近一次独立查询），返回 (最短毫秒, 行数)"""
+    best, rows = None, 0
+    for _ in range(repeat):
+        conn = sqlite3.connect(db_path)
+        try:
+            start = time.perf_counter()
+            rows = len(conn.execute(sql, params).fetchall())
+            elapsed = (time.perf_counter() - start) * 1000
+        finally:
+            conn.close()
+        best = elapsed if best is None else min(best, elapsed)
+    return best, rows
+
+
+def run_benchmark(wells=50, days=90, repeat=5, workdir=None):
+    """
+    参数:
+        wells (int): 气井数
+        days (int): 回填天数
+        repeat (int): 每个查询的重复次数（取最短）
+        workdir (str): 存放测试数据库的目录，默认临时目录（结束后删除）
+
+    返回:
+        List[dict]: 每种结构一行：文件大小与各查询耗时
+    """
+    tmpdir = workdir or tempfile.mkdtemp(prefix='bench_schema_')
+    try:
+        legacy_db = os.path.join(tmpdir, 'legacy.db')
+        variants = [('原始结构（文本时间戳）', legacy_db, True)]
+        start_ts = build_legacy(legacy_db, wells, days)
+        for name, filename, without_rowid in [('紧凑结构（WITHOUT ROWID）', 'compact.db', True),
+                                              ('紧凑结构（rowid 表）', 'compact_rowid.db', False)]:
+            path = os.path.join(tmpdir, filename)
+            shutil.copyfile(legacy_db, path)
+            migrate(path, without_rowid=without_rowid)
+            variants.append((name, path, False))
+
+        # 单井扫描区间：回填区间中间的一周
+        mid = start_ts + days * 86400 // 2
+        week_start, week_end = format_epoch(mid), format_epoch(mid + 7 * 86400)
+
+        results = []
+        for name, path, legacy in variants:
+            row = {'结构': name, '文件大小(MB)': round(os.path.getsize(path) / 1024 / 1024, 2)}
+            for query_name, legacy_sql, compact_sql, make_params in QUERIES:
+                elapsed, count = time_query(path, legacy_sql if legacy else compact_sql,
+                                            make_params(week_start, week_end, legacy), repeat)
+                row[f'{query_name}(ms)'] = round(elapsed, 2)
+                row[f'{query_name}行数'] = count
+            results.append(row)
+        return results
+    finally:
+        if workdir is None:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def format_results(results):
+    baseline = results[0]
+    lines = []
+    for row in results:
+        lines.append(f"{row['结构']}：")
+        for key, value in row.items():
+            if key == '结构' or key.endswith('行数'):
+                continue
+            ratio = f"（原始结构的 {value / baseline[key]:.0%}）" if row is not baseline and baseline[key] else ''
+            lines.append(f"  {key:<14}{value:>10}{ratio}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="原始结构与紧凑结构的磁盘占用和查询耗时对比")
+    parser.add_argument("--wells", type=int, default=50, help="气井数")
+    parser.add_argument("--days", type=int, default=90, help="回填天数")
+    parser.add_argument("--repeat", type=int, default=5, help="每个查询的重复次数（取最短）")
+    parser.add_argument("--workdir", default=None, help="保留测试数据库的目录（默认用临时目录并在结束后删除）")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)  # 不输出回填进度
+    if args.workdir:
+        os.makedirs(args.workdir, exist_ok=True)
+    print(format_results(run_benchmark(args.wells, args.days, args.repeat, args.workdir)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# **********************************************************************************************
+# 数据库结构迁移：把原始结构（well_production_data 表，文本时间戳、中文积液字符串）迁移到紧凑结构
+# （well_production_samples 表，整数纪元秒、积液代码，(well_id, ts) 聚簇主键），见 schema.py。
+# 原表名改为同名兼容视图，按原列名查询的程序无需修改。迁移在一个事务中完成（含生成小时/日汇总），
+# 结束后 VACUUM 回收空间。
+#
+#     python migrate_schema.py --db well_production.db
+#     python migrate_schema.py --db well_production.db --keep-legacy       # 保留原表为 well_production_data_legacy
+#     python migrate_schema.py --db well_production.db --rebuild-rollups   # 紧凑结构数据库按采样行重建汇总表
+# **********************************************************************************************
+import argparse
+import os
+import sqlite3
+import time
+
+from rollups import ROLLUPS, WELL_STATS_DDL, rebuild_rollups, rebuild_well_stats, rollup_ddl
+from schema import (COMPACT_SCHEMA_VERSION, LATEST_SCHEMA_VERSION, LEGACY_SCHEMA_VERSION, LIQUID_STATES,
+                    compact_ddl, get_schema_version)
+
+LEGACY_BACKUP_TABLE = 'well_production_data_legacy'
+
+
+def migrate(db_path, without_rowid=True, keep_legacy=False, vacuum=True):
+    """
+    把原始结构的数据库迁移到紧凑结构。
+
+    参数:
+        db_path (str): 数据库文件
+        without_rowid (bool): 采样表是否使用 WITHOUT ROWID（按 (well_id, ts) 聚簇存储）
+        keep_legacy (bool): 是否把原表保留为 well_production_data_legacy（否则删除）
+        vacuum (bool): 迁移后是否 VACUUM 回收空间
+
+    返回:
+        dict: 迁移统计（行数、耗时、文件大小）
+
+    异常:
+        RuntimeError: 数据库不是原始结构（尚未建表或已迁移）
+    """
+    size_before = os.path.getsize(db_path)
+    conn = sqlite3.connect(db_path, isolation_level=None)  # 手动控制事务
+    try:
+        version = get_schema_version(conn)
+        if version != LEGACY_SCHEMA_VERSION:
+            raise RuntimeError(f"{db_path} 的结构版本为 {version}，只能迁移原始结构（版本 {LEGACY_SCHEMA_VERSION}）")
+
+        start = time.perf_counter()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(f'ALTER TABLE well_production_data RENAME TO {LEGACY_BACKUP_TABLE}')
+            conn.execute('DROP INDEX IF EXISTS idx_well_timestamp')
+            ddl = compact_ddl(without_rowid)
+            for statement in ddl[:-1]:  # 兼容视图在原表数据复制之后创建
+                conn.execute(statement)
+            conn.executemany('INSERT OR IGNORE INTO liquid_states (code, label) VALUES (?, ?)', LIQUID_STATES)
+            # 代码表之外的积液字符串按出现顺序追加新代码
+            conn.execute(f'''
+                INSERT INTO liquid_states (code, label)
+                SELECT (SELECT MAX(code) FROM liquid_states) + ROW_NUMBER() OVER (ORDER BY MIN(rowid)), liquid_accumulation
+                FROM {LEGACY_BACKUP_TABLE}
+                WHERE liquid_accumulation IS NOT NULL
+                  AND liquid_accumulation NOT IN (SELECT label FROM liquid_states)
+                GROUP BY liquid_accumulation
+            ''')
+            # 按主键顺序插入，WITHOUT ROWID 表的 B 树页按顺序填充
+            rows = conn.execute(f'''
+                INSERT OR IGNORE INTO well_production_samples
+                (well_id, ts, oil_pressure, temperature, back_pressure,
+                 instant_flow, cumulative_flow, liquid_code)
+                SELECT d.well_id, CAST(strftime('%s', d.timestamp) AS INTEGER), d.oil_pressure, d.temperature,
+                       d.back_pressure, d.instant_flow, d.cumulative_flow, l.code
+                FROM {LEGACY_BACKUP_TABLE} d
+                LEFT JOIN liquid_states l ON l.label = d.liquid_accumulation
+                WHERE d.timestamp IS NOT NULL
+                ORDER BY d.well_id, d.timestamp
+            ''').rowcount
+            if not keep_legacy:
+                conn.execute(f'DROP TABLE {LEGACY_BACKUP_TABLE}')
+            conn.execute(ddl[-1])
+            for statement in rollup_ddl(without_rowid) + [WELL_STATS_DDL]:
+                conn.execute(statement)
+            rebuild_rollups(conn)
+            rebuild_well_stats(conn)
+            conn.execute(f'PRAGMA user_version = {LATEST_SCHEMA_VERSION}')
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        migrate_seconds = time.perf_counter() - start
+
+        if vacuum:
+            conn.execute('VACUUM')
+    finally:
+        conn.close()
+
+    return {
+        'rows': rows,
+        'seconds': round(migrate_seconds, 2),
+        'size_before_mb': round(size_before / 1024 / 1024, 2),
+        'size_after_mb': round(os.path.getsize(db_path) / 1024 / 1024, 2),
+    }
+
+
+def rebuild(db_path, without_rowid=True):
+    """
+    按全部采样行重建小时/日汇总表与 well_stats（不存在时先创建），用于校验或修复增量汇总。
+
+    返回:
+        dict: 各汇总表的行数与耗时
+
+    异常:
+        RuntimeError: 数据库不是紧凑结构
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        version = get_schema_version(conn)
+        if version < COMPACT_SCHEMA_VERSION:
+            raise RuntimeError(f"{db_path} 的结构版本为 {version}，请先迁移到紧凑结构")
+        start = time.perf_counter()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for statement in rollup_ddl(without_rowid) + [WELL_STATS_DDL]:
+                conn.execute(statement)
+            rebuild_rollups(conn)
+            rebuild_well_stats(conn)
+            conn.execute(f'PRAGMA user_version = {max(version, LATEST_SCHEMA_VERSION)}')
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        stats = {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                 for table in [table for table, _, _ in ROLLUPS] + ['well_stats']}
+    finally:
+        conn.close()
+    stats['seconds'] = round(time.perf_counter() - start, 2)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="气井生产数据库结构迁移（文本时间戳 -> 整数纪元秒）")
+    parser.add_argument("--db", default="well_production.db", help="数据库文件")
+    parser.add_argument("--with-rowid", action="store_true", help="采样表保留 rowid（不按主键聚簇）")
+    parser.add_argument("--keep-legacy", action="store_true", help=f"保留原表为 {LEGACY_BACKUP_TABLE}")
+    parser.add_argument("--no-vacuum", action="store_true", help="迁移后不执行 VACUUM")
+    parser.add_argument("--rebuild-rollups", action="store_true", help="不迁移，只按采样行重建汇总表与 well_stats")
+    args = parser.parse_args()
+
+    if args.rebuild_rollups:
+        stats = rebuild(args.db, without_rowid=not args.with_rowid)
+        print(f"汇总重建完成：小时汇总{stats['rollup_hourly']}行，日汇总{stats['rollup_daily']}行，"
+              f"well_stats {stats['well_stats']}行，耗时{stats['seconds']}秒")
+        return
+
+    stats = migrate(args.db, without_rowid=not args.with_rowid, keep_legacy=args.keep_legacy,
+                    vacuum=not args.no_vacuum)
+    print(f"迁移完成：{stats['rows']}行，耗时{stats['seconds']}秒，"
+          f"文件 {stats['size_before_mb']} MB -> {stats['size_after_mb']} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,29 @@
 import sqlite3
-from datetime import datetime
+from datetime import datetime, timezone
+
+from schema import WELL_STATS_SCHEMA_VERSION, get_schema_version
+
+
 def get_date_range_from_db(gas_name):
     """从数据库获取指定气井的日期范围"""
     try:
         conn = sqlite3.connect('well_production.db')
         cursor = conn.cursor()
 
+        # 维护了 well_stats 的数据库按主键读取首末时间戳，不再扫描采样数据
+        if get_schema_version(conn) >= WELL_STATS_SCHEMA_VERSION:
+            cursor.execute("""
+            SELECT s.first_ts, s.last_ts
+            FROM well_stats s
+            JOIN wells w ON s.well_id = w.well_id
+            WHERE w.well_name = ?
+            """, (gas_name,))
+            result = cursor.fetchone()
+            if result:
+                return (datetime.fromtimestamp(result[0], timezone.utc).date(),
+                        datetime.fromtimestamp(result[1], timezone.utc).date())
+            return datetime.now().date(), datetime.now().date()
+
         query = """
         SELECT 
             MIN(d.timestamp) as min_date,
@@ -0,0 +1,234 @@
+# **********************************************************************************************
+# 小时/日汇总表：按 (well_id, 时段起点) 保存油压、温度、回压、瞬时流量的最小/最大/合计/最后值，
+# 以及时段内首末累计流量。写入器每提交一批采样行就在同一事务中增量更新汇总（只计入真正新增的行），
+# 趋势图等按小时或按天读取汇总，而不是在查询时聚合全部 10 分钟采样。
+#
+# 平均值 = 合计 / sample_count，兼容视图 well_production_hourly / well_production_daily 中已算好。
+#
+# well_stats 表每口井一行：首末时间戳、行数与最新一次采样的各项数值，同样随每批写入更新，
+# 日期范围与最后累计流量等查询按主键读取一行即可，不再扫描采样表。
+# **********************************************************************************************
+
+# 汇总的测量值（采样表中的列）
+ROLLUP_METRICS = ('oil_pressure', 'temperature', 'back_pressure', 'instant_flow')
+# (汇总表, 兼容视图, 时段秒数)；时段按纪元秒对齐，日汇总即时间戳所在的自然日
+ROLLUPS = [
+    ('rollup_hourly', 'well_production_hourly', 3600),
+    ('rollup_daily', 'well_production_daily', 86400),
+]
+
+SAMPLE_COLUMNS = ('well_id, ts, oil_pressure, temperature, back_pressure, '
+                  'instant_flow, cumulative_flow, liquid_code')
+
+WELL_STATS_DDL = '''
+    CREATE TABLE IF NOT EXISTS well_stats (
+        well_id INTEGER PRIMARY KEY,
+        first_ts INTEGER NOT NULL,
+        last_ts INTEGER NOT NULL,
+        row_count INTEGER NOT NULL,
+        last_oil_pressure REAL,
+        last_temperature REAL,
+        last_back_pressure REAL,
+        last_instant_flow REAL,
+        last_cumulative_flow REAL,
+        last_liquid_code INTEGER,
+        FOREIGN KEY (well_id) REFERENCES wells(well_id)
+    )
+'''
+
+# 每批采样行先写入临时表：去掉已存在的行后再插入采样表，汇总只统计这部分新增行
+STAGING_DDL = '''
+    CREATE TEMP TABLE IF NOT EXISTS batch_samples (
+        well_id INTEGER NOT NULL,
+        ts INTEGER NOT NULL,
+        oil_pressure REAL,
+        temperature REAL,
+        back_pressure REAL,
+        instant_flow REAL,
+        cumulative_flow REAL,
+        liquid_code INTEGER,
+        PRIMARY KEY (well_id, ts)
+    ) WITHOUT ROWID
+'''
+
+STAGING_INSERT_SQL = f'''
+    INSERT OR IGNORE INTO temp.batch_samples ({SAMPLE_COLUMNS})
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def _metric_columns(suffixes):
+    return ', '.join(f'{metric}_{suffix}' for metric in ROLLUP_METRICS for suffix in suffixes)
+
+
+def rollup_ddl(without_rowid=True):
+    """汇总表与兼容视图的建表语句"""
+    statements = []
+    for table, view, _ in ROLLUPS:
+        metric_columns = ',\n            '.join(
+            f'{metric}_{suffix} REAL' for metric in ROLLUP_METRICS for suffix in ('min', 'max', 'sum', 'last'))
+        statements.append(f'''
+        CREATE TABLE IF NOT EXISTS {table} (
+            well_id INTEGER NOT NULL,
+            bucket_ts INTEGER NOT NULL,
+            sample_count INTEGER NOT NULL,
+            first_ts INTEGER NOT NULL,
+            last_ts INTEGER NOT NULL,
+            {metric_columns},
+            cumulative_flow_first REAL,
+            cumulative_flow_last REAL,
+            PRIMARY KEY (well_id, bucket_ts),
+            FOREIGN KEY (well_id) REFERENCES wells(well_id)
+        ){' WITHOUT ROWID' if without_rowid else ''}
+        ''')
+        view_columns = ',\n               '.join(
+            f'{metric}_min, {metric}_max, {metric}_sum * 1.0 / sample_count AS {metric}_mean, {metric}_last'
+            for metric in ROLLUP_METRICS)
+        statements.append(f'''
+        CREATE VIEW IF NOT EXISTS {view} AS
+        SELECT well_id,
+               datetime(bucket_ts, 'unixepoch') AS timestamp,
+               bucket_ts,
+               sample_count,
+               {view_columns},
+               cumulative_flow_first,
+               cumulative_flow_last
+        FROM {table}
+        ''')
+    return statements
+
+
+def rollup_upsert_sql(table, bucket_seconds, source):
+    """
+    把 source 表（采样表结构）中的行按时段聚合后合并进汇总表：新时段直接插入，
+    已有时段累加行数与合计、取最小/最大，最后值与首末累计流量按时间戳较新/较早的一方。
+    """
+    aggregates = ',\n               '.join(
+        f'MIN({metric}) AS {metric}_min, MAX({metric}) AS {metric}_max, SUM({metric}) AS {metric}_sum'
+        for metric in ROLLUP_METRICS)
+    last_values = ', '.join(f'l.{metric}' for metric in ROLLUP_METRICS)
+    updates = ',\n        '.join(
+        f'{metric}_min = MIN({metric}_min, excluded.{metric}_min),\n        '
+        f'{metric}_max = MAX({metric}_max, excluded.{metric}_max),\n        '
+        f'{metric}_sum = {metric}_sum + excluded.{metric}_sum,\n        '
+        f'{metric}_last = CASE WHEN excluded.last_ts > last_ts THEN excluded.{metric}_last ELSE {metric}_last END'
+        for metric in ROLLUP_METRICS)
+    # SET 右侧引用的都是更新前的值，因此 first_ts/last_ts 的比较不受本句中赋值顺序影响
+    return f'''
+    WITH g AS (
+        SELECT well_id, ts - ts % {int(bucket_seconds)} AS bucket_ts, COUNT(*) AS sample_count,
+               MIN(ts) AS first_ts, MAX(ts) AS last_ts,
+               {aggregates}
+        FROM {source}
+        GROUP BY well_id, bucket_ts
+    )
+    INSERT INTO {table} (
+        well_id, bucket_ts, sample_count, first_ts, last_ts,
+        {_metric_columns(('min', 'max', 'sum'))},
+        {_metric_columns(('last',))},
+        cumulative_flow_first, cumulative_flow_last
+    )
+    SELECT g.well_id, g.bucket_ts, g.sample_count, g.first_ts, g.last_ts,
+           {_metric_columns(('min', 'max', 'sum'))},
+           {last_values},
+           f.cumulative_flow, l.cumulative_flow
+    FROM g
+    JOIN {source} f ON f.well_id = g.well_id AND f.ts = g.first_ts
+    JOIN {source} l ON l.well_id = g.well_id AND l.ts = g.last_ts
+    WHERE true
+    ON CONFLICT (well_id, bucket_ts) DO UPDATE SET
+        sample_count = sample_count + excluded.sample_count,
+        first_ts = MIN(first_ts, excluded.first_ts),
+        last_ts = MAX(last_ts, excluded.last_ts),
+        {updates},
+        cumulative_flow_first = CASE WHEN excluded.first_ts < first_ts
+                                     THEN excluded.cumulative_flow_first ELSE cumulative_flow_first END,
+        cumulative_flow_last = CASE WHEN excluded.last_ts > last_ts
+                                    THEN excluded.cumulative_flow_last ELSE cumulative_flow_last END
+    '''
+
+
+def well_stats_upsert_sql(source):
+    """把 source 表中的行按气井汇总后合并进 well_stats：累加行数，首末时间戳取较早/较晚，最新值取时间戳较新的一方"""
+    last_columns = ('oil_pressure', 'temperature', 'back_pressure', 'instant_flow', 'cumulative_flow', 'liquid_code')
+    updates = ',\n        '.join(
+        f'last_{column} = CASE WHEN excluded.last_ts > last_ts THEN excluded.last_{column} ELSE last_{column} END'
+        for column in last_columns)
+    return f'''
+    WITH g AS (
+        SELECT well_id, COUNT(*) AS row_count, MIN(ts) AS first_ts, MAX(ts) AS last_ts
+        FROM {source}
+        GROUP BY well_id
+    )
+    INSERT INTO well_stats (
+        well_id, first_ts, last_ts, row_count,
+        {', '.join(f'last_{column}' for column in last_columns)}
+    )
+    SELECT g.well_id, g.first_ts, g.last_ts, g.row_count,
+           {', '.join(f'l.{column}' for column in last_columns)}
+    FROM g
+    JOIN {source} l ON l.well_id = g.well_id AND l.ts = g.last_ts
+    WHERE true
+    ON CONFLICT (well_id) DO UPDATE SET
+        row_count = row_count + excluded.row_count,
+        first_ts = MIN(first_ts, excluded.first_ts),
+        last_ts = MAX(last_ts, excluded.last_ts),
+        {updates}
+    '''
+
+
+# 增量更新（临时表中的新增行）与重建（全部采样行）使用同一套语句
+BATCH_ROLLUP_SQL = [rollup_upsert_sql(table, seconds, 'temp.batch_samples') for table, _, seconds in ROLLUPS]
+REBUILD_ROLLUP_SQL = [rollup_upsert_sql(table, seconds, 'well_production_samples') for table, _, seconds in ROLLUPS]
+BATCH_WELL_STATS_SQL = well_stats_upsert_sql('temp.batch_samples')
+REBUILD_WELL_STATS_SQL = well_stats_upsert_sql('well_production_samples')
+
+
+def prepare_staging(conn):
+    """在写入连接上创建临时表（每个连接各自一份）"""
+    conn.execute(STAGING_DDL)
+
+
+def insert_batch(conn, rows, well_stats=True):
+    """
+    在调用方的事务中写入一批采样行并更新汇总表，时间戳重复的行被忽略。
+
+    参数:
+        conn (sqlite3.Connection): 已执行过 prepare_staging 的连接
+        rows (List[tuple]): 采样行，字段顺序见 schema.COMPACT_INSERT_SQL
+        well_stats (bool): 是否同时更新 well_stats（结构版本 4 起）
+
+    返回:
+        int: 实际新增的行数
+    """
+    conn.execute('DELETE FROM temp.batch_samples')
+    conn.executemany(STAGING_INSERT_SQL, rows)
+    conn.execute('''
+        DELETE FROM temp.batch_samples
+        WHERE EXISTS (SELECT 1 FROM well_production_samples s
+                      WHERE s.well_id = batch_samples.well_id AND s.ts = batch_samples.ts)
+    ''')
+    inserted = conn.execute(f'''
+        INSERT INTO well_production_samples ({SAMPLE_COLUMNS})
+        SELECT {SAMPLE_COLUMNS} FROM temp.batch_samples
+    ''').rowcount
+    if inserted:
+        for sql in BATCH_ROLLUP_SQL:
+            conn.execute(sql)
+        if well_stats:
+            conn.execute(BATCH_WELL_STATS_SQL)
+    return inserted
+
+
+def rebuild_rollups(conn):
+    """在调用方的事务中清空并按全部采样行重建汇总表"""
+    for table, _, _ in ROLLUPS:
+        conn.execute(f'DELETE FROM {table}')
+    for sql in REBUILD_ROLLUP_SQL:
+        conn.execute(sql)
+
+
+def rebuild_well_stats(conn):
+    """在调用方的事务中清空并按全部采样行重建 well_stats"""
+    conn.execute('DELETE FROM well_stats')
+    conn.execute(REBUILD_WELL_STATS_SQL)
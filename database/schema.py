@@ -0,0 +1,161 @@
+import calendar
+from datetime import datetime, timezone
+
+from rollups import WELL_STATS_DDL, rollup_ddl
+
+# 数据库结构版本（PRAGMA user_version）：
+#   1 - 原始结构：well_production_data 表，DATETIME 文本时间戳，积液情况保存中文字符串
+#   2 - 紧凑结构：well_production_samples 表，整数纪元秒时间戳，积液状态保存为代码（liquid_states 代码表），
+#       (well_id, ts) 为聚簇主键；原表名改为同名视图，按原来的列名与格式查询的程序无需修改
+#   3 - 紧凑结构 + 小时/日汇总表（见 rollups.py），随每批写入增量更新
+#   4 - 再加每井一行的 well_stats（首末时间戳、行数、最新值），同样随每批写入更新
+LEGACY_SCHEMA_VERSION = 1
+COMPACT_SCHEMA_VERSION = 2
+ROLLUP_SCHEMA_VERSION = 3
+WELL_STATS_SCHEMA_VERSION = 4
+LATEST_SCHEMA_VERSION = WELL_STATS_SCHEMA_VERSION
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# 积液状态代码表
+LIQUID_STATES = [(0, '无积液'), (1, '积液正常'), (2, '积液严重')]
+LIQUID_CODES = {label: code for code, label in LIQUID_STATES}
+LIQUID_LABELS = dict(LIQUID_STATES)
+
+WELLS_DDL = '''
+    CREATE TABLE IF NOT EXISTS wells (
+        well_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        well_name VARCHAR(50) NOT NULL UNIQUE,
+        location VARCHAR(100),
+        depth REAL,
+        status VARCHAR(20) DEFAULT 'active',
+        created_date DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+LEGACY_DDL = [
+    '''
+    CREATE TABLE IF NOT EXISTS well_production_data (
+        data_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        well_id INTEGER NOT NULL,
+        timestamp DATETIME NOT NULL,
+        oil_pressure REAL,
+        temperature REAL,
+        back_pressure REAL,
+        instant_flow REAL,
+        cumulative_flow REAL,
+        liquid_accumulation VARCHAR(20),
+        FOREIGN KEY (well_id) REFERENCES wells(well_id),
+        UNIQUE(well_id, timestamp)
+    )
+    ''',
+    '''
+    CREATE INDEX IF NOT EXISTS idx_well_timestamp 
+    ON well_production_data(well_id, timestamp)
+    ''',
+]
+
+# 采样行的字段顺序（写入器与各生成器共用）：
+# (well_id, ts 纪元秒, oil_pressure, temperature, back_pressure, instant_flow, cumulative_flow, liquid_code)
+LEGACY_INSERT_SQL = '''
+    INSERT OR IGNORE INTO well_production_data
+    (well_id, timestamp, oil_pressure, temperature, back_pressure,
+     instant_flow, cumulative_flow, liquid_accumulation)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+COMPACT_INSERT_SQL = '''
+    INSERT OR IGNORE INTO well_production_samples
+    (well_id, ts, oil_pressure, temperature, back_pressure,
+     instant_flow, cumulative_flow, liquid_code)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def compact_ddl(without_rowid=True):
+    """紧凑结构的建表语句；without_rowid 为 True 时采样表按 (well_id, ts) 聚簇存储"""
+    return [
+        '''
+        CREATE TABLE IF NOT EXISTS liquid_states (
+            code INTEGER PRIMARY KEY,
+            label VARCHAR(20) NOT NULL UNIQUE
+        )
+        ''',
+        f'''
+        CREATE TABLE IF NOT EXISTS well_production_samples (
+            well_id INTEGER NOT NULL,
+            ts INTEGER NOT NULL,
+            oil_pressure REAL,
+            temperature REAL,
+            back_pressure REAL,
+            instant_flow REAL,
+            cumulative_flow REAL,
+            liquid_code INTEGER,
+            PRIMARY KEY (well_id, ts),
+            FOREIGN KEY (well_id) REFERENCES wells(well_id),
+            FOREIGN KEY (liquid_code) REFERENCES liquid_states(code)
+        ){' WITHOUT ROWID' if without_rowid else ''}
+        ''',
+        # 兼容视图：原表名、原列名与原时间格式
+        '''
+        CREATE VIEW IF NOT EXISTS well_production_data AS
+        SELECT s.well_id,
+               datetime(s.ts, 'unixepoch') AS timestamp,
+               s.oil_pressure,
+               s.temperature,
+               s.back_pressure,
+               s.instant_flow,
+               s.cumulative_flow,
+               l.label AS liquid_accumulation
+        FROM well_production_samples s
+        LEFT JOIN liquid_states l ON l.code = s.liquid_code
+        ''',
+    ]
+
+
+def to_epoch(value):
+    """'%Y-%m-%d %H:%M:%S' 字符串或 datetime 转为纪元秒；时间按原样视为 UTC，与 SQLite 的 datetime(ts, 'unixepoch') 互逆"""
+    if isinstance(value, str):
+        value = datetime.strptime(value, TIME_FORMAT)
+    return calendar.timegm(value.timetuple())
+
+
+def format_epoch(ts):
+    """纪元秒转为 '%Y-%m-%d %H:%M:%S' 字符串"""
+    return datetime.fromtimestamp(ts, timezone.utc).strftime(TIME_FORMAT)
+
+
+def to_legacy_row(row):
+    """采样行转换为原始结构的行：时间戳转为文本，积液代码转为中文字符串"""
+    well_id, ts, oil_pressure, temperature, back_pressure, instant_flow, cumulative_flow, liquid_code = row
+    return (well_id, format_epoch(ts), oil_pressure, temperature, back_pressure,
+            instant_flow, cumulative_flow, LIQUID_LABELS.get(liquid_code))
+
+
+def get_schema_version(conn):
+    """
+    返回数据库的结构版本：0 表示尚未建表，其余见文件开头的版本说明。
+    """
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    if version:
+        return version
+    row = conn.execute("SELECT type FROM sqlite_master WHERE name = 'well_production_data'").fetchone()
+    return LEGACY_SCHEMA_VERSION if row and row[0] == 'table' else 0
+
+
+def create_schema(conn, version=LATEST_SCHEMA_VERSION, without_rowid=True):
+    """按指定版本建表（已存在的表保持不变）并记录结构版本"""
+    conn.execute(WELLS_DDL)
+    if version == LEGACY_SCHEMA_VERSION:
+        for statement in LEGACY_DDL:
+            conn.execute(statement)
+    else:
+        for statement in compact_ddl(without_rowid):
+            conn.execute(statement)
+        conn.executemany('INSERT OR IGNORE INTO liquid_states (code, label) VALUES (?, ?)', LIQUID_STATES)
+    if version >= ROLLUP_SCHEMA_VERSION:
+        for statement in rollup_ddl(without_rowid):
+            conn.execute(statement)
+    if version >= WELL_STATS_SCHEMA_VERSION:
+        conn.execute(WELL_STATS_DDL)
+    conn.execute(f'PRAGMA user_version = {int(version)}')
@@ -1,18 +1,359 @@
+import argparse
 import sqlite3
 import time
 import random
 from datetime import datetime, timedelta
 import threading
+import queue
 import logging
 import math
 
+from rollups import insert_batch, prepare_staging, rebuild_rollups, rebuild_well_stats
+from schema import (COMPACT_INSERT_SQL, COMPACT_SCHEMA_VERSION, LATEST_SCHEMA_VERSION, LEGACY_INSERT_SQL,
+                    LEGACY_SCHEMA_VERSION, LIQUID_CODES, LIQUID_STATES, ROLLUP_SCHEMA_VERSION,
+                    WELL_STATS_SCHEMA_VERSION, create_schema, format_epoch, get_schema_version, to_epoch,
+                    to_legacy_row)
+
+# 回填模式的默认衰减率（每模拟小时）：一年后基础流量约为初始的 17%
+BACKFILL_DECAY_RATE = 0.0002
+
+
+class BatchWriter:
+    """
+    单一写入线程：采集线程把采样行（单行或一批行）放入有界队列，唯一的写入线程持有一个 WAL 模式的 SQLite 连接，
+    从队列中取出所有气井的行，按时间间隔或行数阈值用 executemany 在一个事务内批量写入。
+    队列中的行数达到 queue_size 时采集线程最多阻塞 put_timeout 秒（背压），仍无空位则丢弃这些行并计数。
+    """
+
+    _STOP = object()  # 关闭标记，写入线程取到后写完队列中剩余的行再退出
+
+    def __init__(self, db_path, batch_size=500, flush_interval=1.0, report_interval=10.0, logger=None,
+                 queue_size=10000, put_timeout=5.0):
+        self.db_path = db_path
+        self.batch_size = batch_size  # 单个事务最多写入的行数
+        self.flush_interval = flush_interval  # 最长写入间隔（秒）
+        self.report_interval = report_interval  # 输出写入统计的间隔（秒），0 表示不输出
+        self.put_timeout = put_timeout  # 队列满时采集线程最长等待时间（秒）
+        self.logger = logger or logging.getLogger(__name__)
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')  # WAL 模式下仅在检查点时同步磁盘
+
+        # 采样行统一为紧凑结构的字段（纪元秒、积液代码）；尚未迁移的原始结构数据库在写入前转换
+        self.schema_version = get_schema_version(self.conn)
+        self.legacy = self.schema_version == LEGACY_SCHEMA_VERSION
+        self.insert_sql = LEGACY_INSERT_SQL if self.legacy else COMPACT_INSERT_SQL
+        # 带汇总表的结构：每批经临时表去重后写入，并在同一事务中增量更新小时/日汇总
+        self.rollups = self.schema_version >= ROLLUP_SCHEMA_VERSION
+        self.well_stats = self.schema_version >= WELL_STATS_SCHEMA_VERSION
+        if self.rollups:
+            prepare_staging(self.conn)
+
+        # 队列条目为 (行列表, 入队时间)；add_many 按 batch_size 切分，每个条目最多 batch_size 行。
+        # 容量按行数计：排队中与正在写入的行数之和不超过 queue_size（队列为空时单个条目总能入队）
+        self.queue = queue.Queue()
+        self.queue_size = queue_size
+        self.queued_rows = 0
+        self._capacity = threading.Condition()
+        self.enqueued = 0
+        self.dropped = 0  # 背压超时被丢弃的行
+        self.queue_high_water = 0
+        self.rows_written = 0
+        self.rows_ignored = 0  # 时间戳重复被忽略的行
+        self.failed = 0  # 写入出错、随事务回滚而丢失的行
+        self.flush_count = 0
+        self.flush_seconds_total = 0.0
+        self.flush_seconds_max = 0.0
+        self.latency_seconds_total = 0.0  # 入队到提交的耗时，按行累计
+        self.latency_seconds_max = 0.0
+        self.started_at = time.time()
+        self._counter_lock = threading.Lock()
+        self._conn_lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+
+    def start(self):
+        """启动写入线程"""
+        if self._thread is None:
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self._run, name='well-data-writer', daemon=True)
+            self._thread.start()
+
+    def add(self, row):
+        """采样行入队，字段顺序见 schema.COMPACT_INSERT_SQL；被丢弃时返回 False"""
+        return self.add_many([row])
+
+    def add_many(self, rows, block=False):
+        """
+        一批采样行入队（向量化采集每个周期的全部气井）。队列满时阻塞至多 put_timeout 秒，
+        超时或写入器已关闭时丢弃，返回 False；block 为 True 时一直等待到有空位（回填模式不丢数据）。
+        """
+        if not rows:
+            return True
+        for i in range(0, len(rows), self.batch_size):
+            chunk = rows[i:i + self.batch_size]
+            with self._capacity:
+                has_room = self._capacity.wait_for(
+                    lambda: self._closed or self.queued_rows == 0 or self.queued_rows + len(chunk) <= self.queue_size,
+                    timeout=None if block else self.put_timeout,
+                )
+                if self._closed or not has_room:
+                    self._count_dropped(len(chunk))
+                    return False
+                self.queued_rows += len(chunk)
+                queued_rows = self.queued_rows
+                self.queue.put((chunk, time.perf_counter()))
+            with self._counter_lock:
+                self.enqueued += len(chunk)
+                self.queue_high_water = max(self.queue_high_water, queued_rows)
+        return True
+
+    def _count_dropped(self, n):
+        with self._counter_lock:
+            before = self.dropped
+            self.dropped += n
+            dropped = self.dropped
+        if before == 0 or before // 1000 != dropped // 1000:
+            self.logger.warning(f"写入队列已满，累计丢弃{dropped}行")
+
+    def query_one(self, sql, params=()):
+        """在写入连接上执行查询，返回第一行"""
+        with self._conn_lock:
+            return self.conn.execute(sql, params).fetchone()
+
+    def query_all(self, sql, params=()):
+        """在写入连接上执行查询，返回所有行"""
+        with self._conn_lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def _write(self, items):
+        """把若干 (行列表, 入队时间) 在一个事务内写入数据库，返回实际写入的行数（重复时间戳的行被忽略）"""
+        rows = [row for chunk, _ in items for row in chunk]
+        if not rows:
+            return 0
+        params = [to_legacy_row(row) for row in rows] if self.legacy else rows
+
+        start = time.perf_counter()
+        try:
+            with self._conn_lock:
+                with self.conn:  # 一个事务，出错时回滚
+                    if self.rollups:
+                        inserted = insert_batch(self.conn, params, well_stats=self.well_stats)
+                    else:
+                        inserted = self.conn.executemany(self.insert_sql, params).rowcount
+        except sqlite3.Error as e:
+            self.logger.error(f"批量写入错误（{len(rows)}行）: {e}")
+            with self._counter_lock:
+                self.failed += len(rows)
+            return 0
+        finally:
+            # 写完（或失败）后释放队列容量，唤醒等待中的采集线程
+            with self._capacity:
+                self.queued_rows -= len(rows)
+                self._capacity.notify_all()
+        committed = time.perf_counter()
+        elapsed = committed - start
+
+        with self._counter_lock:
+            self.rows_written += inserted
+            self.rows_ignored += len(rows) - inserted
+            self.flush_count += 1
+            self.flush_seconds_total += elapsed
+            self.flush_seconds_max = max(self.flush_seconds_max, elapsed)
+            self.latency_seconds_total += sum((committed - enqueued_at) * len(chunk) for chunk, enqueued_at in items)
+            self.latency_seconds_max = max(self.latency_seconds_max, committed - min(t for _, t in items))
+        return inserted
+
+    def _next_batch(self):
+        """取出一批行：凑满 batch_size 行或等待超过 flush_interval 即返回；返回 (条目列表, 是否收到关闭标记)"""
+        items, n_rows = [], 0
+        deadline = time.monotonic() + self.flush_interval
+        while n_rows < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is self._STOP:
+                return items, True
+            items.append(item)
+            n_rows += len(item[0])
+        return items, False
+
+    def _run(self):
+        last_report = time.time()
+        stopping = False
+        while not stopping:
+            items, stopping = self._next_batch()
+            self._write(items)
+            if self.report_interval and time.time() - last_report >= self.report_interval:
+                self.logger.info(self.format_stats())
+                last_report = time.time()
+        # 收到关闭标记：写完队列中剩余的行
+        while True:
+            items = self._next_batch_nowait()
+            if not items:
+                break
+            self._write(items)
+
+    def _next_batch_nowait(self):
+        items, n_rows = [], 0
+        while n_rows < self.batch_size:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not self._STOP:
+                items.append(item)
+                n_rows += len(item[0])
+        return items
+
+    def stats(self):
+        """写入统计：入队/丢弃/写入/忽略/失败行数、队列长度与峰值、每秒行数、提交耗时与入队到提交的延迟（毫秒）"""
+        elapsed = max(time.time() - self.started_at, 1e-9)
+        with self._counter_lock:
+            return {
+                'enqueued': self.enqueued,
+                'dropped': self.dropped,
+                'rows_written': self.rows_written,
+                'rows_ignored': self.rows_ignored,
+                'failed': self.failed,
+                'rows_per_second': round(self.rows_written / elapsed, 1),
+                'queue_size': self.queued_rows,
+                'queue_high_water': self.queue_high_water,
+                'flushes': self.flush_count,
+                'avg_flush_ms': round(self.flush_seconds_total / self.flush_count * 1000, 2) if self.flush_count else 0.0,
+                'max_flush_ms': round(self.flush_seconds_max * 1000, 2),
+                'avg_latency_ms': round(self.latency_seconds_total / max(self.rows_written + self.rows_ignored, 1) * 1000, 2),
+                'max_latency_ms': round(self.latency_seconds_max * 1000, 2),
+            }
+
+    def format_stats(self):
+        stats = self.stats()
+        return (f"写入统计 - 累计{stats['rows_written']}行（忽略重复{stats['rows_ignored']}行, 丢弃{stats['dropped']}行, 写入失败{stats['failed']}行）, "
+                f"{stats['rows_per_second']}行/秒, 队列{stats['queue_size']}（峰值{stats['queue_high_water']}）, "
+                f"提交{stats['flushes']}次, 平均{stats['avg_flush_ms']}ms, 最大{stats['max_flush_ms']}ms, "
+                f"延迟平均{stats['avg_latency_ms']}ms, 最大{stats['max_latency_ms']}ms")
+
+    def close(self):
+        """
+        关闭写入器：不再接受新行，写入线程写完队列中已有的行并提交后退出，最后关闭连接。
+        应在所有采集线程退出后调用。
+        """
+        if self._closed:
+            return
+        with self._capacity:
+            self._closed = True
+            self._capacity.notify_all()  # 等待容量的采集线程立即返回（丢弃）
+        if self._thread is not None:
+            self.queue.put(self._STOP)
+            self._thread.join()
+        else:
+            # 写入线程未启动：在当前线程写完队列
+            while True:
+                items = self._next_batch_nowait()
+                if not items:
+                    break
+                self._write(items)
+        self.conn.close()
+
+
+class FieldTickGenerator:
+    """
+    向量化的多井采样：所有气井的状态保存为 NumPy 数组，每个采样周期用一次数组运算推进全部气井
+    （基础流量衰减、随机波动与累计流量积分），数值分布与逐井的 generate_sample 一致。
+    """
+
+    def __init__(self, well_ids, last_cumulative, data_ranges, liquid_codes, decay_rate,
+                 sample_hours=10 / 60, seed=None):
+        import numpy as np  # 仅向量化模式需要 NumPy
+
+        self.np = np
+        self.rng = np.random.default_rng(seed)
+        self.well_ids = list(well_ids)
+        self.cumulative = np.asarray(last_cumulative, dtype=np.float64)
+        self.data_ranges = data_ranges
+        self.liquid_codes = np.asarray(liquid_codes, dtype=np.int64)
+        self.decay_rate = decay_rate
+        self.sample_hours = sample_hours  # 每个采样周期对应的小时数，用于累计流量积分
+
+    def step(self, elapsed_hours):
+        """
+        推进一个采样周期。
+
+        参数:
+            elapsed_hours (float): 衰减依据的运行时间（小时）
+
+        返回:
+            dict: 各字段的一维数组（按气井），键与 well_production_samples 的列名一致
+        """
+        return {name: values[0] for name, values in self.steps([elapsed_hours]).items()}
+
+    def steps(self, elapsed_hours):
+        """
+        一次推进多个采样周期（回填模式按模拟日整块生成）。
+
+        参数:
+            elapsed_hours (Sequence[float]): 每个周期衰减依据的运行时间（小时）
+
+        返回:
+            dict: 各字段的二维数组，形状为 (周期数, 气井数)
+        """
+        np, rng, ranges = self.np, self.rng, self.data_ranges
+        shape = (len(elapsed_hours), len(self.well_ids))
+
+        # 衰减公式: 基础流量 × e^(-衰减率 × 运行时间)，加随机波动后不低于最小流量
+        base_flow = rng.uniform(*ranges['instant_flow'], shape)
+        decay_factor = np.exp(-self.decay_rate * np.asarray(elapsed_hours, dtype=np.float64))[:, None]
+        instant_flow = np.round(np.maximum(base_flow * decay_factor + rng.uniform(-5, 5, shape),
+                                           ranges['min_flow']), 1)
+
+        oil_pressure = np.round(rng.uniform(*ranges['oil_pressure'], shape) + rng.uniform(-0.1, 0.1, shape), 2)
+        temperature = np.round(rng.uniform(*ranges['temperature'], shape) + rng.uniform(-0.5, 0.5, shape), 1)
+        back_pressure = np.round(rng.uniform(*ranges['back_pressure'], shape) + rng.uniform(-0.05, 0.05, shape), 2)
+
+        # 累计流量 = 上次累计 + 瞬时流量 × 采样间隔，沿周期方向累加
+        cumulative_flow = np.round(self.cumulative + np.cumsum(instant_flow * self.sample_hours, axis=0), 3)
+        self.cumulative = cumulative_flow[-1]
+
+        return {
+            'oil_pressure': oil_pressure,
+            'temperature': temperature,
+            'back_pressure': back_pressure,
+            'instant_flow': instant_flow,
+            'cumulative_flow': cumulative_flow,
+            'liquid_code': self.liquid_codes[rng.integers(0, len(self.liquid_codes), shape)],
+        }
+
+    def rows(self, sample, timestamp):
+        """把一个周期的数组转换为写入器的行，timestamp 为纪元秒"""
+        return self.rows_many({name: values[None, :] for name, values in sample.items()}, [timestamp])
+
+    def rows_many(self, samples, timestamps):
+        """把多个周期的二维数组按周期先后展开为写入器的行"""
+        n = len(self.well_ids)
+        return list(zip(
+            self.well_ids * len(timestamps), [t for t in timestamps for _ in range(n)],
+            *(samples[name].ravel().tolist() for name in
+              ('oil_pressure', 'temperature', 'back_pressure', 'instant_flow', 'cumulative_flow',
+               'liquid_code')),
+        ))
+
 
 class WellDataSimulator:
-    def __init__(self, db_path='well_production.db',decay_rate=0.01, focus_well=None):
+    def __init__(self, db_path='well_production.db',decay_rate=0.01, focus_well=None,
+                 batch_size=500, flush_interval=1.0, producers=8, queue_size=10000, n_wells=5,
+                 schema_version=LATEST_SCHEMA_VERSION, without_rowid=True):
         self.db_path = db_path
+        self.schema_version = schema_version  # 新建数据库使用的结构版本（见 schema.py）
+        self.without_rowid = without_rowid
+        self.n_wells = n_wells  # 模拟的气井数，超过5口时自动补充"气井6"、"气井7"……
         self.wells = []  # 存储气井ID和名称
         self.running = False
+        self.stop_event = threading.Event()
         self.threads = []
+        self.producers = producers  # 采集线程数，不超过气井数
         self.decay_rate = decay_rate  # 衰减率，控制递减速度
         self.start_time = datetime.now()  # 记录开始时间
         self.focus_well = focus_well
@@ -27,45 +368,33 @@ class WellDataSimulator:
         # 初始化数据库
         self.init_database()
 
+        # 所有气井共用一个写入连接，采样行批量提交
+        self.writer = BatchWriter(self.db_path, batch_size=batch_size, flush_interval=flush_interval,
+                                  logger=self.logger, queue_size=queue_size)
+
     def init_database(self):
         """初始化数据库和表结构"""
         try:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
 
-            # 创建表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS wells (
-                    well_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    well_name VARCHAR(50) NOT NULL UNIQUE,
-                    location VARCHAR(100),
-                    depth REAL,
-                    status VARCHAR(20) DEFAULT 'active',
-                    created_date DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS well_production_data (
-                    data_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    well_id INTEGER NOT NULL,
-                    timestamp DATETIME NOT NULL,
-                    oil_pressure REAL,
-                    temperature REAL,
-                    back_pressure REAL,
-                    instant_flow REAL,
-                    cumulative_flow REAL,
-                    liquid_accumulation VARCHAR(20),
-                    FOREIGN KEY (well_id) REFERENCES wells(well_id),
-                    UNIQUE(well_id, timestamp)
-                )
-            ''')
-
-            # 创建索引
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_well_timestamp 
-                ON well_production_data(well_id, timestamp)
-            ''')
+            # 创建表：新数据库使用 schema_version 指定的结构；尚未迁移的原始结构数据库保持原样，
+            # 紧凑结构数据库补建汇总表与 well_stats
+            version = get_schema_version(conn)
+            if version == LEGACY_SCHEMA_VERSION:
+                self.logger.warning("数据库仍为原始结构（文本时间戳），可运行 migrate_schema.py 迁移到紧凑结构")
+                target_version = version
+            else:
+                target_version = max(version, self.schema_version)
+            create_schema(conn, target_version, without_rowid=self.without_rowid)
+            # 已有紧凑结构数据库新增的汇总表按已有采样行补齐
+            if version == COMPACT_SCHEMA_VERSION and target_version >= ROLLUP_SCHEMA_VERSION:
+                self.logger.info("为已有采样数据生成小时/日汇总...")
+                with conn:
+                    rebuild_rollups(conn)
+            if COMPACT_SCHEMA_VERSION <= version < WELL_STATS_SCHEMA_VERSION <= target_version:
+                with conn:
+                    rebuild_well_stats(conn)
 
             # 插入或更新五口气井信息
             wells_info = [
@@ -76,17 +405,23 @@ class WellDataSimulator:
                 ('气井5', '区块B', 2600.0)
             ]
 
-            for well_name, location, depth in wells_info:
-                cursor.execute('''
-                    INSERT OR REPLACE INTO wells (well_name, location, depth) 
-                    VALUES (?, ?, ?)
-                ''', (well_name, location, depth))
+            # 场站规模模拟：按区块与井深轮换补充气井
+            for i in range(len(wells_info) + 1, self.n_wells + 1):
+                _, location, depth = wells_info[(i - 1) % len(wells_info)]
+                wells_info.append((f'气井{i}', location, depth))
+
+            # 已存在的气井只更新信息，保持 well_id 不变（INSERT OR REPLACE 会删除旧行并分配新的 well_id）
+            cursor.executemany('''
+                INSERT INTO wells (well_name, location, depth) 
+                VALUES (?, ?, ?)
+                ON CONFLICT(well_name) DO UPDATE SET location = excluded.location, depth = excluded.depth
+            ''', wells_info)
 
             conn.commit()
             self.logger.info("数据库初始化完成")
 
             # 获取气井ID
-            cursor.execute("SELECT well_id, well_name FROM wells")
+            cursor.execute("SELECT well_id, well_name FROM wells ORDER BY well_id LIMIT ?", (self.n_wells,))
             self.wells = cursor.fetchall()
 
         except sqlite3.Error as e:
@@ -95,178 +430,319 @@ class WellDataSimulator:
             if conn:
                 conn.close()
 
+    def _samples_table(self):
+        """采样数据所在的表及其时间戳列"""
+        if self.writer.legacy:
+            return 'well_production_data', 'timestamp'
+        return 'well_production_samples', 'ts'
+
     def get_last_cumulative_flow(self, well_id):
-        """获取指定气井的最后累计流量"""
+        """获取指定气井的最后累计流量（使用写入器的连接，不再单独打开连接）"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT cumulative_flow FROM well_production_data 
-                WHERE well_id = ? ORDER BY timestamp DESC LIMIT 1
+            if self.writer.well_stats:
+                result = self.writer.query_one(
+                    'SELECT last_cumulative_flow FROM well_stats WHERE well_id = ?', (well_id,))
+                return result[0] if result else 0.0
+            table, ts = self._samples_table()
+            result = self.writer.query_one(f'''
+                SELECT cumulative_flow FROM {table} 
+                WHERE well_id = ? ORDER BY {ts} DESC LIMIT 1
             ''', (well_id,))
-            result = cursor.fetchone()
             return result[0] if result else 0.0
         except sqlite3.Error as e:
             self.logger.error(f"获取累计流量错误: {e}")
             return 0.0
-        finally:
-            if conn:
-                conn.close()
-
-    def generate_well_data(self, well_id, well_name):
-        """为单口气井生成模拟数据"""
-        # 获取上次的累计流量作为基准
-        last_cumulative = self.get_last_cumulative_flow(well_id)
-
-        # 模拟数据范围（根据实际情况调整）
-        data_ranges = {
-            'oil_pressure': (1.0, 8.0),  # MPa
-            'temperature': (25.0, 85.0),  # °C
-            'back_pressure': (0.5, 3.0),  # MPa
-            'instant_flow': (50.0, 300.0),  # m³/h
-            'min_flow': 30.0  # 最小瞬时流量，防止衰减到过低
-        }
 
-        # 积液情况选项
-        liquid_options = ['无积液', '积液正常', '积液严重']
+    def get_last_cumulative_flows(self):
+        """一次查询获取所有气井的最后累计流量：{well_id: 累计流量}"""
+        try:
+            if self.writer.well_stats:
+                return dict(self.writer.query_all('SELECT well_id, last_cumulative_flow FROM well_stats'))
+            # MAX() 聚合时裸列取自时间戳最大的那一行
+            table, ts = self._samples_table()
+            rows = self.writer.query_all(f'''
+                SELECT well_id, cumulative_flow, MAX({ts}) FROM {table}
+                GROUP BY well_id
+            ''')
+            return {well_id: cumulative_flow for well_id, cumulative_flow, _ in rows}
+        except sqlite3.Error as e:
+            self.logger.error(f"获取累计流量错误: {e}")
+            return {}
+
+    # 模拟数据范围（根据实际情况调整）
+    data_ranges = {
+        'oil_pressure': (1.0, 8.0),  # MPa
+        'temperature': (25.0, 85.0),  # °C
+        'back_pressure': (0.5, 3.0),  # MPa
+        'instant_flow': (50.0, 300.0),  # m³/h
+        'min_flow': 30.0  # 最小瞬时流量，防止衰减到过低
+    }
+
+    # 积液情况选项：无积液/积液正常/积液严重，以代码保存（见 schema.LIQUID_STATES）
+    liquid_codes = [code for code, _ in LIQUID_STATES]
+
+    # 模拟每秒采10min
+    sim_start_time = datetime(2024, 9, 26, 8, 0, 0)  # 自定义起始时间
+    sample_interval = timedelta(minutes=10)  # 10分钟间隔
+    sim_start_ts = to_epoch(sim_start_time)
+    sample_seconds = int(sample_interval.total_seconds())
+
+    def init_well_state(self, well_id):
+        """单口气井的采集状态：上次的累计流量作为基准，采样计数器从0开始"""
+        return {'last_cumulative': self.get_last_cumulative_flow(well_id), 'sample_count': 0}
+
+    def generate_sample(self, well_id, well_name, state):
+        """为单口气井生成一个采样点并交给写入器"""
+        data_ranges = self.data_ranges
+
+        # 生成随机数据（添加小幅波动模拟真实情况）
+        # 计算运行时间（小时）作为衰减依据
+        elapsed_time = (datetime.now() - self.start_time).total_seconds() / 3600
+
+        # 生成基础瞬时流量
+        base_flow = random.uniform(*data_ranges['instant_flow'])
+
+        # 计算衰减系数 (随时间增加而减小)
+        # 衰减公式: 基础流量 × e^(-衰减率 × 运行时间)
+        decay_factor = math.exp(-self.decay_rate * elapsed_time)
+        decayed_flow = base_flow * decay_factor
+
+        # 确保流量不会低于最小值，添加随机波动
+        instant_flow = round(max(decayed_flow + random.uniform(-5, 5),
+                                 data_ranges['min_flow']), 1)
+
+        oil_pressure = round(random.uniform(*data_ranges['oil_pressure']) +
+                             random.uniform(-0.1, 0.1), 2)
+        temperature = round(random.uniform(*data_ranges['temperature']) +
+                            random.uniform(-0.5, 0.5), 1)
+        back_pressure = round(random.uniform(*data_ranges['back_pressure']) +
+                              random.uniform(-0.05, 0.05), 2)
+
+        # 计算累计流量（瞬时流量 × 时间间隔，10分钟=10/60小时）
+        time_interval_hours = 10 / 60
+        flow_increment = instant_flow * time_interval_hours
+        cumulative_flow = round(state['last_cumulative'] + flow_increment, 3)
+        state['last_cumulative'] = cumulative_flow
+
+        # 随机选择积液情况
+        liquid_code = random.choice(self.liquid_codes)
+
+        #时间戳定义：整数纪元秒
+        state['sample_count'] += 1  # 每次采样，计数器+1
+        current_ts = self.sim_start_ts + state['sample_count'] * self.sample_seconds
+        current_time = format_epoch(current_ts)  # 日志中保持原格式
+
+        # 插入数据库
+        self.insert_well_data(
+            well_id, current_ts, oil_pressure, temperature,
+            back_pressure, instant_flow, cumulative_flow,
+            liquid_code
+        )
 
-        # 模拟每秒采10min
-        sim_start_time = datetime(2024, 9, 26, 8, 0, 0)  # 自定义起始时间
-        sample_interval = timedelta(minutes=10)  # 10分钟间隔
-        sample_count = 0  # 采样计数器
+        # 修改为：只打印关注的气井，且用info级别（更明显）
+        if self.focus_well == well_name:  # 只显示指定气井
+            self.logger.info(f"【{well_name}】实时数据 - 时间: {current_time}, "
+                             f"油压: {oil_pressure}MPa, 温度: {temperature}°C, "
+                             f"瞬时流量: {instant_flow}m³/h, 累计流量: {cumulative_flow}m³")
+        else:
+            # 非关注气井仍用debug级别，不干扰显示
+            self.logger.debug(f"{well_name} - 时间: {current_time}, 瞬时流量: {instant_flow}m³/h")
+
+    def generate_well_data(self, wells):
+        """采集线程：每秒为分到的每口气井生成一个采样点，放入写入队列"""
+        states = {well_id: self.init_well_state(well_id) for well_id, _ in wells}
+
+        while not self.stop_event.is_set():
+            for well_id, well_name in wells:
+                if self.stop_event.is_set():
+                    break
+                try:
+                    self.generate_sample(well_id, well_name, states[well_id])
+                except Exception as e:
+                    self.logger.error(f"生成{well_name}数据错误: {e}")
+
+            # 每秒采样一次；停止时立即唤醒
+            self.stop_event.wait(1)
+
+    def generate_field_data(self, tick_seconds=1.0, seed=None):
+        """向量化采集线程：每个周期用一次数组运算为所有气井生成采样点，整批放入写入队列"""
+        last_flows = self.get_last_cumulative_flows()
+        generator = FieldTickGenerator(
+            [well_id for well_id, _ in self.wells],
+            [last_flows.get(well_id, 0.0) for well_id, _ in self.wells],
+            self.data_ranges, self.liquid_codes, self.decay_rate, seed=seed,
+        )
+        focus_index = next((i for i, (_, name) in enumerate(self.wells) if name == self.focus_well), None)
+        sample_count = 0
 
-        while self.running:
+        while not self.stop_event.is_set():
+            tick_start = time.monotonic()
             try:
-
-
-                # 生成随机数据（添加小幅波动模拟真实情况）
-                # 计算运行时间（小时）作为衰减依据
                 elapsed_time = (datetime.now() - self.start_time).total_seconds() / 3600
-
-                # 生成基础瞬时流量
-                base_flow = random.uniform(*data_ranges['instant_flow'])
-
-                # 计算衰减系数 (随时间增加而减小)
-                # 衰减公式: 基础流量 × e^(-衰减率 × 运行时间)
-                decay_factor = math.exp(-self.decay_rate * elapsed_time)
-                decayed_flow = base_flow * decay_factor
-
-                # 确保流量不会低于最小值，添加随机波动
-                instant_flow = round(max(decayed_flow + random.uniform(-5, 5),
-                                         data_ranges['min_flow']), 1)
-
-                oil_pressure = round(random.uniform(*data_ranges['oil_pressure']) +
-                                     random.uniform(-0.1, 0.1), 2)
-                temperature = round(random.uniform(*data_ranges['temperature']) +
-                                    random.uniform(-0.5, 0.5), 1)
-                back_pressure = round(random.uniform(*data_ranges['back_pressure']) +
-                                      random.uniform(-0.05, 0.05), 2)
-
-                # 计算累计流量（瞬时流量 × 时间间隔，5秒=5/3600小时）
-                time_interval_hours = 10 / 60
-                flow_increment = instant_flow * time_interval_hours
-                cumulative_flow = round(last_cumulative + flow_increment, 3)
-                last_cumulative = cumulative_flow
-
-                # 随机选择积液情况
-                liquid_accumulation = random.choice(liquid_options)
-
-                #时间戳定义
-                sample_count += 1  # 每次循环，计数器+1
-                current_sim_time = sim_start_time + (sample_count * sample_interval)
-                current_time = current_sim_time.strftime('%Y-%m-%d %H:%M:%S')  # 保持原格式
-
-                # 当前时间戳
-                # current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-                # 插入数据库
-                self.insert_well_data(
-                    well_id, current_time, oil_pressure, temperature,
-                    back_pressure, instant_flow, cumulative_flow,
-                    liquid_accumulation
-                )
-
-
-                # 修改为：只打印关注的气井，且用info级别（更明显）
-                if self.focus_well == well_name:  # 只显示指定气井
-                    self.logger.info(f"【{well_name}】实时数据 - 时间: {current_time}, "
-                                     f"油压: {oil_pressure}MPa, 温度: {temperature}°C, "
-                                     f"瞬时流量: {instant_flow}m³/h, 累计流量: {cumulative_flow}m³")
-                else:
-                    # 非关注气井仍用debug级别，不干扰显示
-                    self.logger.debug(f"{well_name} - 时间: {current_time}, 瞬时流量: {instant_flow}m³/h")
-
+                sample = generator.step(elapsed_time)
+                sample_count += 1
+                current_ts = self.sim_start_ts + sample_count * self.sample_seconds
+                current_time = format_epoch(current_ts)
+                self.writer.add_many(generator.rows(sample, current_ts))
+
+                if focus_index is not None:
+                    self.logger.info(f"【{self.focus_well}】实时数据 - 时间: {current_time}, "
+                                     f"油压: {sample['oil_pressure'][focus_index]}MPa, "
+                                     f"温度: {sample['temperature'][focus_index]}°C, "
+                                     f"瞬时流量: {sample['instant_flow'][focus_index]}m³/h, "
+                                     f"累计流量: {sample['cumulative_flow'][focus_index]}m³")
             except Exception as e:
-                self.logger.error(f"生成{well_name}数据错误: {e}")
+                self.logger.error(f"生成采样周期数据错误: {e}")
+
+            # 扣除本周期的生成与入队耗时，保持采样节奏
+            self.stop_event.wait(max(0.0, tick_seconds - (time.monotonic() - tick_start)))
+
+    def backfill(self, days, seed=0, start_time=None, rows_per_block=50000):
+        """
+        回填历史数据：不按墙钟节奏，从 start_time 起为所有气井生成 days 个模拟日的采样点，
+        写入速度只受写入线程限制（入队时阻塞等待，不丢数据）。衰减按模拟时间计算，
+        相同种子、相同的初始数据库得到完全相同的数据。每次用 NumPy 生成约 rows_per_block 行。
+
+        返回:
+            dict: 写入统计
+        """
+        start_ts = to_epoch(start_time or self.sim_start_time)
+        samples_per_day = int(timedelta(days=1) / self.sample_interval)
+        sample_hours = self.sample_interval.total_seconds() / 3600
+        last_flows = self.get_last_cumulative_flows()
+        generator = FieldTickGenerator(
+            [well_id for well_id, _ in self.wells],
+            [last_flows.get(well_id, 0.0) for well_id, _ in self.wells],
+            self.data_ranges, self.liquid_codes, self.decay_rate, sample_hours=sample_hours, seed=seed,
+        )
 
-            # 等待5秒
-            time.sleep(1)
+        self.logger.info(f"开始回填：{len(self.wells)}口气井 × {days}天，起始时间 {format_epoch(start_ts)}，种子 {seed}")
+        self.writer.start()
+        started = time.perf_counter()
+        total_ticks = days * samples_per_day
+        ticks_per_block = max(1, rows_per_block // max(len(self.wells), 1))
+        for first in range(1, total_ticks + 1, ticks_per_block):
+            if self.stop_event.is_set():
+                break
+            ticks = range(first, min(first + ticks_per_block, total_ticks + 1))
+            samples = generator.steps([tick * sample_hours for tick in ticks])
+            timestamps = [start_ts + tick * self.sample_seconds for tick in ticks]
+            self.writer.add_many(generator.rows_many(samples, timestamps), block=True)
+
+            # 每跨过30个模拟日输出一次进度
+            done_days = ticks[-1] // samples_per_day
+            if ticks[-1] == total_ticks or done_days // 30 > (first - 1) // samples_per_day // 30:
+                self.logger.info(f"回填进度 {done_days}/{days}天，已生成{ticks[-1] * len(self.wells)}行，"
+                                 f"用时{time.perf_counter() - started:.1f}秒")
+
+        self.writer.close()
+        self.logger.info(self.writer.format_stats())
+        return self.writer.stats()
 
     def insert_well_data(self, well_id, timestamp, oil_pressure, temperature,
                          back_pressure, instant_flow, cumulative_flow, liquid_accumulation):
-        """插入气井数据到数据库"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
-            cursor.execute('''
-                INSERT INTO well_production_data 
-                (well_id, timestamp, oil_pressure, temperature, back_pressure, 
-                 instant_flow, cumulative_flow, liquid_accumulation)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (well_id, timestamp, oil_pressure, temperature, back_pressure,
-                  instant_flow, cumulative_flow, liquid_accumulation))
-
-            conn.commit()
-
-        except sqlite3.IntegrityError:
-            # 时间戳重复，忽略这次插入
-            pass
-        except sqlite3.Error as e:
-            self.logger.error(f"插入数据错误: {e}")
-        finally:
-            if conn:
-                conn.close()
-
-    def start_simulation(self):
-        """开始模拟数据采集"""
+        """
+        插入气井数据：交给批量写入器缓存，按间隔或行数阈值批量提交（时间戳重复的行被忽略）。
+        timestamp 可以是纪元秒或 '%Y-%m-%d %H:%M:%S' 字符串，liquid_accumulation 可以是代码或中文字符串。
+        """
+        if isinstance(timestamp, str):
+            timestamp = to_epoch(timestamp)
+        if isinstance(liquid_accumulation, str):
+            liquid_accumulation = LIQUID_CODES[liquid_accumulation]
+        self.writer.add((well_id, timestamp, oil_pressure, temperature, back_pressure,
+                         instant_flow, cumulative_flow, liquid_accumulation))
+
+    def start_simulation(self, mode='threads', tick_seconds=1.0, seed=None):
+        """
+        开始模拟数据采集。mode 为 'threads' 时气井分给若干采集线程逐井生成；
+        为 'vectorized' 时一个线程每个周期用 NumPy 一次推进所有气井，适合上万口井的规模测试。
+        """
         self.running = True
+        self.stop_event.clear()
         self.logger.info("开始模拟数据采集...")
+        self.writer.start()
+
+        if mode == 'vectorized':
+            thread = threading.Thread(target=self.generate_field_data, args=(tick_seconds, seed),
+                                      name="well-field-producer", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+            self.logger.info(f"启动向量化采集线程：{len(self.wells)}口气井，周期{tick_seconds}秒")
+            return
 
-        # 为每口气井创建独立的采集线程
-        for well_id, well_name in self.wells:
+        # 气井轮流分给若干采集线程，所有线程把采样行放入同一个写入队列，由唯一的写入线程落库
+        n_producers = max(1, min(self.producers or len(self.wells), len(self.wells)))
+        for i in range(n_producers):
+            wells = self.wells[i::n_producers]
             thread = threading.Thread(
                 target=self.generate_well_data,
-                args=(well_id, well_name)
+                args=(wells,),
+                name=f"well-producer-{i}"
             )
             thread.daemon = True
             thread.start()
             self.threads.append(thread)
-            self.logger.info(f"启动{well_name}数据采集线程")
+            self.logger.info(f"启动采集线程{i}：{len(wells)}口气井")
 
         self.logger.info(f"共启动{len(self.threads)}个数据采集线程")
 
     def stop_simulation(self):
         """停止模拟数据采集"""
         self.running = False
+        self.stop_event.set()
         self.logger.info("停止数据采集...")
 
-        # 等待所有线程结束
+        # 采集线程在当前采样点完成后退出（队列满时最多等待 put_timeout 秒）
         for thread in self.threads:
-            thread.join(timeout=2)
+            thread.join()
+        self.threads = []
 
+        # 写入线程写完队列中剩余的行并提交后退出
+        self.writer.close()
+        self.logger.info(self.writer.format_stats())
         self.logger.info("数据采集已停止")
 
 
 def main():
     """主函数"""
-    focus_well = input("请输入要实时显示的气井名称（如'气井1'），直接回车默认显示气井1：") or "气井1"
+    parser = argparse.ArgumentParser(description="气井生产数据模拟采集")
+    parser.add_argument("--mode", choices=["threads", "vectorized", "backfill"], default="threads",
+                        help="threads: 逐井采集线程；vectorized: NumPy 一次推进所有气井；backfill: 不限速回填历史数据")
+    parser.add_argument("--wells", type=int, default=5, help="模拟的气井数")
+    parser.add_argument("--tick", type=float, default=1.0, help="向量化模式的采样周期（秒）")
+    parser.add_argument("--seed", type=int, default=None, help="向量化/回填模式的随机种子（回填默认0）")
+    parser.add_argument("--days", type=int, default=30, help="回填的模拟天数")
+    parser.add_argument("--decay-rate", type=float, default=None,
+                        help=f"衰减率（每小时），默认实时模式 0.01、回填模式 {BACKFILL_DECAY_RATE}（按模拟时间）")
+    parser.add_argument("--db", default="well_production.db", help="数据库文件")
+    parser.add_argument("--focus-well", default=None, help="实时显示的气井名称，不指定时交互输入")
+    parser.add_argument("--legacy-schema", action="store_true", help="新建数据库时使用原始结构（文本时间戳）")
+    parser.add_argument("--with-rowid", action="store_true", help="新建紧凑结构时采样表保留 rowid（不按主键聚簇）")
+    args = parser.parse_args()
+    schema_options = {"schema_version": LEGACY_SCHEMA_VERSION if args.legacy_schema else LATEST_SCHEMA_VERSION,
+                      "without_rowid": not args.with_rowid}
+
+    if args.mode == "backfill":
+        simulator = WellDataSimulator(db_path=args.db, n_wells=args.wells, batch_size=5000, queue_size=100000,
+                                      decay_rate=args.decay_rate if args.decay_rate is not None else BACKFILL_DECAY_RATE,
+                                      **schema_options)
+        try:
+            simulator.backfill(args.days, seed=args.seed if args.seed is not None else 0)
+        except KeyboardInterrupt:
+            print("\n接收到中断信号，正在写入已生成的数据...")
+            simulator.stop_event.set()
+            simulator.writer.close()
+        return
+
+    focus_well = args.focus_well or input("请输入要实时显示的气井名称（如'气井1'），直接回车默认显示气井1：") or "气井1"
 
-    simulator = WellDataSimulator(focus_well=focus_well)
+    simulator = WellDataSimulator(db_path=args.db, focus_well=focus_well, n_wells=args.wells,
+                                  decay_rate=args.decay_rate if args.decay_rate is not None else 0.01,
+                                  **schema_options)
 
     try:
         # 启动模拟
-        simulator.start_simulation()
+        simulator.start_simulation(mode=args.mode, tick_seconds=args.tick, seed=args.seed)
         print(f"数据采集程序运行中...正在实时显示【{focus_well}】的数据，按Ctrl+C停止")
         while True:
             time.sleep(1)
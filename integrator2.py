@@ -74,6 +74,7 @@ import time
 import signal
 import socket
 import os, sys
+from integrator_modules.app_catalogue import get_app_catalogue, get_user_table
 
 SERVER_IP = os.getenv('SERVER_IP', 'localhost')  # 从环境变量获取服务器IP
 # *********************************************************************************************
@@ -99,6 +100,16 @@ def Read_Apps_from_Excel(file_path):
     return df
 
 
+# - 读取缓存的应用目录与用户表：工作簿只解析一次，文件修改后自动重新解析，所有会话共享 ----------------------
+#
+def Read_App_Catalogue():
+    return get_app_catalogue("./integrator_config/Radio_Icon_Text_Link_RoleSTRING_for_webURLs.xlsx")
+
+
+def Read_User_Table():
+    return get_user_table("./integrator_config/User_RoleSTRING_Password_for_Using_MES.xlsx")
+
+
 # ====== 启动 Streamlit 子应用并记录其 PID/Port/App name ===========================================
 #                     link,
 #                     port=port,
@@ -354,13 +365,8 @@ def Login_Control():
     ''', unsafe_allow_html=True)
 
     # 读取Excel配置文件
-    users_df = Read_Apps_from_Excel(
-        "./integrator_config/User_RoleSTRING_Password_for_Using_MES.xlsx"
-    )
-    users = users_df.values.tolist()
-    users_n = len(users)
-    users_list = [users[i][0] for i in range(users_n)]
-    password_list = [users[i][1] for i in range(users_n)]
+    user_table = Read_User_Table()
+    users_list = list(user_table.users)
 
     # 使用CSS固定定位的登录表单
     # #tymx10.14修改/* CSS精确定位 */right: 40% !important;
@@ -394,13 +400,6 @@ def Login_Control():
         # 用户名选择
         my_selected_user = st.selectbox("用户名", users_list, key="login_user")
 
-        # 获取password序列
-        located_seq_no = 0
-        for i in range(users_n):
-            if users[i][0] == my_selected_user:
-                located_seq_no = i
-                break
-
         # 密码输入
         my_password = st.text_input("密码", type="password", key="login_password")
 
@@ -408,7 +407,7 @@ def Login_Control():
         login_button = st.form_submit_button("登录")
 
         if login_button:
-            if my_password == password_list[located_seq_no]:
+            if user_table.check_password(my_selected_user, my_password):
                 st.session_state.logged_in = True
                 st.session_state.employee_info = {
                     "user": my_selected_user,
@@ -531,9 +530,9 @@ def Show_an_Icon_Link(image_link_pairs, my_login_user):
 # ----------------------------------------------------------------------------------------------
 #
 def Show_Clickable_Icons_and_Start_Webapp_for_a_DataFrame_with_a_User_and_the_Role(
-        apps_df, my_login_user
+        apps, my_login_user
 ):
-    if apps_df.empty:
+    if not apps:
         st.write(
             ":blue[ TIPS 3: 用户 <]",
             my_login_user[0],
@@ -545,7 +544,7 @@ def Show_Clickable_Icons_and_Start_Webapp_for_a_DataFrame_with_a_User_and_the_Ro
     #
     # 显示对应于所选radio菜单项下，基于所规定的"用户角色"的图标icon子集
     cols = st.columns(8)
-    for idx, row in enumerate(apps_df.itertuples()):
+    for idx, row in enumerate(apps):
         with cols[idx % 8]:
             Show_an_Icon_Link(
                 {"image_path": row.Icon, "link": row.Link, "text": row.Text},
@@ -557,22 +556,20 @@ def Show_Clickable_Icons_and_Start_Webapp_for_a_DataFrame_with_a_User_and_the_Ro
 # --- 处理Radio菜单项 ---------------------------------------------------------------------------
 #
 def Generate_Clickable_Icons_and_Start_Webapp_for_a_Radio_Menu_Item_with_a_User_and_the_Role(
-        apps_df, radio_menu_item, my_login_user
+        catalogue, radio_menu_item, my_login_user
 ):
-    apps_df = apps_df[
-        apps_df["Radio"] == radio_menu_item
-        ]  # 把excel配置文件中radio列中，属于radio_menu_item的数据项赛选出来，再赋给app_df
+    apps = catalogue.apps_for_radio(radio_menu_item)  # 应用目录中按radio列预先建好的索引
     # 当用户User的角色role是"Admin"时，显示radio_menu_item菜单项下的所有图标icon链接及其对应的webapp
     Show_Clickable_Icons_and_Start_Webapp_for_a_DataFrame_with_a_User_and_the_Role(
-        apps_df, my_login_user
+        apps, my_login_user
     )
     return
 
 
 # ----------------------------------------------------------------------------------------------
 #
-def Generate_All_Clickable_Icons_and_Start_Webapp(apps_df, my_login_user):
-    # 显示所有icons，这里的DataFrame类型的变量apps_df是由原始的excel表导入的
+def Generate_All_Clickable_Icons_and_Start_Webapp(catalogue, my_login_user):
+    # 显示所有icons，这里的catalogue是由原始的excel表解析并缓存的应用目录
     if my_login_user[1] != "Admin":
         st.write(
             ":blue[ TIPS 4: 用户 <]",
@@ -584,22 +581,21 @@ def Generate_All_Clickable_Icons_and_Start_Webapp(apps_df, my_login_user):
         return
     else:
         Show_Clickable_Icons_and_Start_Webapp_for_a_DataFrame_with_a_User_and_the_Role(
-            apps_df, my_login_user
+            catalogue.entries, my_login_user
         )
         return
 
 
-# 整合后的 main 函数和 Handle_a_Radio_Menu_Item 函数 apps_df, myradio, my_login_user
-def Handle_a_Radio_Menu_Item(apps_df, radio_menu_item, my_login_user):
+# 整合后的 main 函数和 Handle_a_Radio_Menu_Item 函数 catalogue, myradio, my_login_user
+def Handle_a_Radio_Menu_Item(catalogue, radio_menu_item, my_login_user):
     # 获取当前 Radio 下所有记录（不区分角色）
-    full_df = apps_df[apps_df["Radio"] == radio_menu_item]
-    filtered_df = full_df
+    apps = catalogue.apps_for_radio(radio_menu_item)
 
-    if filtered_df.empty:
+    if not apps:
         st.info(f"当前用户 **{my_login_user[0]}** 在【{radio_menu_item}】下无可用功能")
     else:
         cols = st.columns(8)
-        for idx, row in enumerate(filtered_df.itertuples()):  # tabe_apps按行遍历
+        for idx, row in enumerate(apps):  # tabe_apps按行遍历
             with cols[idx % 8]:  # 返回余数
                 Show_an_Icon_Link(
                     {"image_path": row.Icon, "link": row.Link, "text": row.Text},
@@ -748,9 +744,9 @@ def main():
     with col2:
         with st.container(border=True, height=container_heigth):
             st.write("🤹‍♂️" + f":rainbow[ > 处理Radio菜单项: {myradio}]")
-            apps_df = Read_Apps_from_Excel("./integrator_config/Radio_Icon_Text_Link_RoleSTRING_for_webURLs.xlsx")
-            if myradio in apps_df["Radio"].unique():
-                Handle_a_Radio_Menu_Item(apps_df, myradio, my_login_user)
+            catalogue = Read_App_Catalogue()
+            if myradio in catalogue.by_radio:
+                Handle_a_Radio_Menu_Item(catalogue, myradio, my_login_user)
             elif myradio == "平台简介":
                 page_n = 5
                 Help_for_Using_Webapp_Integrator(page_n, my_login_user)
@@ -1,21 +1,21 @@
-import base64
 import html
 import streamlit as st
-from PIL import Image
-import pandas as pd
-import streamlit.components.v1 as components
-import subprocess
 import time
 import signal
-import socket
 import os, sys
-
-SERVER_IP = os.getenv('SERVER_IP', 'localhost')  # 从环境变量获取服务器IP
+import threading
+import uuid
+from integrator_modules.app_catalogue import NavigationIndex, get_app_catalogue, get_user_table
+from integrator_modules.static_assets import image_src
+from rule_reasoning.modules.help_utils import show_help_images
+
+# 启动服务（注册表、端口池、反向代理、守护线程、预热池等，见 integrator_modules/launch_service.py）、pandas、
+# streamlit.components 均在首次用到时才导入，登录页首次渲染不必等待；python -m integrator_modules.startup_benchmark 检查导入耗时
+ADMIN_USERS = os.getenv('APP_ADMIN_USERS', '西交团队').split(',')  # 可访问"系统监控"页面的用户
 # *********************************************************************************************
 # 全局变量定义：用于widgets-UI控件的唯一key设置
 global mywidgets_key_n
 mywidgets_key_n = 0
-port_pid_map = {}
 
 
 # ---------------------------------------------------------------------------------------------
@@ -27,69 +27,81 @@ def Setup_a_Unique_Widget_Key():
     return mywidgets_key
 
 
-# - 读取Excel文件 -------------------------------------------------------------------------------
+# - 读取缓存的应用目录与用户表：工作簿只解析一次，文件修改后自动重新解析，所有会话共享 ----------------------
 #
-def Read_Apps_from_Excel(file_path):
-    df = pd.read_excel(file_path)
-    return df
-
-
-# ====== 启动 Streamlit 子应用并记录其 PID/Port/App name ===========================================
-#                     link,
-#                     port=port,
-#                     text=text,
-#                     user=my_login_user[0],
-#                     role=my_login_user[1],
-#                     password=st.session_state.get("password", "")
-
-def start_streamlit_app(app_path, port, text, user=None, password=None):
-    env = os.environ.copy()  # 创建当前系统环境变量的一份副本并保存到 env 变量中
-    env["APP_PORT"] = str(port)
-    env["APP_TEXT"] = text
-    env["STREAMLIT_SERVER_HEADLESS"] = (
-        "true"  # ✅ 关键，加上这句！streamlit不会自动打开浏览器  无头模式
-    )
-    if user:
-        env["APP_USER"] = user
-    if password:
-        env["APP_PASSWORD"] = password
-
-    proc = subprocess.Popen(
-        ["streamlit", "run", app_path, "--server.port", str(port)],
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-        env=env,
+def Read_App_Catalogue():
+    return get_app_catalogue("./integrator_config/Radio_Icon_Text_Link_RoleSTRING_for_webURLs.xlsx")
+
+
+def Read_User_Table():
+    return get_user_table("./integrator_config/User_RoleSTRING_Password_for_Using_MES.xlsx")
+
+
+# - 启动排队提示：返回 on_queue 回调，在占位控件中显示前面还有多少个启动请求 -----------------------------
+#
+def Show_Launch_Queue_Position(placeholder):
+    def on_queue(position):
+        placeholder.info(f"⏳ 启动请求排队中，前面还有 {position} 个请求...")
+    return on_queue
+
+
+# - 在新窗口中打开网址：通过 components.html 注入脚本，features 为 window.open 的窗口参数 ---------------
+#
+def Open_Url_in_New_Window(url, features=None):
+    import streamlit.components.v1 as components
+    args = f'"{url}", "_blank"' + (f', "{features}"' if features else "")
+    components.html(
+        f"""
+        <script>
+            window.open({args});
+        </script>
+        """,
+        height=0,
     )
-    port_pid_map[port] = proc.pid
-    print(f"🚀 子进程 PID = {proc.pid} 启动成功，监听端口 {port}，名称为 {text}")
-    return proc.pid
-
-
-# ====== 综合启动函数：启动 + 注册监听 ===========================================================
-#                     link,
-#                     port=port,
-#                     text=text,
-#                     user=my_login_user[0],
-#                     role=my_login_user[1],
-#                     password=st.session_state.get("password", "")
-def launch_streamlit_with_monitor(
-        app_path, port, text, user=None, password=None
-):
-    pid = start_streamlit_app(app_path, port, text, user, password)
-    return pid
 
 
-# - 加载基于"User_RoleLIST_Password"的excel文件，返回选择的User和Role -----------------------------
+# - 当前浏览器会话的ID：启动令牌按 (会话ID, 工具) 去重 -------------------------------------------------
+#
+def Get_Launch_Session_Id():
+    if "launch_session_id" not in st.session_state:
+        st.session_state.launch_session_id = uuid.uuid4().hex
+    return st.session_state.launch_session_id
+
+
+# - 打开工具：启动（或复用）子应用并在新窗口中打开，启动服务在首次打开工具时才导入 --------------------------
+# 双击或 rerun 导致的重复点击在去重窗口内共享同一次启动；访问地址已打开过则不再重复弹出窗口
+def Launch_and_Open_Tool(app_path, text, my_login_user, features=None):
+    from integrator_modules.launch_service import launch_tool_once
+
+    queue_note = st.empty()
+    with st.spinner(f"正在启动 {text} ..."):
+        token = launch_tool_once(
+            Get_Launch_Session_Id(),
+            app_path,
+            text=text,
+            user=my_login_user[0],
+            password=st.session_state.get("password", ""),
+            on_queue=Show_Launch_Queue_Position(queue_note),
+        )
+    queue_note.empty()
+    if token.opened:
+        st.info(f"ℹ️ {text} 已经打开，如窗口已关闭，可在导航栏「我的工具」中重新打开")
+        return
+    Open_Url_in_New_Window(token.url, features)
+    token.mark_opened()
+
+
+# - 图片的 src：已构建（integrator_modules/static_assets.py）的用带指纹的静态 URL，浏览器长期缓存；否则内联 base64 ----
 #
-def get_base64_image(image_path):
+def Get_Image_Src(image_path):
     try:
-        with open(image_path, "rb") as img_file:
-            return base64.b64encode(img_file.read()).decode()
+        return image_src(image_path, static_serving=st.get_option("server.enableStaticServing"))
     except FileNotFoundError:
-        st.warning("⚠️ 背景图片文件未找到，使用默认背景")
         return ""
 
 
+# - 加载基于"User_RoleLIST_Password"的excel文件，返回选择的User和Role -----------------------------
+#
 def Login_Control():
     # 检查登录状态
     if st.session_state.get("logged_in", False):
@@ -98,15 +110,17 @@ def Login_Control():
         return my_login_user
 
     # 应用登录页面样式
-    img_base64 = get_base64_image("integrator_config/equipement.jpg")
-    logo_base64 = get_base64_image("integrator_config/shiyou.png")
+    img_src = Get_Image_Src("integrator_config/equipement.jpg")
+    logo_src = Get_Image_Src("integrator_config/shiyou.png")
+    if not img_src:
+        st.warning("⚠️ 背景图片文件未找到，使用默认背景")
 
     # 自定义CSS样式
     css_with_background = f"""
     <style>
         /* 设置背景图片 */
         .stApp {{
-            background-image: url("data:image/jpeg;base64,{img_base64}");
+            background-image: url("{img_src}");
             background-size: cover;
             background-position: center;
             background-repeat: no-repeat;
@@ -272,11 +286,11 @@ def Login_Control():
     st.markdown(css_with_background, unsafe_allow_html=True)
 
     # 添加企业logo和名称
-    if logo_base64:
+    if logo_src:
         st.markdown(f'''
         <div class="company-header">
             <div class="company-logo">
-                <img src="data:image/png;base64,{logo_base64}" alt="企业Logo">
+                <img src="{logo_src}" alt="企业Logo">
             </div>
             <div class="company-name">玉门油田</div>
         </div>
@@ -290,13 +304,8 @@ def Login_Control():
     ''', unsafe_allow_html=True)
 
     # 读取Excel配置文件
-    users_df = Read_Apps_from_Excel(
-        "./integrator_config/User_RoleSTRING_Password_for_Using_MES.xlsx"
-    )
-    users = users_df.values.tolist()
-    users_n = len(users)
-    users_list = [users[i][0] for i in range(users_n)]
-    password_list = [users[i][1] for i in range(users_n)]
+    user_table = Read_User_Table()
+    users_list = list(user_table.users)
 
     # 使用CSS固定定位的登录表单
     with st.form("login_form", clear_on_submit=False):
@@ -330,13 +339,6 @@ def Login_Control():
         # 用户名选择
         my_selected_user = st.selectbox("用户名", users_list, key="login_user")
 
-        # 获取password序列
-        located_seq_no = 0
-        for i in range(users_n):
-            if users[i][0] == my_selected_user:
-                located_seq_no = i
-                break
-
         # 密码输入
         my_password = st.text_input("密码", type="password", key="login_password")
 
@@ -344,11 +346,13 @@ def Login_Control():
         login_button = st.form_submit_button("登录")
 
         if login_button:
-            if my_password == password_list[located_seq_no]:
+            if user_table.check_password(my_selected_user, my_password):
                 st.session_state.logged_in = True
                 st.session_state.employee_info = {
                     "user": my_selected_user,
                 }
+                st.session_state.pop("nav_index", None)
+                Get_Navigation_Index([my_selected_user])
                 st.markdown('<div class="success-message">✅ 登录成功！正在跳转...</div>',
                             unsafe_allow_html=True)
                 time.sleep(1)
@@ -364,77 +368,42 @@ def Login_Control():
     return my_login_user
 
 
-# - 将本地图片文件转换为 base64 编码字符串 --------------------------------------------------------
+# --- 图标 + 应用名的 HTML 片段 ----------------------------------------------------------------
 #
-def Get_Base64_of_Bin_File(bin_file):
-    with open(bin_file, "rb") as f:
-        data = f.read()
-    return base64.b64encode(data).decode()
-
-
-# ============================================================================================
-# 指定端口范围
-def find_available_port(min_port=8502, max_port=8599):
-    for port in range(min_port, max_port + 1):
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            try:
-                s.bind(("", port))
-                return port
-            except OSError:
-                continue
-    raise RuntimeError(
-        f"❌ 没有找到可用端口！请检查 {min_port}-{max_port} 区间是否已被占用。"
-    )
+def Render_Icon_Html(image_path, text):
+    img_src = Get_Image_Src(image_path)
+    text_escaped = html.escape(text)
+    container_font_size = "12px"
+    font_size = "1em"
+    return f"""
+            <div style="text-align: center; font-size: {container_font_size};">
+                <img src="{img_src}" width="50" height="50" title="{text_escaped}" style="display: block; margin: 0 auto;">
+                <p style="font-size: {font_size}; margin: 4px 0 8px 0; color: #555; font-weight: 500;">{text}</p>
+            </div>
+            """
 
 
 # --- 显示图标和文字和跳转 "image_path": row.Icon, "link": row.Link, "text": row.Text -----------------------------------------------------------------------
-#
+# 可选的 "html" 为登录时预渲染好的图标片段（见 Get_Navigation_Index），未提供时现场渲染
 def Show_an_Icon_Link(image_link_pairs, my_login_user):
     img = image_link_pairs["image_path"]
     link = image_link_pairs["link"]
     text = image_link_pairs["text"]
-
-    img_base64 = Get_Base64_of_Bin_File(img)
-    text_escaped = html.escape(text)
-    container_font_size = "12px"
-    font_size = "1em"
+    icon_html = image_link_pairs.get("html") or Render_Icon_Html(img, text)
 
     # 统一样式：图标 + 应用名 + 启动按钮
     if link.startswith("http://") or link.startswith("https://"):
         # HTTP链接 - 显示图标、名称和启动按钮
-        st.markdown(
-            f"""
-            <div style="text-align: center; font-size: {container_font_size};">
-                <img src="data:image/png;base64,{img_base64}" width="50" height="50" title="{text_escaped}" style="display: block; margin: 0 auto;">
-                <p style="font-size: {font_size}; margin: 4px 0 8px 0; color: #555; font-weight: 500;">{text}</p>
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
+        st.markdown(icon_html, unsafe_allow_html=True)
 
         # 启动按钮（点击后打开HTTP链接）
         if st.button("启动", key=f"http_btn_{text}", use_container_width=True):
-            components.html(
-                f"""
-                <script>
-                    window.open("{link}", "_blank");
-                </script>
-                """,
-                height=0
-            )
+            Open_Url_in_New_Window(link)
     else:
         # 本地子应用程序 - 显示图标、名称和启动按钮
         button_key = f"icon_button_{text}"
 
-        st.markdown(
-            f"""
-            <div style="text-align: center; font-size: {container_font_size};">
-                <img src="data:image/png;base64,{img_base64}" width="50" height="50" title="{text_escaped}" style="display: block; margin: 0 auto;">
-                <p style="font-size: {font_size}; margin: 4px 0 8px 0; color: #555; font-weight: 500;">{text}</p>
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
+        st.markdown(icon_html, unsafe_allow_html=True)
 
         # 启动按钮（点击后启动本地应用）
         clicked = st.button("启动", key=button_key, use_container_width=True)
@@ -442,23 +411,8 @@ def Show_an_Icon_Link(image_link_pairs, my_login_user):
         if clicked:
             try:
 
-                port = find_available_port()
                 print(link)
-                launch_streamlit_with_monitor(
-                    link,
-                    port=port,
-                    text=text,
-                    user=my_login_user[0],
-                    password=st.session_state.get("password", ""),
-                )
-                components.html(
-                    f"""
-                    <script>
-                        window.open("http://{SERVER_IP}:{port}", "_blank", "width=1000,height=800,left=200,top=100,resizable=yes");
-                    </script>
-                    """,
-                    height=0,
-                )
+                Launch_and_Open_Tool(link, text, my_login_user, "width=1000,height=800,left=200,top=100,resizable=yes")
 
             except Exception as e:
                 st.error(f"❌ 启动失败: {e}")
@@ -467,9 +421,9 @@ def Show_an_Icon_Link(image_link_pairs, my_login_user):
 # ----------------------------------------------------------------------------------------------
 #
 def Show_Clickable_Icons_and_Start_Webapp_for_a_DataFrame_with_a_User_and_the_Role(
-        apps_df, my_login_user
+        apps, my_login_user
 ):
-    if apps_df.empty:
+    if not apps:
         st.write(
             ":blue[ TIPS 3: 用户 <]",
             my_login_user[0],
@@ -481,7 +435,7 @@ def Show_Clickable_Icons_and_Start_Webapp_for_a_DataFrame_with_a_User_and_the_Ro
     #
     # 显示对应于所选radio菜单项下，基于所规定的"用户角色"的图标icon子集
     cols = st.columns(8)
-    for idx, row in enumerate(apps_df.itertuples()):
+    for idx, row in enumerate(apps):
         with cols[idx % 8]:
             Show_an_Icon_Link(
                 {"image_path": row.Icon, "link": row.Link, "text": row.Text},
@@ -493,22 +447,20 @@ def Show_Clickable_Icons_and_Start_Webapp_for_a_DataFrame_with_a_User_and_the_Ro
 # --- 处理Radio菜单项 ---------------------------------------------------------------------------
 #
 def Generate_Clickable_Icons_and_Start_Webapp_for_a_Radio_Menu_Item_with_a_User_and_the_Role(
-        apps_df, radio_menu_item, my_login_user
+        catalogue, radio_menu_item, my_login_user
 ):
-    apps_df = apps_df[
-        apps_df["Radio"] == radio_menu_item
-        ]  # 把excel配置文件中radio列中，属于radio_menu_item的数据项赛选出来，再赋给app_df
+    apps = catalogue.apps_for_radio(radio_menu_item)  # 应用目录中按radio列预先建好的索引
     # 当用户User的角色role是"Admin"时，显示radio_menu_item菜单项下的所有图标icon链接及其对应的webapp
     Show_Clickable_Icons_and_Start_Webapp_for_a_DataFrame_with_a_User_and_the_Role(
-        apps_df, my_login_user
+        apps, my_login_user
     )
     return
 
 
 # ----------------------------------------------------------------------------------------------
 #
-def Generate_All_Clickable_Icons_and_Start_Webapp(apps_df, my_login_user):
-    # 显示所有icons，这里的DataFrame类型的变量apps_df是由原始的excel表导入的
+def Generate_All_Clickable_Icons_and_Start_Webapp(catalogue, my_login_user):
+    # 显示所有icons，这里的catalogue是由原始的excel表解析并缓存的应用目录
     if my_login_user[1] != "Admin":
         st.write(
             ":blue[ TIPS 4: 用户 <]",
@@ -520,25 +472,39 @@ def Generate_All_Clickable_Icons_and_Start_Webapp(apps_df, my_login_user):
         return
     else:
         Show_Clickable_Icons_and_Start_Webapp_for_a_DataFrame_with_a_User_and_the_Role(
-            apps_df, my_login_user
+            catalogue.entries, my_login_user
         )
         return
 
 
-# 整合后的 main 函数和 Handle_a_Radio_Menu_Item 函数 apps_df, myradio, my_login_user
-def Handle_a_Radio_Menu_Item(apps_df, radio_menu_item, my_login_user):
-    # 获取当前 Radio 下所有记录（不区分角色）
-    full_df = apps_df[apps_df["Radio"] == radio_menu_item]
-    filtered_df = full_df
+# - 当前会话的导航索引：登录后构建一次存入 session_state，应用目录文件修改后自动重建 ----------------------
+#
+def Get_Navigation_Index(my_login_user):
+    catalogue = Read_App_Catalogue()
+    nav_index = st.session_state.get("nav_index")
+    if nav_index is None or nav_index.user != my_login_user[0] or nav_index.catalogue is not catalogue:
+        nav_index = NavigationIndex(
+            catalogue,
+            user=my_login_user[0],
+            render_icon=lambda entry: Render_Icon_Html(entry.Icon, entry.Text),
+        )
+        st.session_state.nav_index = nav_index
+    return nav_index
 
-    if filtered_df.empty:
+
+# 整合后的 main 函数和 Handle_a_Radio_Menu_Item 函数 nav_index, myradio, my_login_user
+def Handle_a_Radio_Menu_Item(nav_index, radio_menu_item, my_login_user):
+    # 获取当前 Radio 下所有记录（不区分角色，登录时已建好索引）
+    apps = nav_index.apps_for_radio(radio_menu_item)
+
+    if not apps:
         st.info(f"当前用户 **{my_login_user[0]}** 在【{radio_menu_item}】下无可用功能")
     else:
         cols = st.columns(8)
-        for idx, row in enumerate(filtered_df.itertuples()):  # tabe_apps按行遍历
+        for idx, row in enumerate(apps):  # tabe_apps按行遍历
             with cols[idx % 8]:  # 返回余数
                 Show_an_Icon_Link(
-                    {"image_path": row.Icon, "link": row.Link, "text": row.Text},
+                    {"image_path": row.Icon, "link": row.Link, "text": row.Text, "html": nav_index.icon_html[row]},
                     my_login_user
                 )
 
@@ -547,10 +513,8 @@ def Help_for_Using_Webapp_Integrator(
         page_n, my_login_user
 ):  # page_n: 平台简介的总页数
     if my_login_user[0] == "西交团队":
-        doc_images_path = "./integrator_config/doc_images/" + "page"
-        for i in range(page_n):
-            doc_image = doc_images_path + str(i + 1) + ".png"
-            st.image(doc_image)
+        # 分页懒加载网页尺寸的压缩版本，避免每次渲染都传输全部原图
+        show_help_images("./integrator_config/doc_images/", page_n, key="integrator_help_page")
     else:
         st.write(
             ":blue[ TIPS 3: 用户 <]",
@@ -560,6 +524,156 @@ def Help_for_Using_Webapp_Integrator(
     return
 
 
+# - 系统监控：子应用实例资源占用、端口池与反向代理状态，仅管理员可见 --------------------------------------
+#
+def Show_Admin_Monitor_Page(my_login_user):
+    if my_login_user[0] not in ADMIN_USERS:
+        st.write(
+            ":blue[ TIPS 3: 用户 <]",
+            my_login_user[0],
+            ":blue[> 下无权限访问系统监控! ]",
+        )
+        return
+
+    from integrator_modules.app_proxy import get_proxy
+    from integrator_modules.app_registry import registry
+    from integrator_modules.app_supervisor import ensure_supervisor_started
+    from integrator_modules.launch_scheduler import launch_scheduler
+    from integrator_modules.launch_tokens import launch_tokens
+    from integrator_modules.port_leases import port_leases
+    from integrator_modules.warm_pool import get_warm_pool
+    from integrator_modules.worker_pool import worker_pool
+
+    supervisor = ensure_supervisor_started(registry, get_proxy)
+    if st.button("🔄 立即刷新采样"):
+        supervisor.run_once()
+
+    st.markdown("##### 各应用资源汇总")
+    st.dataframe(supervisor.usage_by_app(), use_container_width=True)
+
+    st.markdown("##### 运行中的子应用实例")
+    instances = supervisor.snapshot()
+    st.dataframe(instances, use_container_width=True)
+    if instances:
+        col_sel, col_btn = st.columns([0.7, 0.3])
+        with col_sel:
+            target = st.selectbox("选择要终止的实例", [row["实例ID"] for row in instances], key="admin_kill_target")
+        with col_btn:
+            if st.button("⛔ 终止实例", key="admin_kill_button"):
+                instance = registry.get(target)
+                if instance is not None:
+                    supervisor.reap(instance, "管理员手动终止")
+                    st.rerun()
+
+    st.markdown("##### 端口池")
+    st.json(port_leases.metrics())
+    if worker_pool.enabled:
+        st.markdown("##### worker 代理")
+        local_instances = sum(1 for inst in registry.list_instances() if inst.worker is None)
+        st.dataframe(worker_pool.stats(local_instances), use_container_width=True)
+    st.markdown("##### 启动队列")
+    st.json(launch_scheduler.stats())
+    st.json(launch_tokens.stats())
+    warm_pool = get_warm_pool()
+    if warm_pool is not None:
+        st.markdown("##### 预热池")
+        st.json(warm_pool.stats())
+    proxy = get_proxy()
+    if proxy is not None:
+        st.markdown("##### 反向代理")
+        st.json(proxy.stats())
+    if supervisor.reaped:
+        st.markdown("##### 最近被回收的实例")
+        st.dataframe(list(supervisor.reaped)[::-1], use_container_width=True)
+    Show_App_Logs_Panel()
+    return
+
+
+# - 我的工具：列出本会话打开过、以及该用户正在使用的子应用实例，重新打开已有实例而不是再启动新进程 ---------
+#
+def Show_My_Running_Tools(my_login_user):
+    from integrator_modules.launch_service import close_tool, running_tools
+
+    tools = running_tools(Get_Launch_Session_Id(), my_login_user[0])
+    if not tools:
+        st.info("当前没有正在运行的工具，可在各导航项中点击「启动」打开")
+        return
+
+    for i, tool in enumerate(tools):
+        instance = tool["instance"]
+        col_name, col_state, col_open, col_close = st.columns([0.4, 0.3, 0.15, 0.15])
+        with col_name:
+            st.markdown(f"**{tool['text']}**")
+        with col_state:
+            started = time.strftime("%H:%M:%S", time.localtime(instance.start_time))
+            st.caption(f"{'运行中' if instance.ready else '启动中'}，启动于 {started}")
+        with col_open:
+            if st.button("打开", key=f"my_tool_open_{instance.instance_id}_{i}", use_container_width=True):
+                Open_Url_in_New_Window(tool["url"])
+        with col_close:
+            if st.button("关闭", key=f"my_tool_close_{instance.instance_id}_{i}", use_container_width=True):
+                if close_tool(instance, my_login_user[0]):
+                    st.rerun()
+                st.info(f"ℹ️ {tool['text']} 为共享实例，其他用户仍在使用，未终止进程")
+
+
+# - 系统监控：子应用启动阶段耗时与最近的输出日志 ---------------------------------------------------
+#
+def Show_App_Logs_Panel():
+    from integrator_modules.app_logs import CAPTURE_ENABLED as LOG_CAPTURE_ENABLED, PHASES, app_logs
+
+    st.markdown("##### 子应用日志")
+    captures = app_logs.list()
+    if not captures:
+        st.info("暂无捕获的子应用日志" if LOG_CAPTURE_ENABLED else "未开启日志捕获（APP_CAPTURE_LOGS）")
+        return
+
+    phase_names = [name for _, name in PHASES]
+    st.dataframe([
+        dict({"实例ID": capture.key, "名称": capture.label, "状态": "运行中" if capture.running else f"已退出({capture.returncode})"},
+             **{name: seconds for name, seconds in capture.phase_timings() if name in phase_names})
+        for capture in captures
+    ], use_container_width=True)
+
+    col_sel, col_n = st.columns([0.7, 0.3])
+    with col_sel:
+        key = st.selectbox("查看实例日志", [capture.key for capture in captures], key="admin_log_target",
+                           format_func=lambda k: f"{k} {app_logs.get(k).label if app_logs.get(k) else ''}")
+    with col_n:
+        n_lines = st.number_input("显示最近行数", min_value=10, max_value=2000, value=100, step=50, key="admin_log_lines")
+    capture = app_logs.get(key)
+    if capture is None:
+        return
+    st.code("\n".join(
+        time.strftime("%H:%M:%S", time.localtime(ts)) + " " + line for ts, line in capture.tail(int(n_lines))
+    ) or "（暂无输出）")
+    if capture.error:
+        st.warning(f"⚠️ 无法读取日志：{capture.error}")
+    if capture.worker is not None:
+        # worker 上的实例：日志文件在该 worker 主机上，经其代理读取
+        st.caption(f"日志位于 worker {capture.worker}" + (f"：{capture.log_path}" if capture.log_path else ""))
+    elif capture.log_path:
+        st.caption(f"完整日志：{capture.log_path}")
+
+
+# - 启动后台服务（反向代理、子应用守护线程、预热池）：首次运行时在后台线程中导入启动服务模块，不阻塞登录页渲染 ----
+#
+def Start_Background_Services():
+    if any(t.name == "launch-service-import" for t in threading.enumerate()):
+        return
+    # 模块已完整加载（导入过程中 sys.modules 里的模块还没有该函数）时直接调用，均为幂等操作
+    start = getattr(sys.modules.get("integrator_modules.launch_service"), "start_background_services", None)
+    if start is not None:
+        start()
+        return
+
+    def _import_and_start():
+        from integrator_modules.launch_service import start_background_services
+        start_background_services()
+
+    threading.Thread(target=_import_and_start, name="launch-service-import", daemon=True).start()
+
+
 # = 虚拟主函数main(): ===========================================================================
 #
 def main():
@@ -570,6 +684,8 @@ def main():
         layout="wide"
     )
 
+    Start_Background_Services()
+
     my_login_user = Login_Control()
 
     # 如果未登录，显示登录页面（Login_Control函数内部已处理）
@@ -578,7 +694,7 @@ def main():
 
     # 如果已登录，显示主界面
     container_heigth = 580
-    img_base64 = Get_Base64_of_Bin_File("./integrator_config/yumen.png")
+    img_src = Get_Image_Src("./integrator_config/yumen.png")
 
     st.markdown(
         f"""
@@ -592,7 +708,7 @@ def main():
             height: 160px;
         ">
             <div style="flex: 0 0 auto; display: flex; align-items: center; height: 100%;">
-                <img src="data:image/jpeg;base64,{img_base64}" style="
+                <img src="{img_src}" style="
                     height: 150px; 
                     width: auto; 
                     border-radius: 8px; 
@@ -627,15 +743,18 @@ def main():
     col1, col2 = st.columns([0.2, 0.8])
     with col1:
         with st.container(border=True, height=container_heigth):
-            myradio = st.radio("🏠" + ":rainbow[ 导航栏:]",
-                               ['平台简介',
-                                '地质分析',
-                                '工艺设计',
-                                '智能采气',
-                                '数据资产',
-                                '相关工具',
-                                '相关链接',
-                                '退出'])
+            radio_items = ['平台简介',
+                           '地质分析',
+                           '工艺设计',
+                           '智能采气',
+                           '数据资产',
+                           '相关工具',
+                           '相关链接',
+                           '我的工具',
+                           '退出']
+            if my_login_user[0] in ADMIN_USERS:
+                radio_items.insert(-1, '系统监控')
+            myradio = st.radio("🏠" + ":rainbow[ 导航栏:]", radio_items)
             st.divider()
             mynote = [
                 "开发: 西安交通大学机械工程学院",
@@ -694,28 +813,12 @@ def main():
                     btn_key1 = Setup_a_Unique_Widget_Key()
                     if st.button("油田初始数据整理", key=btn_key1, use_container_width=True):
                         try:
-                            port = find_available_port()
                             app_path = "数据标注工具/data_prepare.py"
                             if not os.path.exists(app_path):
                                 st.error(f"子应用文件不存在：{app_path}")
                                 st.stop()
 
-                            pid = launch_streamlit_with_monitor(
-                                app_path,
-                                port=port,
-                                text="油田初始数据整理",
-                                user=my_login_user[0],
-                                password=st.session_state.get("password", "")
-                            )
-                            time.sleep(3)
-                            components.html(
-                                f"""
-                                <script>
-                                    window.open("http://{SERVER_IP}:{port}", "_blank", "width=1200,height=800,left=200,top=100");
-                                </script>
-                                """,
-                                height=0
-                            )
+                            Launch_and_Open_Tool(app_path, "油田初始数据整理", my_login_user, "width=1200,height=800,left=200,top=100")
                         except Exception as e:
                             st.error(f"启动失败：{str(e)}")
 
@@ -724,46 +827,34 @@ def main():
                     btn_key2 = Setup_a_Unique_Widget_Key()
                     if st.button("油田数据自动标注", key=btn_key2, use_container_width=True):
                         try:
-                            port = find_available_port()
                             app_path = "数据标注工具/data_processing.py"
                             if not os.path.exists(app_path):
                                 st.error(f"子应用文件不存在：{app_path}")
                                 st.stop()
 
-                            pid = launch_streamlit_with_monitor(
-                                app_path,
-                                port=port,
-                                text="油田数据自动标注",
-                                user=my_login_user[0],
-                                password=st.session_state.get("password", "")
-                            )
-                            time.sleep(3)
-                            components.html(
-                                f"""
-                                <script>
-                                    window.open("http://{SERVER_IP}:{port}", "_blank", "width=1200,height=800,left=400,top=200");
-                                </script>
-                                """,
-                                height=0
-                            )
+                            Launch_and_Open_Tool(app_path, "油田数据自动标注", my_login_user, "width=1200,height=800,left=400,top=200")
                         except Exception as e:
                             st.error(f"启动失败：{str(e)}")
 
             # 处理智能采气模块 - 仅显示Excel配置的应用
             elif myradio == "智能采气":
                 # 显示Excel配置的应用
-                apps_df = Read_Apps_from_Excel("./integrator_config/Radio_Icon_Text_Link_RoleSTRING_for_webURLs.xlsx")
-                Handle_a_Radio_Menu_Item(apps_df, myradio, my_login_user)
+                Handle_a_Radio_Menu_Item(Get_Navigation_Index(my_login_user), myradio, my_login_user)
 
             # 处理其他菜单选项
             elif myradio in ['地质分析', '工艺设计', '数据资产', '相关链接']:
-                apps_df = Read_Apps_from_Excel("./integrator_config/Radio_Icon_Text_Link_RoleSTRING_for_webURLs.xlsx")
-                Handle_a_Radio_Menu_Item(apps_df, myradio, my_login_user)
+                Handle_a_Radio_Menu_Item(Get_Navigation_Index(my_login_user), myradio, my_login_user)
 
             elif myradio == "平台简介":
                 page_n = 5
                 Help_for_Using_Webapp_Integrator(page_n, my_login_user)
 
+            elif myradio == "我的工具":
+                Show_My_Running_Tools(my_login_user)
+
+            elif myradio == "系统监控":
+                Show_Admin_Monitor_Page(my_login_user)
+
             elif myradio == "退出":
                 st.write(":blue[TIPS: 暂停系统运行，可点击关闭浏览器窗口以退出。]")
                 st.warning("⚠️ 确认后将终止该 Streamlit 应用进程。")
@@ -0,0 +1,168 @@
+import os
+import threading
+from collections import namedtuple
+
+
+APPS_CATALOGUE_PATH = "./integrator_config/Radio_Icon_Text_Link_RoleSTRING_for_webURLs.xlsx"
+USERS_TABLE_PATH = "./integrator_config/User_RoleSTRING_Password_for_Using_MES.xlsx"
+
+# 应用目录中的一项：字段名与 Excel 列名一致，原先基于 DataFrame.itertuples() 的 row.Icon/row.Link/row.Text 写法无需改动
+AppEntry = namedtuple("AppEntry", ["Radio", "Icon", "Text", "Link", "Roles"])
+
+
+def _cell(value):
+    return "" if value is None else str(value).strip()
+
+
+def _read_rows(file_path):
+    """
+    读取工作簿第一个工作表：首行为表头，跳过整行为空的行。
+    直接用 openpyxl 只读模式解析，不依赖 pandas，集成器启动时不必导入 pandas。
+
+    返回:
+        Tuple[List[str], List[tuple]]: (表头, 数据行)
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [_cell(name) for name in next(rows, ())]
+        data = [row for row in rows if any(value is not None and str(value).strip() for value in row)]
+    finally:
+        workbook.close()
+    return header, data
+
+
+class AppCatalogue:
+    """
+    解析后的应用目录：按 Radio 菜单项、角色以及 (Radio, 角色) 建立索引，供所有会话只读共享。
+    """
+
+    def __init__(self, entries):
+        self.entries = tuple(entries)
+        self.by_radio = {}
+        self.by_role = {}
+        self.by_radio_role = {}
+        for entry in self.entries:
+            self.by_radio.setdefault(entry.Radio, []).append(entry)
+            for role in entry.Roles:
+                self.by_role.setdefault(role, []).append(entry)
+                self.by_radio_role.setdefault((entry.Radio, role), []).append(entry)
+        # 索引建好后转为元组，防止调用方误改共享数据
+        for index in (self.by_radio, self.by_role, self.by_radio_role):
+            for key in index:
+                index[key] = tuple(index[key])
+
+    @classmethod
+    def from_excel(cls, file_path):
+        header, rows = _read_rows(file_path)
+        column = {name: i for i, name in enumerate(header)}
+        entries = []
+        for row in rows:
+            def get(name):
+                i = column[name]
+                return _cell(row[i]) if i < len(row) else ""
+            roles = tuple(role.strip() for role in get("RoleSTRING").split(",") if role.strip())
+            entries.append(AppEntry(get("Radio"), get("Icon"), get("Text"), get("Link"), roles))
+        return cls(entries)
+
+    def apps_for_radio(self, radio_menu_item):
+        return self.by_radio.get(radio_menu_item, ())
+
+
+class UserTable:
+    """解析后的用户表：保持 Excel 中的用户顺序（用于登录下拉框），并按用户名哈希索引密码"""
+
+    def __init__(self, users, passwords):
+        self.users = tuple(users)
+        self.passwords = dict(passwords)
+
+    @classmethod
+    def from_excel(cls, file_path):
+        _, rows = _read_rows(file_path)
+        users, passwords = [], {}
+        for row in rows:
+            user, password = _cell(row[0]), _cell(row[1] if len(row) > 1 else None)
+            if user and user not in passwords:
+                users.append(user)
+                passwords[user] = password
+        return cls(users, passwords)
+
+    def check_password(self, user, password):
+        return user in self.passwords and self.passwords[user] == password
+
+
+class NavigationIndex:
+    """
+    单个登录会话的导航索引：登录时预先取出各 Radio 菜单项下的应用（与原来一样不区分角色，所有用户可见全部应用），
+    并预渲染图标 HTML，之后每次 rerun 只做字典查找。应用目录重新解析后（catalogue 对象变化）需重建。
+
+    参数:
+        catalogue (AppCatalogue): 已解析的应用目录
+        user (str): 登录用户
+        render_icon (Callable[[AppEntry], str]): 生成单个应用图标的 HTML 片段
+    """
+
+    def __init__(self, catalogue, user, render_icon=None):
+        self.catalogue = catalogue
+        self.user = user
+        self.by_radio = {}
+        self.icon_html = {}
+        for radio, entries in catalogue.by_radio.items():
+            self.by_radio[radio] = tuple(entries)
+            if render_icon is not None:
+                for entry in entries:
+                    if entry not in self.icon_html:
+                        self.icon_html[entry] = render_icon(entry)
+
+    def apps_for_radio(self, radio_menu_item):
+        return self.by_radio.get(radio_menu_item, ())
+
+
+class CatalogueService:
+    """
+    配置工作簿缓存：每个文件只解析一次，之后按文件修改时间判断是否需要重新解析，进程内所有会话共享。
+    """
+
+    def __init__(self):
+        self._cache = {}  # (类型, 绝对路径) -> (mtime, 解析结果)
+        self.parse_count = 0
+        self._lock = threading.Lock()
+
+    def _get(self, parser, file_path):
+        key = (parser.__qualname__, os.path.abspath(file_path))
+        mtime = os.stat(file_path).st_mtime_ns
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is None or cached[0] != mtime:
+                cached = (mtime, parser(file_path))
+                self._cache[key] = cached
+                self.parse_count += 1
+        return cached[1]
+
+    def apps(self, file_path=APPS_CATALOGUE_PATH):
+        return self._get(AppCatalogue.from_excel, file_path)
+
+    def users(self, file_path=USERS_TABLE_PATH):
+        return self._get(UserTable.from_excel, file_path)
+
+
+catalogue_service = CatalogueService()
+
+
+def get_app_catalogue(file_path=APPS_CATALOGUE_PATH):
+    """
+    返回解析并缓存后的应用目录（AppCatalogue）。
+    """
+    return catalogue_service.apps(file_path)
+
+
+def get_user_table(file_path=USERS_TABLE_PATH):
+    """
+    返回解析并缓存后的用户表（UserTable）。
+    """
+    return catalogue_service.users(file_path)
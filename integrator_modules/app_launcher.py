@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+
+from integrator_modules.app_logs import CAPTURE_ENABLED as LOG_CAPTURE_ENABLED, app_logs, open_log
+
+PRELOAD_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "streamlit_preload.py")
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# ====== 启动 Streamlit 子应用并记录其 PID/Port/App name ===========================================
+# 集成器本机启动与 worker 代理（worker_agent.py）远程启动共用
+def start_streamlit_app(app_path, port, text, user=None, password=None, base_url_path="", preload=False,
+                        log_key=None, address="127.0.0.1"):
+    env = os.environ.copy()  # 创建当前系统环境变量的一份副本并保存到 env 变量中
+    env["APP_PORT"] = str(port)
+    env["APP_TEXT"] = text
+    env["STREAMLIT_SERVER_HEADLESS"] = (
+        "true"  # ✅ 关键，加上这句！streamlit不会自动打开浏览器  无头模式
+    )
+    if user:
+        env["APP_USER"] = user
+    if password:
+        env["APP_PASSWORD"] = password
+    # 工具脚本可导入 integrator_modules 中的共享资源（shared_resources.py、page_session.py）
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT_DIR, env.get("PYTHONPATH")]))
+
+    cmd = ["streamlit", "run", app_path, "--server.port", str(port)]
+    if preload:
+        # 预热实例：先导入 pandas/numpy/scipy/matplotlib 等重量级模块，再进入 streamlit 命令行
+        cmd = [sys.executable, PRELOAD_SCRIPT] + cmd[1:]
+    elif LOG_CAPTURE_ENABLED:
+        # 捕获日志时同样经启动器运行（不预加载模块），以输出启动阶段标记
+        env["APP_PRELOAD_MODULES"] = ""
+        cmd = [sys.executable, PRELOAD_SCRIPT] + cmd[1:]
+    if base_url_path:
+        # 经反向代理访问：子应用只监听 address（本机启动时为 127.0.0.1），并以 /apps/<实例ID> 作为 URL 前缀
+        cmd += ["--server.baseUrlPath", base_url_path.strip("/"), "--server.address", address]
+    if LOG_CAPTURE_ENABLED:
+        # stdout/stderr 合并写入实例日志文件（不经管道，集成器退出后子进程仍可正常输出），
+        # 由 app_logs 的后台线程跟踪该文件；集成器重启后 registry.recover() 重新接管跟踪
+        env["PYTHONUNBUFFERED"] = "1"
+        key = log_key or f"port-{port}"
+        with open_log(key) as log_file:
+            proc = subprocess.Popen(cmd, stdout=log_file, stderr=subprocess.STDOUT, env=env)
+        app_logs.attach(key, proc, label=text)
+    else:
+        proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            env=env,
+        )
+    print(f"🚀 子进程 PID = {proc.pid} 启动成功，监听端口 {port}，名称为 {text}")
+    return proc
@@ -0,0 +1,327 @@
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict, deque
+
+from integrator_modules.worker_pool import WorkerUnavailable
+
+# 是否捕获子应用的 stdout/stderr（关闭时与原来一样丢弃到 DEVNULL）
+CAPTURE_ENABLED = os.getenv("APP_CAPTURE_LOGS", "true").lower() in ("1", "true", "yes")
+# 每个实例在内存中保留的日志行数
+BUFFER_LINES = int(os.getenv("APP_LOG_BUFFER_LINES", "500"))
+# 子应用输出直接写入该目录下的 <实例ID>.log，集成器重启后仍可继续跟踪；单个文件超过上限后轮转
+LOG_DIR = os.getenv(
+    "APP_LOG_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs", "apps"),
+)
+LOG_MAX_BYTES = int(os.getenv("APP_LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("APP_LOG_BACKUP_COUNT", "3"))
+# 已退出实例的日志保留个数，便于事后查看崩溃原因
+KEEP_EXITED = int(os.getenv("APP_LOG_KEEP_EXITED", "20"))
+# 日志文件没有新内容时的轮询间隔（秒）
+POLL_INTERVAL = float(os.getenv("APP_LOG_POLL_INTERVAL", "0.5"))
+# worker 上实例的日志经其代理读取，结果缓存的秒数
+REMOTE_CACHE_SECONDS = 2.0
+
+# 子进程启动器（streamlit_preload.py）输出的阶段标记行
+PHASE_MARKER = "[phase] "
+# Streamlit 服务开始监听时输出的提示
+LISTENING_PATTERNS = ("You can now view your Streamlit app", "URL: http")
+# 启动阶段：(键, 显示名称)，按先后顺序排列
+PHASES = [
+    ("imports_done", "预加载完成"),
+    ("server_listening", "服务监听"),
+    ("ready", "健康检查通过"),
+    ("first_script_run", "首次脚本运行"),
+    ("exited", "进程退出"),
+]
+
+
+def log_path(key):
+    """实例日志文件路径"""
+    return os.path.join(LOG_DIR, f"{key}.log")
+
+
+def open_log(key):
+    """
+    以追加方式打开实例日志文件，作为子进程的 stdout/stderr；子进程继承文件句柄后调用方即可关闭。
+
+    返回:
+        BinaryIO
+    """
+    os.makedirs(LOG_DIR, exist_ok=True)
+    return open(log_path(key), "ab")
+
+
+def process_exited(pid, proc=None):
+    """本进程启动的子进程用 poll()（顺便回收），重新接管的进程只能按 pid 判断"""
+    if proc is not None:
+        return proc.poll() is not None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass
+    return False
+
+
+class LogCapture:
+    """
+    一个子进程的输出捕获：子进程把合并后的 stdout/stderr 写入日志文件，后台线程跟踪（tail）该文件，
+    保存最近若干行到环形缓冲区，并从输出中识别启动阶段，记录各阶段相对启动时刻的耗时。
+    文件超过 LOG_MAX_BYTES 时复制为 .1 备份后截断（子进程以追加方式写入，截断后从头继续）。
+
+    集成器重启后重新接管的实例（proc 为 None）先读入文件中已有的输出作为历史，不再据此统计阶段耗时。
+    """
+
+    def __init__(self, key, proc=None, label="", max_lines=BUFFER_LINES, start_time=None, pid=None):
+        self.key = key
+        self.proc = proc
+        self.pid = pid if pid is not None else proc.pid
+        self.label = label
+        self.start_time = start_time or time.time()
+        self.lines = deque(maxlen=max_lines)  # (时间戳, 行)
+        self.phases = {}  # 阶段 -> 相对启动时刻的秒数
+        self.returncode = None
+        self.log_path = log_path(key)
+        self.worker = None  # 本机实例
+        self.error = None
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._read, name=f"app-log-{key}", daemon=True)
+        self._thread.start()
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def mark(self, phase, when=None):
+        """记录阶段耗时，同一阶段只记第一次"""
+        with self._lock:
+            self.phases.setdefault(phase, round((when or time.time()) - self.start_time, 3))
+
+    def _append(self, line, track_phases=True):
+        now = time.time()
+        if line.startswith(PHASE_MARKER):
+            if track_phases:
+                self.mark(line[len(PHASE_MARKER):].strip(), now)
+            return
+        if track_phases and "server_listening" not in self.phases and any(p in line for p in LISTENING_PATTERNS):
+            self.mark("server_listening", now)
+        with self._lock:
+            self.lines.append((now, line))
+
+    def _rotate(self, stream):
+        """复制当前文件为备份并截断；返回截断后的读取位置"""
+        for i in range(LOG_BACKUP_COUNT - 1, 0, -1):
+            older = f"{self.log_path}.{i}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.log_path}.{i + 1}")
+        if LOG_BACKUP_COUNT > 0:
+            shutil.copyfile(self.log_path, f"{self.log_path}.1")
+        os.truncate(self.log_path, 0)
+        stream.seek(0)
+        return 0
+
+    def _follow(self, stream, track_phases):
+        """读取到当前文件末尾；返回是否读到了完整的新行"""
+        got = False
+        for raw in iter(stream.readline, b""):
+            if not raw.endswith(b"\n"):
+                # 不完整的行留到下次读取
+                stream.seek(-len(raw), os.SEEK_CUR)
+                break
+            self._append(raw.decode("utf-8", errors="replace").rstrip("\r\n"), track_phases)
+            got = True
+        return got
+
+    def _read(self):
+        try:
+            with open(self.log_path, "rb") as stream:
+                if self.proc is None:
+                    self._follow(stream, track_phases=False)
+                while True:
+                    exited = process_exited(self.pid, self.proc)
+                    if os.path.getsize(self.log_path) < stream.tell():
+                        # 文件被外部截断
+                        stream.seek(0)
+                    got = self._follow(stream, track_phases=True)
+                    if exited:
+                        rest = stream.read()
+                        if rest:
+                            self._append(rest.decode("utf-8", errors="replace").rstrip("\r\n"))
+                        break
+                    if stream.tell() > LOG_MAX_BYTES:
+                        self._rotate(stream)
+                    if not got:
+                        time.sleep(POLL_INTERVAL)
+        except (OSError, ValueError):
+            pass
+        finally:
+            if self.proc is not None:
+                try:
+                    self.returncode = self.proc.wait(timeout=5)
+                except Exception:
+                    self.returncode = self.proc.poll()
+            self.mark("exited")
+            self._append(f"--- 进程已退出，返回码 {self.returncode} ---")
+
+    def tail(self, n=100):
+        """最近 n 行日志：[(时间戳, 行)]"""
+        with self._lock:
+            return list(self.lines)[-n:]
+
+    def phase_timings(self):
+        """按阶段顺序返回 [(阶段名称, 秒数)]，未到达的阶段不列出"""
+        with self._lock:
+            phases = dict(self.phases)
+        names = dict(PHASES)
+        ordered = [(names[key], phases.pop(key)) for key, _ in PHASES if key in phases]
+        return ordered + sorted(phases.items(), key=lambda item: item[1])
+
+
+class RemoteLogCapture:
+    """
+    worker 上实例的日志：输出写在 worker 主机的日志文件中，由其代理的 /logs 接口按需读取，
+    结果缓存 REMOTE_CACHE_SECONDS 秒；接口与 LogCapture 相同，worker 不可达时保留上次的结果并记录 error。
+    """
+
+    def __init__(self, key, client, label="", start_time=None):
+        self.key = key
+        self.client = client
+        self.label = label
+        self.worker = client.url
+        self.start_time = start_time or time.time()
+        self.returncode = None
+        self.log_path = None
+        self.error = None
+        self._running = True
+        self._lines = []
+        self._phases = []
+        self._local_phases = {}  # 集成器一侧记录的阶段（如健康检查通过）
+        self._fetched_at = 0.0
+        self._fetched_lines = 0
+        self._lock = threading.Lock()
+
+    def _refresh(self, n=100):
+        with self._lock:
+            if time.time() - self._fetched_at < REMOTE_CACHE_SECONDS and n <= self._fetched_lines:
+                return
+            self._fetched_at = time.time()
+            try:
+                result = self.client.logs(self.key, n)
+            except WorkerUnavailable as e:
+                self.error = str(e)
+                return
+            self.error = None
+            if not result.get("found"):
+                # worker 未捕获该实例的输出，或代理已重启、日志已被清理
+                self.error = f"worker {self.worker} 上没有该实例的日志"
+                self._running = False
+                return
+            self._fetched_lines = n
+            self._running = result["running"]
+            self.returncode = result["returncode"]
+            self.log_path = result["log_path"]
+            self._lines = [tuple(item) for item in result["lines"]]
+            self._phases = [tuple(item) for item in result["phases"]]
+
+    @property
+    def running(self):
+        if self._running:
+            self._refresh()
+        return self._running
+
+    def mark(self, phase, when=None):
+        with self._lock:
+            self._local_phases.setdefault(phase, round((when or time.time()) - self.start_time, 3))
+
+    def tail(self, n=100):
+        self._refresh(n)
+        with self._lock:
+            return self._lines[-n:]
+
+    def phase_timings(self):
+        """worker 上报的阶段与集成器一侧记录的阶段合并，按阶段顺序排列"""
+        self._refresh()
+        names = dict(PHASES)
+        with self._lock:
+            timings = dict(self._phases)
+            for key, seconds in self._local_phases.items():
+                timings.setdefault(names.get(key, key), seconds)
+        order = [name for _, name in PHASES]
+        ordered = [(name, timings.pop(name)) for name in order if name in timings]
+        return ordered + sorted(timings.items(), key=lambda item: item[1])
+
+
+class AppLogBook:
+    """
+    所有子应用实例的日志捕获，按实例 ID 索引；进程退出后的捕获保留最近 KEEP_EXITED 个。
+    """
+
+    def __init__(self, keep_exited=KEEP_EXITED):
+        self.keep_exited = keep_exited
+        self.captures = OrderedDict()  # key -> LogCapture
+        self._lock = threading.Lock()
+
+    def attach(self, key, proc, label=""):
+        """
+        开始跟踪子进程输出。子进程须以 open_log(key) 打开的文件作为 stdout、stderr=STDOUT 启动。
+
+        返回:
+            LogCapture
+        """
+        return self._add(LogCapture(key, proc, label=label))
+
+    def adopt(self, key, pid, label="", start_time=None):
+        """
+        集成器重启后重新跟踪仍存活实例的日志文件；文件不存在（未开启捕获时启动的实例）时返回 None。
+
+        返回:
+            LogCapture or None
+        """
+        if not os.path.exists(log_path(key)):
+            return None
+        return self._add(LogCapture(key, label=label, start_time=start_time, pid=pid))
+
+    def attach_remote(self, key, client, label="", start_time=None):
+        """
+        登记运行在 worker 上的实例，日志经 client（worker_pool.WorkerClient）从其代理读取。
+
+        返回:
+            RemoteLogCapture
+        """
+        return self._add(RemoteLogCapture(key, client, label=label, start_time=start_time))
+
+    def _add(self, capture):
+        key = capture.key
+        with self._lock:
+            self.captures[key] = capture
+            self.captures.move_to_end(key)
+            self._prune_locked()
+        return capture
+
+    def _prune_locked(self):
+        exited = [key for key, capture in self.captures.items() if not capture.running]
+        for key in exited[:max(0, len(exited) - self.keep_exited)]:
+            del self.captures[key]
+
+    def get(self, key):
+        with self._lock:
+            return self.captures.get(key)
+
+    def mark(self, key, phase):
+        capture = self.get(key)
+        if capture is not None:
+            capture.mark(phase)
+
+    def list(self):
+        """最近启动的在前"""
+        with self._lock:
+            self._prune_locked()
+            return list(self.captures.values())[::-1]
+
+
+# 模块级单例，集成器所有会话共享
+app_logs = AppLogBook()
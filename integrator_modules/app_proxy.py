@@ -0,0 +1,368 @@
+import asyncio
+import os
+import threading
+import time
+from collections import defaultdict
+
+# 反向代理开关与监听地址：开启后所有子应用统一通过 http://SERVER_IP:APP_PROXY_PORT/apps/<实例ID>/ 访问
+PROXY_ENABLED = os.getenv("APP_PROXY_ENABLED", "false").lower() in ("1", "true", "yes")
+PROXY_HOST = os.getenv("APP_PROXY_HOST", "0.0.0.0")
+PROXY_PORT = int(os.getenv("APP_PROXY_PORT", "8500"))
+# 每个上游端口保留的空闲 keep-alive 连接数
+MAX_IDLE_PER_UPSTREAM = int(os.getenv("APP_PROXY_MAX_IDLE", "8"))
+UPSTREAM_HOST = "127.0.0.1"
+PATH_PREFIX = "/apps/"
+HEAD_LIMIT = 64 * 1024
+COPY_CHUNK = 64 * 1024
+HOP_BY_HOP = {
+    "connection", "keep-alive", "proxy-connection", "proxy-authenticate",
+    "proxy-authorization", "te", "trailer", "upgrade",
+}
+
+
+def app_base_path(instance_id):
+    """
+    子应用的 URL 前缀（对应 streamlit 的 --server.baseUrlPath），未启用代理时为空。
+    """
+    return f"{PATH_PREFIX}{instance_id}" if PROXY_ENABLED else ""
+
+
+def _header(headers, name, default=""):
+    name = name.lower()
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return default
+
+
+def _encode_head(start_line, headers):
+    lines = [start_line] + [f"{key}: {value}" for key, value in headers]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def _read_head(reader):
+    """
+    读取 HTTP 报文头。
+
+    返回:
+        Tuple[str, List[Tuple[str, str]]] or None: (起始行, 头部列表)，连接已关闭时返回 None
+    """
+    try:
+        raw = await reader.readuntil(b"\r\n\r\n")
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+        return None
+    lines = raw.decode("latin-1").split("\r\n")
+    headers = []
+    for line in lines[1:]:
+        if ":" in line:
+            key, value = line.split(":", 1)
+            headers.append((key.strip(), value.strip()))
+    return lines[0], headers
+
+
+async def _relay_body(reader, writer, headers, on_data=None):
+    """
+    按 Content-Length 或 chunked 编码原样转发报文体。
+
+    返回:
+        bool or None: 报文体有明确边界并已转发返回 True；没有长度信息（需读到连接关闭为止）返回 None
+    """
+    if "chunked" in _header(headers, "Transfer-Encoding").lower():
+        while True:
+            size_line = await reader.readline()
+            writer.write(size_line)
+            size = int(size_line.split(b";")[0].strip() or b"0", 16)
+            if size == 0:
+                while True:
+                    trailer = await reader.readline()
+                    writer.write(trailer)
+                    if trailer in (b"\r\n", b"\n", b""):
+                        break
+                break
+            writer.write(await reader.readexactly(size + 2))
+            await writer.drain()
+            if on_data is not None:
+                on_data()
+        await writer.drain()
+        return True
+    length = _header(headers, "Content-Length")
+    if length:
+        remaining = int(length)
+        while remaining > 0:
+            chunk = await reader.read(min(COPY_CHUNK, remaining))
+            if not chunk:
+                raise ConnectionError("报文体提前结束")
+            writer.write(chunk)
+            await writer.drain()
+            remaining -= len(chunk)
+            if on_data is not None:
+                on_data()
+        return True
+    return None
+
+
+async def _pipe(reader, writer, on_data):
+    try:
+        while True:
+            chunk = await reader.read(COPY_CHUNK)
+            if not chunk:
+                break
+            writer.write(chunk)
+            await writer.drain()
+            on_data()
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        writer.close()
+
+
+class AppProxy:
+    """
+    子应用反向代理（基于 asyncio）：把 /apps/<实例ID>/ 下的 HTTP 与 WebSocket 请求转发到对应子应用端口，
+    普通 HTTP 请求复用到上游的 keep-alive 连接，同时记录每个实例最近的访问时间与 WebSocket 连接数。
+    """
+
+    def __init__(self, resolve, host=PROXY_HOST, port=PROXY_PORT, max_idle=MAX_IDLE_PER_UPSTREAM):
+        self.resolve = resolve  # instance_id -> 上游端口或 (主机, 端口)（不存在时返回 None）
+        self.host = host
+        self.port = port
+        self.max_idle = max_idle
+        self.idle = defaultdict(list)  # (上游主机, 端口) -> 空闲连接 [(reader, writer)]
+        self.last_activity = {}  # instance_id -> 最近一次请求或 WebSocket 消息的时间
+        self.open_websockets = defaultdict(int)  # instance_id -> 当前 WebSocket 连接数
+        self.upstream_connects = 0
+        self.upstream_reuses = 0
+        self.server = None
+
+    def touch(self, instance_id):
+        self.last_activity[instance_id] = time.time()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port, limit=HEAD_LIMIT)
+        if self.port == 0:
+            self.port = self.server.sockets[0].getsockname()[1]
+        return self.server
+
+    async def _open_upstream(self, upstream, reuse=True):
+        pool = self.idle[upstream]
+        while reuse and pool:
+            reader, writer = pool.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                self.upstream_reuses += 1
+                return reader, writer, True
+            writer.close()
+        reader, writer = await asyncio.open_connection(*upstream, limit=HEAD_LIMIT)
+        self.upstream_connects += 1
+        return reader, writer, False
+
+    def _release_upstream(self, upstream, reader, writer):
+        pool = self.idle[upstream]
+        if len(pool) < self.max_idle and not writer.is_closing() and not reader.at_eof():
+            pool.append((reader, writer))
+        else:
+            writer.close()
+
+    async def _respond(self, writer, status, body=b"", extra_headers=()):
+        headers = [("Content-Type", "text/plain; charset=utf-8"), ("Content-Length", str(len(body))),
+                   ("Connection", "close")] + list(extra_headers)
+        writer.write(_encode_head(f"HTTP/1.1 {status}", headers) + body)
+        await writer.drain()
+
+    async def handle_client(self, client_reader, client_writer):
+        peer = client_writer.get_extra_info("peername")
+        try:
+            while True:
+                head = await _read_head(client_reader)
+                if head is None:
+                    break
+                keep_open = await self._handle_request(head, client_reader, client_writer, peer)
+                if not keep_open:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            client_writer.close()
+
+    async def _handle_request(self, head, client_reader, client_writer, peer):
+        start_line, headers = head
+        try:
+            method, target, version = start_line.split(" ", 2)
+        except ValueError:
+            await self._respond(client_writer, "400 Bad Request")
+            return False
+        path = target.split("?", 1)[0]
+        if not path.startswith(PATH_PREFIX):
+            await self._respond(client_writer, "404 Not Found", "未知的子应用路径".encode())
+            return False
+        instance_id = path[len(PATH_PREFIX):].split("/", 1)[0]
+        if path == PATH_PREFIX + instance_id:
+            query = target[len(path):]
+            await self._respond(client_writer, "301 Moved Permanently",
+                                extra_headers=[("Location", f"{path}/{query}")])
+            return False
+        upstream = self.resolve(instance_id)
+        if upstream is None:
+            await self._respond(client_writer, "404 Not Found", "子应用实例不存在或已退出".encode())
+            return False
+        if isinstance(upstream, int):
+            upstream = (UPSTREAM_HOST, upstream)
+        self.touch(instance_id)
+
+        forwarded = [(k, v) for k, v in headers if k.lower() not in ("x-forwarded-for", "x-forwarded-host",
+                                                                      "x-forwarded-proto")]
+        forwarded += [("X-Forwarded-For", peer[0] if peer else ""),
+                      ("X-Forwarded-Host", _header(headers, "Host")),
+                      ("X-Forwarded-Proto", "http")]
+
+        if _header(headers, "Upgrade").lower() == "websocket":
+            await self._handle_websocket(instance_id, upstream, start_line, forwarded,
+                                         client_reader, client_writer)
+            return False
+        return await self._handle_http(instance_id, upstream, method, version, start_line, forwarded,
+                                       client_reader, client_writer)
+
+    async def _handle_http(self, instance_id, upstream, method, version, start_line, headers,
+                           client_reader, client_writer):
+        client_wants_close = (
+            _header(headers, "Connection").lower() == "close"
+            or (version == "HTTP/1.0" and _header(headers, "Connection").lower() != "keep-alive")
+        )
+        has_body = (_header(headers, "Content-Length") not in ("", "0")
+                    or "chunked" in _header(headers, "Transfer-Encoding").lower())
+        upstream_headers = [(k, v) for k, v in headers if k.lower() not in HOP_BY_HOP]
+        upstream_headers.append(("Connection", "keep-alive"))
+        request_head = _encode_head(start_line, upstream_headers)
+
+        # 复用的空闲连接可能已被上游关闭：无请求体时换新连接重试一次；有请求体时直接用新连接。
+        # 子应用已退出或尚未监听（连接被拒绝）、worker 主机不可达等连接错误均返回 502
+        for attempt in range(2):
+            up_writer, reused = None, False
+            try:
+                up_reader, up_writer, reused = await self._open_upstream(upstream, reuse=not has_body)
+                up_writer.write(request_head)
+                await up_writer.drain()
+                if has_body:
+                    await _relay_body(client_reader, up_writer, headers)
+                response = await _read_head(up_reader)
+                if response is None:
+                    raise ConnectionError("上游连接已关闭")
+                break
+            except (OSError, asyncio.IncompleteReadError):
+                if up_writer is not None:
+                    up_writer.close()
+                if not reused or attempt == 1:
+                    await self._respond(client_writer, "502 Bad Gateway", "子应用无响应".encode())
+                    return False
+
+        status_line, response_headers = response
+        status_code = int(status_line.split(" ", 2)[1])
+        upstream_close = _header(response_headers, "Connection").lower() == "close"
+        no_body = method == "HEAD" or status_code in (204, 304) or 100 <= status_code < 200
+        delimited = no_body or bool(_header(response_headers, "Content-Length")
+                                    or "chunked" in _header(response_headers, "Transfer-Encoding").lower())
+        close_client = client_wants_close or not delimited
+
+        client_headers = [(k, v) for k, v in response_headers if k.lower() not in HOP_BY_HOP]
+        client_headers.append(("Connection", "close" if close_client else "keep-alive"))
+        client_writer.write(_encode_head(status_line, client_headers))
+        try:
+            if not no_body:
+                if await _relay_body(up_reader, client_writer, response_headers,
+                                     on_data=lambda: self.touch(instance_id)) is None:
+                    await _pipe(up_reader, client_writer, lambda: self.touch(instance_id))
+            await client_writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            up_writer.close()
+            return False
+
+        if upstream_close or not delimited:
+            up_writer.close()
+        else:
+            self._release_upstream(upstream, up_reader, up_writer)
+        return not close_client
+
+    async def _handle_websocket(self, instance_id, upstream, start_line, headers,
+                                client_reader, client_writer):
+        try:
+            up_reader, up_writer, _ = await self._open_upstream(upstream, reuse=False)
+        except OSError:
+            await self._respond(client_writer, "502 Bad Gateway", "子应用无响应".encode())
+            return
+        up_writer.write(_encode_head(start_line, headers))
+        await up_writer.drain()
+        response = await _read_head(up_reader)
+        if response is None:
+            up_writer.close()
+            await self._respond(client_writer, "502 Bad Gateway", "子应用无响应".encode())
+            return
+        client_writer.write(_encode_head(*response))
+        await client_writer.drain()
+        if response[0].split(" ")[1:2] != ["101"]:
+            if await _relay_body(up_reader, client_writer, response[1]) is None:
+                await _pipe(up_reader, client_writer, lambda: None)
+            up_writer.close()
+            return
+
+        on_data = lambda: self.touch(instance_id)  # noqa: E731
+        self.open_websockets[instance_id] += 1
+        try:
+            await asyncio.gather(_pipe(client_reader, up_writer, on_data),
+                                 _pipe(up_reader, client_writer, on_data))
+        finally:
+            self.open_websockets[instance_id] -= 1
+            self.touch(instance_id)
+
+    def stats(self):
+        return {
+            "upstream_connects": self.upstream_connects,
+            "upstream_reuses": self.upstream_reuses,
+            "open_websockets": sum(self.open_websockets.values()),
+            "idle_upstreams": sum(len(pool) for pool in self.idle.values()),
+        }
+
+
+# 集成器进程内只启动一个代理：Streamlit 每次 rerun 都会调用 ensure_proxy_started，这里用模块级状态去重
+_proxy = None
+_proxy_lock = threading.Lock()
+
+
+def ensure_proxy_started(resolve, host=PROXY_HOST, port=PROXY_PORT):
+    """
+    在后台守护线程中启动反向代理（已启动则直接返回）。
+
+    参数:
+        resolve (Callable[[str], int or Tuple[str, int] or None]): 实例ID -> 子应用端口或 (主机, 端口)
+
+    返回:
+        AppProxy: 代理对象
+    """
+    global _proxy
+    with _proxy_lock:
+        if _proxy is not None:
+            return _proxy
+        proxy = AppProxy(resolve, host=host, port=port)
+        started = threading.Event()
+        errors = []
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(proxy.start())
+            except OSError as e:
+                errors.append(e)
+                return
+            finally:
+                started.set()
+            loop.run_forever()
+
+        threading.Thread(target=run, name="app-proxy", daemon=True).start()
+        started.wait(timeout=5)
+        if errors:
+            raise RuntimeError(f"❌ 反向代理启动失败（端口 {port}）: {errors[0]}")
+        _proxy = proxy
+        return proxy
+
+
+def get_proxy():
+    return _proxy
@@ -0,0 +1,56 @@
+import os
+import time
+import urllib.error
+import urllib.request
+
+# 就绪探测参数：首次间隔、最大间隔（指数退避）与总超时（秒）
+READY_INITIAL_DELAY = float(os.getenv("APP_READY_INITIAL_DELAY", "0.05"))
+READY_MAX_DELAY = float(os.getenv("APP_READY_MAX_DELAY", "0.5"))
+READY_TIMEOUT = float(os.getenv("APP_READY_TIMEOUT", "30"))
+# Streamlit 内置的健康检查路径
+HEALTH_PATH = "/_stcore/health"
+
+
+def probe_health(port, host="127.0.0.1", path=HEALTH_PATH, timeout=0.5):
+    """
+    请求一次子应用的 HTTP 健康检查接口。
+
+    返回:
+        bool: 返回 200 即视为就绪
+    """
+    try:
+        with urllib.request.urlopen(f"http://{host}:{port}{path}", timeout=timeout) as resp:
+            return resp.status == 200
+    except (urllib.error.URLError, OSError, ValueError):
+        return False
+
+
+def wait_until_ready(port, is_alive=None, timeout=READY_TIMEOUT, host="127.0.0.1", path=HEALTH_PATH,
+                     initial_delay=READY_INITIAL_DELAY, max_delay=READY_MAX_DELAY):
+    """
+    以指数退避轮询子应用健康检查接口，直到就绪或超时。
+
+    参数:
+        port (int): 子应用端口
+        is_alive (Callable[[], bool]): 子进程存活判断，进程提前退出时立即失败
+        timeout (float): 总超时（秒）
+
+    返回:
+        float: 从开始轮询到就绪所用的秒数
+
+    异常:
+        TimeoutError: 超时仍未就绪
+        RuntimeError: 子进程在就绪前退出
+    """
+    start = time.monotonic()
+    delay = initial_delay
+    while True:
+        if probe_health(port, host=host, path=path):
+            return time.monotonic() - start
+        if is_alive is not None and not is_alive():
+            raise RuntimeError(f"❌ 子应用进程在端口 {port} 就绪前已退出")
+        remaining = timeout - (time.monotonic() - start)
+        if remaining <= 0:
+            raise TimeoutError(f"❌ 子应用在 {timeout:.0f} 秒内未就绪（端口 {port}）")
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
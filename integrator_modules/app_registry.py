@@ -0,0 +1,572 @@
+import os
+import signal
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+
+from integrator_modules.app_logs import CAPTURE_ENABLED as LOG_CAPTURE_ENABLED, app_logs
+from integrator_modules.app_proxy import app_base_path
+from integrator_modules.app_readiness import HEALTH_PATH, wait_until_ready
+from integrator_modules.port_leases import port_leases
+from integrator_modules.worker_pool import WorkerUnavailable, worker_pool
+
+# 实例共享范围："user" 表示同一用户同一 app 复用一个实例；"app" 表示所有用户共享同一 app 的实例
+SHARE_SCOPE = os.getenv("APP_SHARE_SCOPE", "user")
+# 单个 app 最多同时运行的实例数
+MAX_INSTANCES_PER_APP = int(os.getenv("APP_MAX_INSTANCES_PER_APP", "4"))
+# 共享模式下单个实例最多承载的用户数，超过后（且未达上限时）再启动新实例
+MAX_USERS_PER_INSTANCE = int(os.getenv("APP_MAX_USERS_PER_INSTANCE", "10"))
+# 子进程启动后尚未监听端口的宽限时间（秒），期间仍视为健康实例
+STARTUP_GRACE_SECONDS = float(os.getenv("APP_STARTUP_GRACE_SECONDS", "30"))
+# 本机子应用的访问地址
+LOCAL_HOST = "127.0.0.1"
+# 实例注册表持久化文件，放在 database/ 目录下，容器重启后仍可读取
+REGISTRY_DB_PATH = os.getenv(
+    "APP_REGISTRY_DB",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database", "app_registry.db"),
+)
+
+
+def pid_alive(pid, proc=None):
+    """
+    判断进程是否仍在运行。
+
+    参数:
+        pid (int): 进程号
+        proc (subprocess.Popen): 若为本进程启动的子进程，用 poll() 顺便回收僵尸进程
+
+    返回:
+        bool: 进程是否存活
+    """
+    if proc is not None:
+        return proc.poll() is None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def is_streamlit_process(pid, port):
+    """
+    通过 /proc/<pid>/cmdline 确认该 pid 仍是监听指定端口的 streamlit 子进程，防止 pid 被系统复用后误认。
+    非 Linux 环境无 /proc 时不做校验。
+    """
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            cmdline = f.read().split(b"\0")
+    except FileNotFoundError:
+        return not os.path.isdir("/proc")
+    except OSError:
+        return True
+    return any(b"streamlit" in arg for arg in cmdline) and str(port).encode() in cmdline
+
+
+def port_listening(port, host="127.0.0.1", timeout=0.2):
+    """
+    判断端口上是否已有服务在监听。
+    """
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+class AppInstance:
+    """一个正在运行的 Streamlit 子应用实例"""
+
+    def __init__(self, app_path, port, pid, text="", user=None, proc=None, instance_id=None,
+                 start_time=None, last_health_check=None, ready_latency=None, warm=False, host=None, worker=None,
+                 claimed_at=None):
+        self.instance_id = instance_id or uuid.uuid4().hex[:8]
+        self.app_path = app_path
+        self.port = port
+        self.pid = pid
+        self.text = text
+        self.user = user
+        # proc 为 worker_pool.RemoteProcess 时实例运行在对应的 worker 主机上
+        self.worker = worker or getattr(proc, "worker_url", None)  # None 表示集成器本机
+        self.host = host or getattr(proc, "host", None) or LOCAL_HOST
+        if self.worker and proc is None:
+            proc = worker_pool.client(self.worker).process(pid)
+        self.proc = proc
+        self.users = {user} if user else set()
+        self.start_time = start_time or time.time()
+        self.last_health_check = last_health_check
+        self.ready_latency = ready_latency  # 从启动到健康检查通过的秒数，None 表示尚未就绪
+        self.warm = warm  # 预热池中尚未分配给用户的实例
+        self.claimed_at = claimed_at  # 从预热池领用的时刻，空闲计时从此开始而不是从进程启动开始
+
+    @property
+    def ready(self):
+        return self.ready_latency is not None
+
+    def is_healthy(self):
+        """进程存活，且端口已监听（或尚未就绪且仍处于启动宽限期内）"""
+        self.last_health_check = time.time()
+        if not pid_alive(self.pid, self.proc):
+            return False
+        if not self.ready and time.time() - self.start_time < STARTUP_GRACE_SECONDS:
+            return True
+        return port_listening(self.port, self.host)
+
+
+# 持久化字段：(字段名, 类型)，与 AppInstance 的同名属性对应；新增字段追加在末尾，打开旧文件时自动补列
+STORE_COLUMNS = [
+    ("instance_id", "TEXT PRIMARY KEY"),
+    ("app_path", "TEXT NOT NULL"),
+    ("port", "INTEGER NOT NULL"),
+    ("pid", "INTEGER NOT NULL"),
+    ("text", "TEXT"),
+    ("user", "TEXT"),
+    ("start_time", "REAL NOT NULL"),
+    ("last_health_check", "REAL"),
+    ("ready_latency", "REAL"),
+    ("warm", "INTEGER DEFAULT 0"),
+    ("host", "TEXT"),
+    ("worker", "TEXT"),
+    ("claimed_at", "REAL"),
+]
+
+
+class RegistryStore:
+    """实例注册表的 SQLite 持久化：记录 pid、端口、app 路径、用户、启动时间与最近一次健康检查时间"""
+
+    def __init__(self, db_path=REGISTRY_DB_PATH):
+        self.db_path = db_path
+        self.init_database()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def init_database(self):
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = self._connect()
+        try:
+            columns_sql = ",\n".join(f"{name} {decl}" for name, decl in STORE_COLUMNS)
+            conn.execute(f"CREATE TABLE IF NOT EXISTS app_instances ({columns_sql})")
+            # 兼容旧版本注册表文件：补充后来新增的字段
+            existing = [row[1] for row in conn.execute("PRAGMA table_info(app_instances)")]
+            for name, decl in STORE_COLUMNS:
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE app_instances ADD COLUMN {name} {decl}")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def save(self, instance):
+        names = [name for name, _ in STORE_COLUMNS]
+        conn = self._connect()
+        try:
+            conn.execute(
+                f"INSERT OR REPLACE INTO app_instances ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+                [getattr(instance, name) for name in names],
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def delete(self, instance_id):
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM app_instances WHERE instance_id = ?", (instance_id,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def update_health(self, instances):
+        conn = self._connect()
+        try:
+            conn.executemany(
+                "UPDATE app_instances SET last_health_check = ? WHERE instance_id = ?",
+                [(inst.last_health_check, inst.instance_id) for inst in instances],
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def load(self):
+        names = [name for name, _ in STORE_COLUMNS]
+        conn = self._connect()
+        try:
+            rows = conn.execute(f"SELECT {', '.join(names)} FROM app_instances").fetchall()
+        finally:
+            conn.close()
+        instances = []
+        for row in rows:
+            fields = dict(zip(names, row))
+            fields["warm"] = bool(fields["warm"])
+            instances.append(AppInstance(**fields))
+        return instances
+
+
+class AppRegistry:
+    """
+    子应用实例注册表：以 port_pid_map 为端口索引，按 (app 路径, 用户) 查找可复用的健康实例，
+    只有在容量规则允许时才启动新的子进程。
+    """
+
+    def __init__(self, share_scope=SHARE_SCOPE, max_instances_per_app=MAX_INSTANCES_PER_APP,
+                 max_users_per_instance=MAX_USERS_PER_INSTANCE, store=None, leases=None):
+        self.store = store
+        self.leases = leases
+        self.share_scope = share_scope
+        self.max_instances_per_app = max_instances_per_app
+        self.max_users_per_instance = max_users_per_instance
+        self.instances = {}  # instance_id -> AppInstance
+        self.port_pid_map = {}  # port -> pid
+        self.ready_latencies = defaultdict(lambda: deque(maxlen=50))  # app_path -> 最近的启动就绪耗时
+        self.warm_listeners = []  # 预热实例被领用后的回调，预热池据此立即补充
+        # 正在启动（锁外执行 spawn）的实例：instance_id -> (app 路径, 所属用户, 完成事件)
+        self.pending = {}
+        # 每注册一个实例加一：锁外查找期间若有新实例注册，get_or_launch 据此重新查找而不是重复启动
+        self.generation = 0
+        self._lock = threading.RLock()
+
+    def _owner(self, user):
+        return user if self.share_scope == "user" else None
+
+    def _candidates(self, app_path, user):
+        owner = self._owner(user)
+        return [
+            inst for inst in self.instances.values()
+            if inst.app_path == app_path and not inst.warm and (owner is None or inst.user == owner)
+        ]
+
+    def _pending_launch(self, app_path, user):
+        owner = self._owner(user)
+        return next((done for path, pending_owner, done in self.pending.values()
+                     if path == app_path and pending_owner == owner), None)
+
+    def _probe(self, instances):
+        """
+        在锁外逐个做健康检查（worker 上的实例需要 HTTP 请求与端口探测，可能较慢），再在锁内移除已退出的实例。
+        调用方不应持有 _lock，否则一台 worker 无响应会阻塞所有会话的查找与启动。
+
+        返回:
+            List[AppInstance]: 仍注册在表中的健康实例
+        """
+        results = [(inst, inst.is_healthy()) for inst in instances]
+        with self._lock:
+            healthy = []
+            for inst, ok in results:
+                if self.instances.get(inst.instance_id) is not inst:
+                    continue  # 检查期间已被其他线程移除
+                if ok:
+                    healthy.append(inst)
+                else:
+                    self.remove(inst.instance_id)
+            self._persist_health(healthy)
+        return healthy
+
+    def warm_instances(self, app_path):
+        with self._lock:
+            return [inst for inst in self.instances.values() if inst.warm and inst.app_path == app_path]
+
+    def claim_warm(self, app_path, text, user):
+        """
+        从预热池领用一个已就绪的同 app 实例，转为该用户的普通实例。
+
+        返回:
+            AppInstance or None
+        """
+        ready = [inst for inst in self.warm_instances(app_path) if inst.ready]
+        healthy = self._probe(ready)
+        with self._lock:
+            for inst in healthy:
+                if not inst.warm or inst.instance_id not in self.instances:
+                    continue  # 已被其他会话领用
+                inst.warm = False
+                inst.claimed_at = time.time()
+                inst.text = text
+                inst.user = self._owner(user)
+                if user:
+                    inst.users.add(user)
+                if self.store is not None:
+                    self.store.save(inst)
+                break
+            else:
+                return None
+        for listener in self.warm_listeners:
+            listener(app_path)
+        return inst
+
+    def register(self, instance):
+        with self._lock:
+            self.instances[instance.instance_id] = instance
+            self.generation += 1
+            # 端口索引与端口池只管理集成器本机的实例，worker 上的端口由各自的代理管理
+            if instance.worker is None:
+                self.port_pid_map[instance.port] = instance.pid
+                if self.leases is not None:
+                    self.leases.attach(instance.port, instance.pid)
+            if self.store is not None:
+                self.store.save(instance)
+        return instance
+
+    def remove(self, instance_id):
+        with self._lock:
+            instance = self.instances.pop(instance_id, None)
+            local = instance is not None and instance.worker is None
+            if local and self.port_pid_map.get(instance.port) == instance.pid:
+                del self.port_pid_map[instance.port]
+            if local and self.leases is not None:
+                self.leases.release(instance.port, instance.pid)
+            if instance is not None and self.store is not None:
+                self.store.delete(instance_id)
+        return instance
+
+    def terminate(self, instance_id, sig=signal.SIGTERM):
+        """
+        从注册表移除实例并终止其子进程。
+
+        返回:
+            AppInstance or None: 被终止的实例
+        """
+        instance = self.remove(instance_id)
+        if instance is None:
+            return None
+        self._kill(instance, sig)
+        return instance
+
+    def release_user(self, instance_id, user):
+        """
+        用户关闭工具：用户独占的实例直接终止；共享实例只移除该用户，最后一个用户离开时才终止。
+        移除用户与是否终止的判断在锁内完成，避免与并发的复用（users.add）交错后终止仍在使用的实例。
+
+        返回:
+            AppInstance or None: 被终止的实例
+        """
+        with self._lock:
+            instance = self.instances.get(instance_id)
+            if instance is None or (instance.user is not None and instance.user != user):
+                return None
+            was_using = user in instance.users
+            instance.users.discard(user)
+            if not (instance.user == user or (was_using and not instance.users)):
+                return None
+            self.remove(instance_id)
+        self._kill(instance)
+        return instance
+
+    @staticmethod
+    def _kill(instance, sig=signal.SIGTERM):
+        """终止实例的子进程；调用前记录已从注册表移除，worker 不可达时只记日志（进程留在该 worker 上，需另行清理）"""
+        try:
+            if instance.worker is not None:
+                instance.proc.send_signal(sig)
+            else:
+                os.kill(instance.pid, sig)
+        except ProcessLookupError:
+            pass
+        except WorkerUnavailable as e:
+            print(f"⚠️ 无法终止 worker 上的子进程 PID = {instance.pid}（{instance.text}）: {e}")
+            return
+        if instance.proc is not None:
+            try:
+                instance.proc.wait(timeout=5)
+            except Exception:
+                try:
+                    instance.proc.kill()
+                except WorkerUnavailable as e:
+                    print(f"⚠️ 无法强制终止 worker 上的子进程 PID = {instance.pid}（{instance.text}）: {e}")
+
+    def get(self, instance_id):
+        return self.instances.get(instance_id)
+
+    def resolve_port(self, instance_id):
+        """反向代理路由：实例ID -> 子应用端口"""
+        instance = self.instances.get(instance_id)
+        return instance.port if instance is not None else None
+
+    def resolve_upstream(self, instance_id):
+        """反向代理路由：实例ID -> (子应用主机, 端口)，支持运行在 worker 上的实例"""
+        instance = self.instances.get(instance_id)
+        return (instance.host, instance.port) if instance is not None else None
+
+    def list_instances(self):
+        with self._lock:
+            return list(self.instances.values())
+
+    def prune(self):
+        """
+        清理已退出的实例。
+
+        返回:
+            List[AppInstance]: 被移除的实例
+        """
+        checked = self.list_instances()
+        healthy = set(map(id, self._probe(checked)))
+        return [inst for inst in checked if id(inst) not in healthy]
+
+    def _persist_health(self, instances):
+        if self.store is not None and instances:
+            self.store.update_health(instances)
+
+    def wait_ready(self, instance, timeout=None):
+        """
+        阻塞等待实例通过健康检查，并记录该实例从启动到就绪的耗时；已就绪的实例立即返回。
+        在锁外轮询，不影响其他会话的查找与启动。
+
+        返回:
+            float: 启动到就绪耗时（秒）
+        """
+        if instance.ready:
+            return instance.ready_latency
+        kwargs = {} if timeout is None else {"timeout": timeout}
+        wait_until_ready(instance.port, is_alive=lambda: pid_alive(instance.pid, instance.proc), host=instance.host,
+                         path=app_base_path(instance.instance_id) + HEALTH_PATH, **kwargs)
+        with self._lock:
+            if not instance.ready:
+                instance.ready_latency = time.time() - instance.start_time
+                self.ready_latencies[instance.app_path].append(instance.ready_latency)
+                if self.leases is not None and instance.worker is None:
+                    self.leases.confirm(instance.port)
+                if self.store is not None and instance.instance_id in self.instances:
+                    self.store.save(instance)
+        return instance.ready_latency
+
+    def recover(self):
+        """
+        集成器启动时调用：从持久化文件重新接管仍存活的子进程，清理已退出或 pid 已被复用的记录。
+
+        返回:
+            Tuple[List[AppInstance], List[AppInstance]]: (重新接管的实例, 被清理的实例)
+        """
+        if self.store is None:
+            return [], []
+        adopted, reaped = [], []
+        with self._lock:
+            for inst in self.store.load():
+                if inst.instance_id in self.instances:
+                    continue
+                if inst.worker is not None:
+                    # worker 上的实例由代理确认进程仍在其管理之下
+                    alive = pid_alive(inst.pid, inst.proc)
+                else:
+                    alive = pid_alive(inst.pid) and is_streamlit_process(inst.pid, inst.port)
+                if alive:
+                    inst.last_health_check = time.time()
+                    self.instances[inst.instance_id] = inst
+                    if inst.worker is not None and LOG_CAPTURE_ENABLED:
+                        app_logs.attach_remote(inst.instance_id, inst.proc.client, label=inst.text,
+                                               start_time=inst.start_time)
+                    if inst.worker is None:
+                        self.port_pid_map[inst.port] = inst.pid
+                        if self.leases is not None:
+                            self.leases.adopt(inst.port, inst.pid)
+                        if LOG_CAPTURE_ENABLED:
+                            # 子进程仍在向日志文件输出，重新跟踪
+                            app_logs.adopt(inst.instance_id, inst.pid, label=inst.text, start_time=inst.start_time)
+                    adopted.append(inst)
+                else:
+                    self.store.delete(inst.instance_id)
+                    reaped.append(inst)
+            self._persist_health(adopted)
+        return adopted, reaped
+
+    def find_healthy(self, app_path, user=None):
+        """
+        查找同一 app 路径（用户范围下还要求同一用户）可复用的健康实例，优先返回承载用户最少的一个。
+
+        返回:
+            AppInstance or None
+        """
+        with self._lock:
+            candidates = self._candidates(app_path, user)
+        healthy = self._probe(candidates)
+        with self._lock:
+            healthy = [inst for inst in healthy if inst.instance_id in self.instances]
+            if not healthy:
+                return None
+            if user in set().union(*(inst.users for inst in healthy)):
+                return next(inst for inst in healthy if user in inst.users)
+            return min(healthy, key=lambda inst: len(inst.users))
+
+    def lookup(self, app_path, text, user):
+        """
+        不启动新进程的查找：复用已有健康实例，或领用预热实例。
+
+        返回:
+            Tuple[AppInstance or None, bool]: (实例, 是否为复用)，需要启动新进程时实例为 None
+
+        健康检查在锁外进行，调用方不应持有 _lock。
+        """
+        instance = self.find_healthy(app_path, user)
+        with self._lock:
+            if instance is not None and instance.instance_id not in self.instances:
+                instance = None  # 检查后被其他线程移除，按未命中处理
+            if instance is not None:
+                full = len(instance.users) >= self.max_users_per_instance and user not in instance.users
+                at_limit = len(self._candidates(app_path, user)) >= self.max_instances_per_app
+                if not full or at_limit:
+                    if user:
+                        instance.users.add(user)
+                    return instance, True
+            elif len(self._candidates(app_path, user)) >= self.max_instances_per_app:
+                raise RuntimeError(f"❌ 子应用 {text} 的实例数已达上限 {self.max_instances_per_app}")
+
+        return self.claim_warm(app_path, text, user), False
+
+    def get_or_launch(self, app_path, text, user, spawn):
+        """
+        返回可用实例：命中已有健康实例则直接复用，否则在容量规则允许时调用 spawn 启动新实例。
+
+        参数:
+            app_path (str): 子应用脚本路径
+            text (str): 子应用名称
+            user (str): 当前登录用户
+            spawn (Callable[[str], Tuple[int, int, subprocess.Popen]]): 按预先生成的实例ID启动子进程，返回 (port, pid, proc)；
+                proc 为 worker_pool.RemoteProcess 时实例记录为运行在对应 worker 上
+
+        返回:
+            Tuple[AppInstance, bool]: (实例, 是否为复用)
+
+        spawn 可能是耗时数十秒的 worker HTTP 请求，因此在锁外执行：先在锁内预留实例ID，启动完成后再在锁内注册。
+        同一 app（及同一用户）已有启动中的实例时，等待其完成后重新查找，而不是再启动一个。
+        查找（含健康检查）同样在锁外进行；查找期间有新实例注册时重新查找。
+        """
+        while True:
+            generation = self.generation
+            instance, reused = self.lookup(app_path, text, user)
+            if instance is not None:
+                return instance, reused
+            with self._lock:
+                if self.generation != generation:
+                    continue
+                pending = self._pending_launch(app_path, user)
+                if pending is None:
+                    instance_id = uuid.uuid4().hex[:8]
+                    done = threading.Event()
+                    self.pending[instance_id] = (app_path, self._owner(user), done)
+                    break
+            pending.wait()
+
+        try:
+            port, pid, proc = spawn(instance_id)
+            instance = AppInstance(app_path, port, pid, text=text, user=self._owner(user), proc=proc,
+                                   instance_id=instance_id)
+            if user:
+                instance.users.add(user)
+            with self._lock:
+                self.register(instance)
+        finally:
+            with self._lock:
+                self.pending.pop(instance_id, None)
+            done.set()
+        return instance, False
+
+
+# 模块级单例：Streamlit 每次 rerun 都会重新执行主脚本，但已导入的模块只加载一次，实例信息因此得以跨会话保留；
+# 集成器进程重启后再通过 recover() 从 database/app_registry.db 重新接管存活的子进程
+registry = AppRegistry(store=RegistryStore(), leases=port_leases)
+registry.recover()
+port_pid_map = registry.port_pid_map
@@ -0,0 +1,201 @@
+import os
+import threading
+import time
+from collections import deque
+
+# 子应用空闲超时（秒）：超过该时间没有任何请求/WebSocket 消息的实例会被终止，0 表示不限制
+IDLE_TTL_SECONDS = float(os.getenv("APP_IDLE_TTL_SECONDS", "1800"))
+# 单个子应用实例的内存上限（MB），超过后终止，0 表示不限制
+MEMORY_BUDGET_MB = float(os.getenv("APP_MEMORY_BUDGET_MB", "2048"))
+# 采样周期（秒）
+SAMPLE_INTERVAL_SECONDS = float(os.getenv("APP_SUPERVISOR_INTERVAL", "15"))
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def read_proc_stats(pid):
+    """
+    从 /proc 读取进程的常驻内存与累计 CPU 时间。
+
+    返回:
+        Tuple[float, float] or None: (RSS 字节数, 用户态+内核态 CPU 秒数)，进程不存在时返回 None
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # comm 字段可能含空格，从最后一个 ')' 之后开始切分
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/statm") as f:
+            rss_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    cpu_seconds = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS  # utime + stime
+    return rss_pages * os.sysconf("SC_PAGE_SIZE"), cpu_seconds
+
+
+def count_established(port):
+    """
+    统计 /proc/net/tcp(6) 中本地端口为 port 的 ESTABLISHED 连接数，用于未启用反向代理时判断子应用是否仍有浏览器连接。
+    """
+    count = 0
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(table) as f:
+                next(f)
+                for line in f:
+                    parts = line.split()
+                    if parts[3] == "01" and int(parts[1].rsplit(":", 1)[1], 16) == port:
+                        count += 1
+        except (OSError, StopIteration, IndexError, ValueError):
+            continue
+    return count
+
+
+class InstanceUsage:
+    """一个子应用实例最近一次的资源采样结果"""
+
+    def __init__(self, instance):
+        self.instance = instance
+        self.rss_bytes = 0
+        self.cpu_seconds = 0.0
+        self.cpu_percent = 0.0
+        self.sampled_at = None
+        self.last_activity = instance.claimed_at or instance.start_time
+
+    def as_dict(self, now=None):
+        now = now or time.time()
+        inst = self.instance
+        return {
+            "实例ID": inst.instance_id,
+            "应用": inst.text,
+            "用户": "（预热）" if inst.warm else ", ".join(sorted(inst.users)) or (inst.user or ""),
+            "PID": inst.pid,
+            "主机": "本机" if inst.worker is None else inst.host,
+            "端口": inst.port,
+            "内存(MB)": round(self.rss_bytes / 1024 / 1024, 1),
+            "CPU(%)": round(self.cpu_percent, 1),
+            "空闲(秒)": int(now - self.last_activity),
+            "运行(秒)": int(now - inst.start_time),
+            "启动耗时(秒)": round(inst.ready_latency, 2) if inst.ready else None,
+        }
+
+
+class AppSupervisor:
+    """
+    子应用守护线程：定期从 /proc 采样每个实例的内存与 CPU，跟踪最近一次 WebSocket/HTTP 活动，
+    终止空闲超过 TTL 或超出内存预算的实例。
+    """
+
+    def __init__(self, registry, get_proxy=None, idle_ttl=IDLE_TTL_SECONDS, memory_budget_mb=MEMORY_BUDGET_MB,
+                 interval=SAMPLE_INTERVAL_SECONDS):
+        self.registry = registry
+        self.get_proxy = get_proxy or (lambda: None)
+        self.idle_ttl = idle_ttl
+        self.memory_budget_mb = memory_budget_mb
+        self.interval = interval
+        self.usage = {}  # instance_id -> InstanceUsage
+        self.reaped = deque(maxlen=100)  # 最近被终止的实例记录
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _last_activity(self, usage, now):
+        instance = usage.instance
+        # 预热实例在池中等待的时间不计入空闲：领用时刻视为一次活动
+        last_activity = max(usage.last_activity, instance.claimed_at or 0)
+        proxy = self.get_proxy()
+        if proxy is not None:
+            return max(last_activity, proxy.last_activity.get(instance.instance_id, 0))
+        # 未启用反向代理时无法看到 WebSocket 消息，只要仍有浏览器连接即视为活跃
+        established = instance.proc.established() if instance.worker is not None else count_established(instance.port)
+        if established > 0:
+            return now
+        return last_activity
+
+    def sample(self):
+        """对所有实例采样一次，返回需要终止的 [(实例, 原因)]"""
+        now = time.time()
+        self.registry.prune()
+        to_reap = []
+        with self._lock:
+            live = {inst.instance_id: inst for inst in self.registry.list_instances()}
+            for instance_id in list(self.usage):
+                if instance_id not in live:
+                    del self.usage[instance_id]
+            for instance_id, inst in live.items():
+                usage = self.usage.setdefault(instance_id, InstanceUsage(inst))
+                # worker 上的实例由代理读取其 /proc 后上报
+                stats = inst.proc.stats() if inst.worker is not None else read_proc_stats(inst.pid)
+                if stats is not None:
+                    rss_bytes, cpu_seconds = stats
+                    if usage.sampled_at is not None and now > usage.sampled_at:
+                        usage.cpu_percent = 100.0 * (cpu_seconds - usage.cpu_seconds) / (now - usage.sampled_at)
+                    usage.rss_bytes, usage.cpu_seconds, usage.sampled_at = rss_bytes, cpu_seconds, now
+                usage.last_activity = self._last_activity(usage, now)
+
+                if self.idle_ttl > 0 and inst.ready and not inst.warm and now - usage.last_activity > self.idle_ttl:
+                    to_reap.append((inst, f"空闲超过 {self.idle_ttl:.0f} 秒"))
+                elif self.memory_budget_mb > 0 and usage.rss_bytes > self.memory_budget_mb * 1024 * 1024:
+                    to_reap.append((inst, f"内存超过 {self.memory_budget_mb:.0f} MB"))
+        return to_reap
+
+    def reap(self, instance, reason):
+        if self.registry.terminate(instance.instance_id) is not None:
+            print(f"🧹 终止子进程 PID = {instance.pid}（{instance.text}，端口 {instance.port}）：{reason}")
+            self.reaped.append({"时间": time.strftime("%Y-%m-%d %H:%M:%S"), "应用": instance.text,
+                                "PID": instance.pid, "原因": reason})
+        with self._lock:
+            self.usage.pop(instance.instance_id, None)
+
+    def run_once(self):
+        for instance, reason in self.sample():
+            self.reap(instance, reason)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"❌ 子应用守护线程采样出错: {e}")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="app-supervisor", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def snapshot(self):
+        """
+        当前所有实例的资源占用。
+
+        返回:
+            List[dict]: 每个实例一行，可直接用于 st.dataframe 展示
+        """
+        now = time.time()
+        with self._lock:
+            return [usage.as_dict(now) for usage in self.usage.values()]
+
+    def usage_by_app(self):
+        """按应用汇总实例数、总内存与 CPU，用于评估主机容量"""
+        summary = {}
+        for row in self.snapshot():
+            app = summary.setdefault(row["应用"], {"应用": row["应用"], "实例数": 0, "总内存(MB)": 0.0, "总CPU(%)": 0.0})
+            app["实例数"] += 1
+            app["总内存(MB)"] = round(app["总内存(MB)"] + row["内存(MB)"], 1)
+            app["总CPU(%)"] = round(app["总CPU(%)"] + row["CPU(%)"], 1)
+        return list(summary.values())
+
+
+# 集成器进程内只启动一个守护线程
+_supervisor = None
+_supervisor_lock = threading.Lock()
+
+
+def ensure_supervisor_started(registry, get_proxy=None):
+    global _supervisor
+    with _supervisor_lock:
+        if _supervisor is None:
+            _supervisor = AppSupervisor(registry, get_proxy=get_proxy).start()
+        return _supervisor
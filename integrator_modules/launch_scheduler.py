@@ -0,0 +1,120 @@
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# 同时处于"启动中"（从 Popen 到健康检查通过）的子应用数上限
+MAX_CONCURRENT_LAUNCHES = int(os.getenv("APP_MAX_CONCURRENT_LAUNCHES", str(max(2, (os.cpu_count() or 2) // 2))))
+# 单个用户同时排队或启动中的请求数上限
+PER_USER_QUOTA = int(os.getenv("APP_LAUNCH_PER_USER_QUOTA", "2"))
+# 排队最长等待时间（秒）
+QUEUE_TIMEOUT_SECONDS = float(os.getenv("APP_LAUNCH_QUEUE_TIMEOUT", "120"))
+
+
+class LaunchRejected(RuntimeError):
+    """启动请求被准入控制拒绝（超出用户配额或排队超时）"""
+
+
+class LaunchScheduler:
+    """
+    子应用启动调度器：所有需要新建进程的启动请求按到达顺序进入 FIFO 队列，
+    同时启动中的数量不超过上限，每个用户同时排队/启动中的请求数受配额限制。
+    复用已有实例不经过队列。
+    """
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT_LAUNCHES, per_user_quota=PER_USER_QUOTA,
+                 queue_timeout=QUEUE_TIMEOUT_SECONDS):
+        self.max_concurrent = max_concurrent
+        self.per_user_quota = per_user_quota
+        self.queue_timeout = queue_timeout
+        self.queue = deque()  # 等待中的 (ticket, user)
+        self.active = 0
+        self.in_flight = {}  # user -> 排队中 + 启动中的请求数
+        self.admitted_total = 0
+        self.rejected_total = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._tickets = itertools.count(1)
+        self._cond = threading.Condition()
+
+    def position(self, ticket):
+        """队列中排在该请求之前的请求数"""
+        for i, (queued_ticket, _) in enumerate(self.queue):
+            if queued_ticket == ticket:
+                return i
+        return 0
+
+    @contextmanager
+    def slot(self, user, on_wait=None):
+        """
+        获取一个启动名额，退出 with 块时释放。
+
+        参数:
+            user (str): 发起启动的用户
+            on_wait (Callable[[int], None]): 排队期间队列位置变化时回调，参数为前面还有多少个请求
+
+        异常:
+            LaunchRejected: 超出用户配额或排队超时
+        """
+        with self._cond:
+            if self.in_flight.get(user, 0) >= self.per_user_quota:
+                self.rejected_total += 1
+                raise LaunchRejected(f"❌ 用户 {user} 同时启动的应用已达上限 {self.per_user_quota}，请稍后再试")
+            ticket = next(self._tickets)
+            self.queue.append((ticket, user))
+            self.in_flight[user] = self.in_flight.get(user, 0) + 1
+            enqueued_at = time.monotonic()
+            last_position = None
+            try:
+                while not (self.queue[0][0] == ticket and self.active < self.max_concurrent):
+                    position = self.position(ticket)
+                    if on_wait is not None and position != last_position:
+                        on_wait(position)
+                        last_position = position
+                    remaining = self.queue_timeout - (time.monotonic() - enqueued_at)
+                    if remaining <= 0:
+                        self.rejected_total += 1
+                        raise LaunchRejected(f"❌ 启动排队超过 {self.queue_timeout:.0f} 秒，请稍后再试")
+                    self._cond.wait(timeout=min(remaining, 1.0))
+            except BaseException:
+                self.queue.remove((ticket, user))
+                self._release_user(user)
+                self._cond.notify_all()
+                raise
+            self.queue.popleft()
+            self.active += 1
+            waited = time.monotonic() - enqueued_at
+            self.admitted_total += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            self._cond.notify_all()
+        try:
+            yield waited
+        finally:
+            with self._cond:
+                self.active -= 1
+                self._release_user(user)
+                self._cond.notify_all()
+
+    def _release_user(self, user):
+        self.in_flight[user] -= 1
+        if self.in_flight[user] <= 0:
+            del self.in_flight[user]
+
+    def stats(self):
+        with self._cond:
+            return {
+                "并发上限": self.max_concurrent,
+                "启动中": self.active,
+                "排队中": len(self.queue),
+                "已放行": self.admitted_total,
+                "已拒绝": self.rejected_total,
+                "平均排队(秒)": round(self.total_wait / self.admitted_total, 2) if self.admitted_total else 0.0,
+                "最长排队(秒)": round(self.max_wait, 2),
+            }
+
+
+# 模块级单例，集成器所有会话共享同一个启动队列
+launch_scheduler = LaunchScheduler()
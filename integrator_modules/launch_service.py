@@ -0,0 +1,169 @@
+# **********************************************************************************************
+# 子应用启动服务：实例注册表、端口池、启动队列、反向代理、守护线程、预热池与 worker 调度。
+# 集成器只在打开工具、系统监控页面以及后台启动服务时才导入本模块，登录页首次渲染不必等待这些模块加载。
+# **********************************************************************************************
+import os
+from urllib.parse import urlencode
+
+from integrator_modules.app_launcher import start_streamlit_app
+from integrator_modules.app_logs import CAPTURE_ENABLED as LOG_CAPTURE_ENABLED, app_logs
+from integrator_modules.app_proxy import PROXY_ENABLED, PROXY_PORT, app_base_path, ensure_proxy_started, get_proxy
+from integrator_modules.app_registry import pid_alive, registry
+from integrator_modules.app_supervisor import ensure_supervisor_started
+from integrator_modules.launch_scheduler import launch_scheduler
+from integrator_modules.launch_tokens import launch_tokens
+from integrator_modules.multipage import MULTIPAGE_ENTRY, page_url_path, use_multipage
+from integrator_modules.page_session import TICKET_PARAM, issue_ticket
+from integrator_modules.port_leases import port_leases
+from integrator_modules.warm_pool import LAUNCH_MODE, ensure_warm_pool_started
+from integrator_modules.worker_pool import worker_pool
+
+SERVER_IP = os.getenv('SERVER_IP', 'localhost')  # 从环境变量获取服务器IP
+
+
+# ============================================================================================
+# 从端口租约池中预留端口（范围由环境变量 APP_PORT_MIN/APP_PORT_MAX 配置），子进程确认监听前端口一直被预留
+def find_available_port():
+    return port_leases.acquire(is_pid_alive=pid_alive)
+
+
+# ====== 启动子应用进程：配置了 worker 代理（APP_WORKERS）时放到负载最低的 worker 上，否则在本机启动 ============
+#  返回 (port, pid, proc)；worker 上的实例 proc 为 RemoteProcess
+def spawn_instance(instance_id, app_path, text, user=None, password=None, preload=False):
+    if worker_pool.enabled:
+        local_instances = sum(1 for inst in registry.list_instances() if inst.worker is None)
+        worker = worker_pool.place(local_instances)
+        if worker is not None:
+            port, pid = worker.spawn(instance_id, app_path, text, user, password,
+                                     base_url_path=app_base_path(instance_id), preload=preload)
+            print(f"🚀 子应用 {text} 已在 worker {worker.url} 上启动，PID = {pid}，端口 {port}")
+            if LOG_CAPTURE_ENABLED:
+                # 输出写在 worker 主机上，日志面板经其代理读取
+                app_logs.attach_remote(instance_id, worker, label=text)
+            return port, pid, worker.process(pid)
+    port = find_available_port()
+    try:
+        proc = start_streamlit_app(app_path, port, text, user, password,
+                                   base_url_path=app_base_path(instance_id), preload=preload, log_key=instance_id)
+    except Exception:
+        port_leases.release(port)
+        raise
+    return port, proc.pid, proc
+
+
+# ====== 预热池启动函数：预热实例尚未分配用户，领用时再绑定 ========================================
+def spawn_warm_instance(instance_id, app_path):
+    return spawn_instance(instance_id, app_path, os.path.basename(app_path), preload=True)
+
+
+# - 子应用访问地址：启用反向代理时统一走代理端口下的 /apps/<实例ID>/，否则直连子应用端口 ----------------
+#
+def get_app_url(instance):
+    if PROXY_ENABLED:
+        return f"http://{SERVER_IP}:{PROXY_PORT}{app_base_path(instance.instance_id)}/"
+    # 运行在 worker 上的实例直连该 worker 上报的地址
+    host = SERVER_IP if instance.worker is None else instance.host
+    return f"http://{host}:{instance.port}"
+
+
+# ====== 综合启动函数：启动 + 注册监听 ===========================================================
+#  先在实例注册表中查找同一 app（及同一用户）的健康实例，命中则直接复用，否则经启动队列准入后才分配端口并启动新进程；
+#  返回前轮询子应用健康检查接口，确保打开浏览器窗口时子应用已就绪
+def launch_streamlit_with_monitor(
+        app_path, text, user=None, password=None, preload=False, on_queue=None
+):
+    def spawn(instance_id):
+        return spawn_instance(instance_id, app_path, text, user, password, preload=preload)
+
+    def wait_for(instance, reused):
+        if reused:
+            print(f"♻️ 复用子进程 PID = {instance.pid}，端口 {instance.port}，名称为 {text}")
+        try:
+            latency = registry.wait_ready(instance)
+        except (TimeoutError, RuntimeError):
+            # 只终止本次新启动的实例；复用的实例可能正被其他用户使用或由其他会话启动中，交由守护线程与 prune 处理
+            if not reused:
+                registry.terminate(instance.instance_id)
+            raise
+        if not reused:
+            app_logs.mark(instance.instance_id, "ready")
+            print(f"✅ {text} 已就绪，启动耗时 {latency:.2f} 秒")
+        return instance
+
+    instance, reused = registry.lookup(app_path, text, user)
+    if instance is not None:
+        return wait_for(instance, reused)
+    # 需要新建进程：排队获取启动名额，直到子应用就绪才释放，避免同时启动的进程过多争抢 CPU
+    with launch_scheduler.slot(user or text, on_wait=on_queue):
+        instance, reused = registry.get_or_launch(app_path, text, user, spawn)
+        return wait_for(instance, reused)
+
+
+# ====== 打开工具：多页面模式下跳转到共享服务中的对应页面，否则启动（或复用）独立子进程 =====================
+#  返回 (实例, 访问地址)
+def open_tool(app_path, text, user=None, password=None, on_queue=None):
+    if use_multipage(app_path):
+        instance = launch_streamlit_with_monitor(MULTIPAGE_ENTRY, text="多页面共享服务", preload=True,
+                                                 on_queue=on_queue)
+        url = get_app_url(instance).rstrip("/") + "/" + page_url_path(app_path)
+        if user:
+            # 共享服务不是以该用户启动的：用户与密码经票据交给页面所在的会话（见 page_session.py）
+            url += "?" + urlencode({TICKET_PARAM: issue_ticket(user, password)})
+        return instance, url
+    instance = launch_streamlit_with_monitor(app_path, text=text, user=user, password=password, on_queue=on_queue)
+    return instance, get_app_url(instance)
+
+
+# ====== 会话内去重的打开工具：同一会话对同一工具的重复点击（双击、rerun）在去重窗口内共享同一次启动 ==========
+#  返回启动令牌，token.url 为访问地址；token.opened 为 True 表示该地址已在浏览器中打开过
+def launch_tool_once(session_id, app_path, text, user=None, password=None, on_queue=None):
+    token, is_new = launch_tokens.acquire(session_id, app_path, text)
+    if not is_new:
+        token.wait()
+        return token
+    try:
+        instance, url = open_tool(app_path, text, user, password, on_queue)
+    except BaseException as e:  # 包括 rerun 打断，失败的令牌不再复用
+        token.fail(str(e) or type(e).__name__)
+        raise
+    token.resolve(instance.instance_id, url)
+    return token
+
+
+# ====== 我的工具：本会话打开过且仍在运行的工具，以及注册表中该用户正在使用的实例，重新打开时不启动新进程 ======
+def running_tools(session_id, user):
+    tools, seen = [], set()
+    for token in launch_tokens.session_tokens(session_id):
+        instance = registry.get(token.instance_id)
+        if instance is None:
+            continue
+        seen.add(token.instance_id)  # 多页面模式下多个工具共用一个实例，按令牌逐个列出
+        tools.append({"text": token.text or instance.text, "url": token.url, "instance": instance})
+    for instance in registry.list_instances():
+        if instance.instance_id in seen or instance.warm or (user not in instance.users and instance.user != user):
+            continue
+        seen.add(instance.instance_id)
+        tools.append({"text": instance.text, "url": get_app_url(instance), "instance": instance})
+    return tools
+
+
+def close_tool(instance, user):
+    """
+    关闭工具：用户独占的实例直接终止；共享实例只移除该用户，最后一个用户离开时才终止。
+    多页面共享服务不由用户关闭。
+
+    返回:
+        bool: 是否终止了子进程
+    """
+    if instance.app_path == MULTIPAGE_ENTRY:
+        return False
+    return registry.release_user(instance.instance_id, user) is not None
+
+
+# ====== 启动后台服务：反向代理、子应用守护线程与预热池，均为幂等操作 ====================================
+def start_background_services():
+    if PROXY_ENABLED:
+        ensure_proxy_started(registry.resolve_upstream)
+    ensure_supervisor_started(registry, get_proxy)
+    if LAUNCH_MODE == "warm":
+        ensure_warm_pool_started(registry, spawn_warm_instance)
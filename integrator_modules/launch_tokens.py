@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+
+# 同一会话对同一工具的重复点击在该时间窗口（秒）内视为同一次启动
+DEDUP_WINDOW_SECONDS = float(os.getenv("APP_LAUNCH_DEDUP_SECONDS", "10"))
+# 重复点击等待正在进行的启动完成的最长时间（秒），应覆盖排队与健康检查的耗时
+PENDING_WAIT_SECONDS = float(os.getenv("APP_LAUNCH_PENDING_WAIT", "300"))
+# 已完成的令牌保留时长（秒），供"我的工具"面板找回本会话打开过的工具
+TOKEN_TTL_SECONDS = float(os.getenv("APP_LAUNCH_TOKEN_TTL", str(12 * 3600)))
+
+
+class LaunchToken:
+    """
+    一次启动请求：同一会话同一工具在去重窗口内的重复点击共享同一个令牌，
+    等待同一个启动结果，而不是各自再启动一个子进程。
+    """
+
+    def __init__(self, session_id, tool, text=""):
+        self.session_id = session_id
+        self.tool = tool
+        self.text = text
+        self.created_at = time.time()
+        self.finished_at = None
+        self.instance_id = None
+        self.url = None
+        self.error = None
+        self.opened = False  # 访问地址是否已在浏览器中打开（rerun 打断时可能尚未打开）
+        self._done = threading.Event()
+
+    @property
+    def pending(self):
+        return not self._done.is_set()
+
+    def resolve(self, instance_id, url):
+        self.instance_id = instance_id
+        self.url = url
+        self.finished_at = time.time()
+        self._done.set()
+
+    def fail(self, error):
+        self.error = error
+        self.finished_at = time.time()
+        self._done.set()
+
+    def wait(self, timeout=PENDING_WAIT_SECONDS):
+        """
+        等待启动完成。
+
+        返回:
+            str: 访问地址
+
+        异常:
+            TimeoutError: 超时仍未完成
+            RuntimeError: 启动失败
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"❌ 等待 {self.text or self.tool} 启动超过 {timeout:.0f} 秒")
+        if self.error is not None:
+            raise RuntimeError(self.error)
+        return self.url
+
+    def mark_opened(self):
+        self.opened = True
+
+
+class LaunchTokens:
+    """
+    按 (会话ID, 工具) 索引的启动令牌表，进程内所有会话共享。
+    去重窗口内的重复请求返回已有令牌（启动中或刚完成）；失败的令牌不复用，下次点击重新启动。
+    """
+
+    def __init__(self, window=DEDUP_WINDOW_SECONDS, ttl=TOKEN_TTL_SECONDS):
+        self.window = window
+        self.ttl = ttl
+        self.tokens = {}  # (会话ID, 工具) -> LaunchToken
+        self.issued_total = 0
+        self.deduplicated_total = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, session_id, tool, text=""):
+        """
+        获取启动令牌。
+
+        返回:
+            Tuple[LaunchToken, bool]: (令牌, 是否为新令牌)；新令牌由调用方负责启动并 resolve/fail
+        """
+        now = time.time()
+        with self._lock:
+            self._prune_locked(now)
+            token = self.tokens.get((session_id, tool))
+            if token is not None and (token.pending or (
+                    token.error is None and now - token.finished_at < self.window)):
+                self.deduplicated_total += 1
+                return token, False
+            token = LaunchToken(session_id, tool, text)
+            self.tokens[(session_id, tool)] = token
+            self.issued_total += 1
+            return token, True
+
+    def _prune_locked(self, now):
+        for key, token in list(self.tokens.items()):
+            if not token.pending and now - token.finished_at > self.ttl:
+                del self.tokens[key]
+
+    def session_tokens(self, session_id):
+        """本会话已成功启动的工具令牌，最近的在前"""
+        with self._lock:
+            tokens = [token for (sid, _), token in self.tokens.items()
+                      if sid == session_id and not token.pending and token.error is None]
+        return sorted(tokens, key=lambda token: token.finished_at, reverse=True)
+
+    def stats(self):
+        with self._lock:
+            pending = sum(1 for token in self.tokens.values() if token.pending)
+            return {"tokens": len(self.tokens), "pending": pending, "issued_total": self.issued_total,
+                    "deduplicated_total": self.deduplicated_total, "window_seconds": self.window}
+
+
+# 模块级单例，集成器所有会话共享
+launch_tokens = LaunchTokens()
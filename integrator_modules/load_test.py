@@ -0,0 +1,473 @@
+# **********************************************************************************************
+# 集成器压力测试：用 Streamlit 的 AppTest 无界面地运行 integrator2025.py，模拟 N 个并发用户
+# 登录、切换导航栏、启动子应用，统计各操作的延迟分位数、子应用启动耗时、跨会话的实例复用、
+# 启动排队、端口池耗尽次数和主机内存。子应用均在本机启动，全程不需要浏览器和外网，可在 CI 环境中运行：
+#
+#     python -m integrator_modules.load_test --users 20 --rounds 5 --json load_test_report.json
+#
+# 所有模拟用户在同一进程中运行，共用一个集成器：同一个实例注册表、启动队列和端口池（按部署配置的端口区间）。
+# 每个模拟用户一个线程、一个 AppTest 会话。AppTest 每次运行都会替换进程级的 Runtime 单例，脚本运行因此串行执行
+# （登录、切换导航栏的耗时只计脚本运行本身，不含排队等待）；启动子应用则在各用户线程中并发调用"启动"按钮背后的
+# launch_service.launch_tool_once，随后再经界面点击同一按钮，验证界面路径命中同一次启动。
+#
+# 集成器的部署参数（APP_MAX_CONCURRENT_LAUNCHES、APP_SHARE_SCOPE、APP_PORT_MIN/MAX 等）照常通过环境变量配置；
+# 未指定 APP_REGISTRY_DB 时注册表文件放在临时目录，不影响正在运行的集成器。
+# **********************************************************************************************
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INTEGRATOR_SCRIPT = "integrator2025.py"
+RADIO_ITEMS = ["平台简介", "地质分析", "工艺设计", "智能采气", "数据资产", "相关工具", "相关链接", "我的工具"]
+APP_RADIO_ITEMS = ["地质分析", "工艺设计", "智能采气", "数据资产", "相关链接"]
+
+
+def percentile(values, q):
+    """线性插值的分位数，q 取 0~100"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    pos = (len(values) - 1) * q / 100
+    low = int(pos)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (pos - low)
+
+
+def summarize(values):
+    return {
+        "count": len(values),
+        "p50": round(percentile(values, 50), 3),
+        "p90": round(percentile(values, 90), 3),
+        "p99": round(percentile(values, 99), 3),
+        "max": round(max(values), 3) if values else 0.0,
+    }
+
+
+def read_meminfo():
+    """主机内存（MB）：MemTotal、MemAvailable"""
+    info = {}
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                key, value = line.split(":", 1)
+                if key in ("MemTotal", "MemAvailable"):
+                    info[key] = int(value.split()[0]) / 1024
+    except OSError:
+        pass
+    return info
+
+
+class LoadTestResult:
+    """所有模拟用户共用的结果收集器"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)  # 操作 -> 耗时列表（秒）
+        self.errors = defaultdict(int)  # 错误类别 -> 次数
+        self.error_samples = []
+        self._lock = threading.Lock()
+
+    def record(self, action, seconds):
+        with self._lock:
+            self.latencies[action].append(seconds)
+
+    def error(self, kind, message):
+        with self._lock:
+            self.errors[kind] += 1
+            if len(self.error_samples) < 20:
+                self.error_samples.append(f"[{kind}] {message}")
+
+
+class LaunchTracker:
+    """
+    按实例ID记录每次启动得到的实例：首次出现计为新实例，之后计为复用，并区分复用的是本会话还是其他会话启动的实例。
+    """
+
+    def __init__(self):
+        self.first_session = {}  # instance_id -> 首次得到该实例的模拟用户序号
+        self.reused_own = 0
+        self.reused_other = 0
+        self._lock = threading.Lock()
+
+    def record(self, instance_id, session_index):
+        with self._lock:
+            first = self.first_session.get(instance_id)
+            if first is None:
+                self.first_session[instance_id] = session_index
+            elif first == session_index:
+                self.reused_own += 1
+            else:
+                self.reused_other += 1
+
+    def stats(self):
+        with self._lock:
+            return {"instances": len(self.first_session), "reused_own": self.reused_own,
+                    "reused_other": self.reused_other}
+
+
+def classify_error(message):
+    if "端口" in message:
+        return "port_exhausted"
+    if "上限" in message or "排队" in message:
+        return "launch_rejected"
+    if "超时" in message or "Timeout" in message:
+        return "ready_timeout"
+    return "launch_failed"
+
+
+def list_app_processes(root_pid):
+    """
+    root_pid 的所有后代进程中的 Streamlit 子应用（命令行含 --server.port），依据 /proc 中的父进程号。
+    非 Linux 环境返回空列表。
+    """
+    children = defaultdict(list)
+    try:
+        pids = [int(name) for name in os.listdir("/proc") if name.isdigit()]
+    except OSError:
+        return []
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children[ppid].append(pid)
+    apps, stack = [], list(children[root_pid])
+    while stack:
+        pid = stack.pop()
+        stack.extend(children[pid])
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                if b"--server.port" in f.read().split(b"\0"):
+                    apps.append(pid)
+        except OSError:
+            continue
+    return apps
+
+
+class HostMonitor:
+    """
+    后台采样线程：记录本进程（即被测集成器）启动的子应用进程数、子进程 RSS 合计与主机可用内存。
+    """
+
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self.peak_instances = 0
+        self.peak_child_rss_mb = 0.0
+        self.min_available_mb = None
+        self.mem_total_mb = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample(self):
+        from integrator_modules.app_supervisor import read_proc_stats
+
+        apps = list_app_processes(os.getpid())
+        self.peak_instances = max(self.peak_instances, len(apps))
+        rss_total = 0
+        for pid in apps:
+            stats = read_proc_stats(pid)
+            if stats is not None:
+                rss_total += stats[0]
+        self.peak_child_rss_mb = max(self.peak_child_rss_mb, rss_total / 1024 / 1024)
+        meminfo = read_meminfo()
+        if "MemAvailable" in meminfo:
+            self.mem_total_mb = meminfo["MemTotal"]
+            available = meminfo["MemAvailable"]
+            self.min_available_mb = available if self.min_available_mb is None else min(self.min_available_mb, available)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name="load-test-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.sample()
+
+
+class SpawnTimeMonitor:
+    """采样线程：记录注册表中各实例的启动就绪耗时（实例可能中途被回收，因此持续采样）"""
+
+    def __init__(self, registry, interval=0.5):
+        self.registry = registry
+        self.interval = interval
+        self.spawn_times = {}  # instance_id -> 启动就绪耗时
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample(self):
+        for instance in self.registry.list_instances():
+            if instance.ready_latency is not None:
+                self.spawn_times.setdefault(instance.instance_id, instance.ready_latency)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name="load-test-spawn-times", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.sample()
+
+
+class SimulatedUser:
+    """
+    一个模拟用户：自己的线程与 AppTest 会话，依次登录、随机切换导航栏并启动可见的本地子应用。
+    脚本运行经 ui_lock 串行执行；启动子应用在本线程中直接调用集成器的启动服务，与其他用户并发。
+    """
+
+    def __init__(self, index, user, password, result, launches, links, ui_lock, rounds, launch_prob, seed, timeout):
+        self.index = index
+        self.user = user
+        self.password = password
+        self.result = result
+        self.launches = launches
+        self.links = links  # 应用名称 -> 脚本路径
+        self.ui_lock = ui_lock
+        self.rounds = rounds
+        self.launch_prob = launch_prob
+        self.rng = random.Random(seed + index)
+        self.timeout = timeout
+        self.session_id = f"load-test-{index}"  # 与界面中的启动令牌共用同一个会话ID
+        self.at = None
+
+    def _run_script(self, action):
+        """运行一次脚本，记录运行耗时（不含等待 ui_lock 的时间）"""
+        with self.ui_lock:
+            start = time.perf_counter()
+            try:
+                self.at.run()
+            except Exception as e:
+                self.result.error("script_exception", f"{action}: {e}")
+                return False
+            self.result.record(action, time.perf_counter() - start)
+            exceptions = [element.message for element in self.at.exception]
+        for message in exceptions:
+            self.result.error("script_exception", f"{action}: {message}")
+        return True
+
+    def login(self):
+        from streamlit.testing.v1 import AppTest
+
+        self.at = AppTest.from_file(INTEGRATOR_SCRIPT, default_timeout=self.timeout)
+        self.at.session_state["launch_session_id"] = self.session_id
+        if not self._run_script("login_page"):
+            return False
+        self.at.selectbox(key="login_user").set_value(self.user)
+        self.at.text_input(key="login_password").input(self.password)
+        submit = next(button for button in self.at.button if button.label == "登录")
+        submit.click()
+        if not self._run_script("login"):
+            return False
+        if not ("logged_in" in self.at.session_state and self.at.session_state["logged_in"]):
+            self.result.error("login_failed", self.user)
+            return False
+        return True
+
+    def launch_candidates(self, radio_item):
+        """当前导航项下可点击的本地子应用启动按钮"""
+        if radio_item not in APP_RADIO_ITEMS:
+            return []
+        return [button for button in self.at.button
+                if button.key and button.key.startswith("icon_button_") and button.key[len("icon_button_"):] in self.links]
+
+    def launch(self, button):
+        from integrator_modules.launch_service import launch_tool_once
+
+        text = button.key[len("icon_button_"):]
+        start = time.perf_counter()
+        try:
+            token = launch_tool_once(self.session_id, self.links[text], text=text, user=self.user,
+                                     password=self.password)
+        except Exception as e:
+            self.result.error(classify_error(str(e)), f"{text}: {e}")
+            return
+        self.result.record("launch", time.perf_counter() - start)
+        self.launches.record(token.instance_id, self.index)
+        # 再经界面点击同一按钮：应命中上面的启动令牌，不再启动新进程
+        button.click()
+        if not self._run_script("launch_click"):
+            return
+        for element in self.at.error:
+            message = str(element.value)
+            self.result.error(classify_error(message), f"{text}: {message}")
+
+    def run(self):
+        try:
+            if not self.login():
+                return
+            for _ in range(self.rounds):
+                radio_item = self.rng.choice(RADIO_ITEMS)
+                self.at.radio[0].set_value(radio_item)
+                if not self._run_script("switch_radio"):
+                    continue
+                candidates = self.launch_candidates(radio_item)
+                if candidates and self.rng.random() < self.launch_prob:
+                    self.launch(self.rng.choice(candidates))
+        except Exception as e:
+            self.result.error("user_thread", f"用户 {self.index}: {e}")
+
+
+def run_load_test(n_users, rounds, launch_prob, ramp_seconds, seed, timeout, keep_apps=False):
+    """
+    运行压力测试并返回报告。所有模拟用户共用本进程中的一个集成器（见文件开头的说明）。
+
+    参数:
+        n_users (int): 并发模拟用户数，循环使用用户表中的账号
+        rounds (int): 每个用户切换导航栏的次数
+        launch_prob (float): 每次切换到含本地子应用的导航项后点击"启动"的概率
+        ramp_seconds (float): 相邻用户开始登录的间隔
+        seed (int): 随机种子，保证同样参数下各用户的操作序列可复现
+        timeout (float): 单次脚本运行（含等待子应用就绪）的超时秒数
+        keep_apps (bool): 结束后保留本次启动的子应用进程
+
+    返回:
+        dict: 报告
+    """
+    os.chdir(ROOT_DIR)
+    # 须在导入注册表模块之前设置：模块导入时即按该文件恢复实例
+    os.environ.setdefault("APP_REGISTRY_DB",
+                          os.path.join(tempfile.mkdtemp(prefix="load_test_registry_"), "app_registry.db"))
+    from integrator_modules.app_catalogue import get_app_catalogue, get_user_table
+    from integrator_modules.app_registry import registry
+    from integrator_modules.launch_scheduler import launch_scheduler
+    from integrator_modules.port_leases import port_leases
+    from integrator_modules.warm_pool import get_warm_pool
+
+    user_table = get_user_table()
+    accounts = [(user, user_table.passwords[user]) for user in user_table.users]
+    if not accounts:
+        raise RuntimeError("用户表为空，无法模拟登录")
+    links = {entry.Text: entry.Link for entry in get_app_catalogue().entries
+             if not entry.Link.startswith(("http://", "https://"))}
+
+    result = LoadTestResult()
+    launches = LaunchTracker()
+    ui_lock = threading.Lock()
+    host_monitor = HostMonitor()
+    spawn_monitor = SpawnTimeMonitor(registry)
+    memory_before = read_meminfo()
+    host_monitor.start()
+    spawn_monitor.start()
+    started_at = time.perf_counter()
+    threads = []
+    try:
+        for i in range(n_users):
+            user, password = accounts[i % len(accounts)]
+            simulated = SimulatedUser(i, user, password, result, launches, links, ui_lock, rounds, launch_prob, seed,
+                                      timeout)
+            thread = threading.Thread(target=simulated.run, name=f"load-test-user-{i}", daemon=True)
+            thread.start()
+            threads.append(thread)
+            if ramp_seconds > 0:
+                time.sleep(ramp_seconds)
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started_at
+    finally:
+        spawn_monitor.stop()
+        host_monitor.stop()
+        port_pool, launch_queue = port_leases.metrics(), launch_scheduler.stats()
+        if not keep_apps:
+            warm_pool = get_warm_pool()
+            if warm_pool is not None:
+                warm_pool.stop()
+            for instance in registry.list_instances():
+                registry.terminate(instance.instance_id)
+
+    report = {
+        "users": n_users,
+        "rounds": rounds,
+        "elapsed_seconds": round(elapsed, 2),
+        "latency_seconds": {action: summarize(values) for action, values in sorted(result.latencies.items())},
+        "spawn_seconds": summarize(list(spawn_monitor.spawn_times.values())),
+        "errors": dict(result.errors),
+        "error_samples": result.error_samples[:20],
+        "instances_peak": host_monitor.peak_instances,
+        "instance_reuse": launches.stats(),
+        "port_pool": {
+            "pool_size": port_pool["pool_size"],
+            "peak_in_use": port_pool["peak_in_use"],
+            "acquire_total": port_pool["acquire_total"],
+            "exhausted_total": port_pool["exhausted_total"],
+        },
+        "launch_queue": {key: launch_queue[key] for key in ("并发上限", "已放行", "已拒绝", "平均排队(秒)", "最长排队(秒)")},
+        "memory_mb": {
+            "host_total": round(memory_before.get("MemTotal", 0), 1),
+            "host_available_before": round(memory_before.get("MemAvailable", 0), 1),
+            "host_available_min": round(host_monitor.min_available_mb or 0, 1),
+            "child_rss_peak": round(host_monitor.peak_child_rss_mb, 1),
+        },
+    }
+    return report
+
+
+def format_report(report):
+    lines = [
+        f"模拟用户 {report['users']} 个，每人 {report['rounds']} 轮，总耗时 {report['elapsed_seconds']} 秒",
+        "",
+        f"{'操作':<14}{'次数':>6}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}",
+    ]
+    rows = dict(report["latency_seconds"], spawn=report["spawn_seconds"])
+    for action, stats in rows.items():
+        lines.append(f"{action:<14}{stats['count']:>6}{stats['p50']:>9}{stats['p90']:>9}{stats['p99']:>9}{stats['max']:>9}")
+    lines.append("")
+    lines.append(f"错误: {report['errors'] or '无'}")
+    for sample in report["error_samples"]:
+        lines.append(f"  {sample}")
+    pool = report["port_pool"]
+    lines.append(f"端口池: 共 {pool['pool_size']} 个，峰值占用 {pool['peak_in_use']}，"
+                 f"分配 {pool['acquire_total']} 次，耗尽 {pool['exhausted_total']} 次")
+    reuse = report["instance_reuse"]
+    lines.append(f"子应用实例: 启动得到 {reuse['instances']} 个不同实例，复用本会话实例 {reuse['reused_own']} 次，"
+                 f"复用其他会话实例 {reuse['reused_other']} 次，进程数峰值 {report['instances_peak']}")
+    lines.append(f"启动队列: {report['launch_queue']}")
+    memory = report["memory_mb"]
+    lines.append(
+        f"内存(MB): 主机共 {memory['host_total']}，测试前可用 {memory['host_available_before']}，"
+        f"最低可用 {memory['host_available_min']}，子进程 RSS 峰值 {memory['child_rss_peak']}"
+    )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="集成器并发用户压力测试（离线运行）")
+    parser.add_argument("--users", type=int, default=10, help="并发模拟用户数")
+    parser.add_argument("--rounds", type=int, default=5, help="每个用户切换导航栏的次数")
+    parser.add_argument("--launch-prob", type=float, default=0.5, help="切换到含子应用的导航项后点击启动的概率")
+    parser.add_argument("--ramp", type=float, default=0.2, help="相邻用户开始登录的间隔（秒）")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--timeout", type=float, default=120, help="单次脚本运行的超时（秒）")
+    parser.add_argument("--keep-apps", action="store_true", help="结束后保留启动的子应用进程")
+    parser.add_argument("--json", help="另存 JSON 格式报告的路径")
+    args = parser.parse_args()
+    json_path = os.path.abspath(args.json) if args.json else None  # run_load_test 会切换到仓库根目录
+
+    report = run_load_test(args.users, args.rounds, args.launch_prob, args.ramp, args.seed, args.timeout,
+                           keep_apps=args.keep_apps)
+    print(format_report(report))
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import hashlib
+import os
+
+# 部署模式："process" 每个工具一个独立 Streamlit 进程；"multipage" 工具作为页面挂在同一个常驻 Streamlit 服务下
+DEPLOY_MODE = os.getenv("APP_DEPLOY_MODE", "process")
+# 多页面共享服务的入口脚本
+MULTIPAGE_ENTRY = "apps_server.py"
+# 仍需进程隔离的工具：导入与其他工具同名的顶层模块（如 EUR_APP 的 utils），不能与其他页面同进程运行
+ISOLATED_APPS = [
+    path.strip() for path in os.getenv(
+        "APP_ISOLATED_APPS",
+        "rule_reasoning/EUR_APP/eur_app.py",
+    ).split(",") if path.strip()
+]
+# 不在 Excel 配置中、由"相关工具"按钮启动的工具
+EXTRA_TOOLS = [
+    ("数据标注工具/data_prepare.py", "油田初始数据整理"),
+    ("数据标注工具/data_processing.py", "油田数据自动标注"),
+]
+
+
+def use_multipage(app_path):
+    """该工具是否以共享服务中的页面方式打开"""
+    return DEPLOY_MODE == "multipage" and app_path not in ISOLATED_APPS and os.path.exists(app_path)
+
+
+def page_url_path(app_path):
+    """
+    工具页面在共享服务中的 URL 路径。由 app 路径哈希得到，集成器与共享服务两边计算结果一致，且只含 ASCII 字符。
+    """
+    return "app_" + hashlib.md5(app_path.encode("utf-8")).hexdigest()[:10]
+
+
+def collect_page_specs(catalogue_rows):
+    """
+    从应用目录中挑出可作为页面挂载的本地工具。
+
+    参数:
+        catalogue_rows (Iterable[Tuple[str, str]]): (Link, Text) 列表
+
+    返回:
+        List[Tuple[str, str, str]]: (app 路径, 页面标题, URL 路径)，按 app 路径去重
+    """
+    specs, seen = [], set()
+    for link, text in list(catalogue_rows) + EXTRA_TOOLS:
+        link = str(link)
+        if link.startswith(("http://", "https://")) or link in seen:
+            continue
+        if link in ISOLATED_APPS or not os.path.exists(link):
+            continue
+        seen.add(link)
+        specs.append((link, str(text), page_url_path(link)))
+    return specs
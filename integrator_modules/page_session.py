@@ -0,0 +1,93 @@
+import os
+import secrets
+import sqlite3
+import time
+
+# 多页面共享服务的会话身份：共享服务以 user=None 启动，没有进程级的 APP_USER/APP_PASSWORD。
+# 集成器打开页面前登记票据 (用户, 密码)，页面地址带 ?ticket=<票据>；共享服务在会话加载时兑换票据，
+# 把用户与密码存入该会话的 st.session_state。独立进程模式下页面仍从环境变量读取。
+# 票据存放在集成器本机的 SQLite 文件中，因此只对在集成器本机运行的共享服务有效。
+
+TICKET_PARAM = "ticket"
+TICKET_DB_PATH = os.getenv(
+    "APP_PAGE_TICKET_DB",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database", "page_tickets.db"),
+)
+# 票据有效期（秒）：有效期内同一地址可在新标签页中重复打开
+TICKET_TTL_SECONDS = float(os.getenv("APP_PAGE_TICKET_TTL", str(8 * 3600)))
+# st.session_state 中的键，与独立进程模式的环境变量同名
+SESSION_USER_KEY = "APP_USER"
+SESSION_PASSWORD_KEY = "APP_PASSWORD"
+
+
+def _connect(db_path=TICKET_DB_PATH):
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=5)
+    conn.execute("CREATE TABLE IF NOT EXISTS page_tickets "
+                 "(ticket TEXT PRIMARY KEY, user TEXT NOT NULL, password TEXT, expires_at REAL NOT NULL)")
+    return conn
+
+
+def issue_ticket(user, password=None, ttl=TICKET_TTL_SECONDS, db_path=TICKET_DB_PATH):
+    """
+    登记一个页面票据，顺带清理已过期的票据。
+
+    返回:
+        str: 票据
+    """
+    ticket = secrets.token_urlsafe(16)
+    conn = _connect(db_path)
+    try:
+        with conn:
+            conn.execute("DELETE FROM page_tickets WHERE expires_at < ?", (time.time(),))
+            conn.execute("INSERT INTO page_tickets VALUES (?, ?, ?, ?)", (ticket, user, password, time.time() + ttl))
+    finally:
+        conn.close()
+    return ticket
+
+
+def resolve_ticket(ticket, db_path=TICKET_DB_PATH):
+    """
+    返回:
+        Tuple[str, str] or None: (用户, 密码)，票据不存在或已过期时为 None
+    """
+    if not os.path.exists(db_path):
+        return None
+    conn = _connect(db_path)
+    try:
+        row = conn.execute("SELECT user, password FROM page_tickets WHERE ticket = ? AND expires_at >= ?",
+                           (ticket, time.time())).fetchone()
+    finally:
+        conn.close()
+    return tuple(row) if row else None
+
+
+def bind_session():
+    """共享服务每次运行脚本时调用：地址中带有票据时兑换为当前会话的用户与密码，并从地址栏移除票据"""
+    import streamlit as st
+
+    ticket = st.query_params.get(TICKET_PARAM)
+    if not ticket:
+        return
+    identity = resolve_ticket(ticket)
+    if identity is not None:
+        st.session_state[SESSION_USER_KEY], st.session_state[SESSION_PASSWORD_KEY] = identity
+    del st.query_params[TICKET_PARAM]
+
+
+def _session_value(key):
+    try:
+        import streamlit as st
+
+        return st.session_state.get(key)
+    except Exception:  # 不在 Streamlit 脚本运行上下文中
+        return None
+
+
+def current_user():
+    """当前会话的登录用户：多页面共享服务中取自票据，独立进程中取自环境变量 APP_USER"""
+    return _session_value(SESSION_USER_KEY) or os.getenv("APP_USER")
+
+
+def current_password():
+    return _session_value(SESSION_PASSWORD_KEY) or os.getenv("APP_PASSWORD")
@@ -0,0 +1,162 @@
+import os
+import socket
+import threading
+import time
+from collections import deque
+
+from integrator_modules.app_readiness import READY_TIMEOUT
+
+# 子应用端口池范围，需与 docker-compose.yml 中对外发布的端口区间保持一致
+PORT_MIN = int(os.getenv("APP_PORT_MIN", "8502"))
+PORT_MAX = int(os.getenv("APP_PORT_MAX", "8599"))
+# 预留后子进程迟迟未确认监听时，租约自动失效的时间（秒）
+LEASE_TIMEOUT = float(os.getenv("APP_PORT_LEASE_TIMEOUT", str(READY_TIMEOUT + 10)))
+
+
+def port_bindable(port):
+    """端口当前是否未被其他进程占用"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        try:
+            s.bind(("", port))
+            return True
+        except OSError:
+            return False
+
+
+class PortLease:
+    """一个端口租约：reserved（已预留，子进程尚未监听）或 active（子进程已确认监听）"""
+
+    def __init__(self, port, pid=None):
+        self.port = port
+        self.pid = pid
+        self.state = "reserved"
+        self.reserved_at = time.time()
+
+
+class PortLeaseManager:
+    """
+    端口租约管理器：从空闲队列中 O(1) 取出端口并预留，直到子进程确认监听；
+    子进程退出或预留超时后回收端口，同时统计端口池耗尽等指标。
+    """
+
+    def __init__(self, min_port=PORT_MIN, max_port=PORT_MAX, lease_timeout=LEASE_TIMEOUT):
+        self.min_port = min_port
+        self.max_port = max_port
+        self.lease_timeout = lease_timeout
+        self.free = deque(range(min_port, max_port + 1))
+        self.leases = {}  # port -> PortLease
+        self.acquire_total = 0
+        self.exhausted_total = 0
+        self.peak_in_use = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, is_pid_alive=None):
+        """
+        预留一个空闲端口。空闲队列为空时先尝试回收失效租约；被外部进程占用的端口移到队尾跳过。
+
+        返回:
+            int: 预留的端口
+
+        异常:
+            RuntimeError: 端口池耗尽
+        """
+        with self._lock:
+            if not self.free:
+                self._reclaim_locked(is_pid_alive)
+            for _ in range(len(self.free)):
+                port = self.free.popleft()
+                if port_bindable(port):
+                    self.leases[port] = PortLease(port)
+                    self.acquire_total += 1
+                    self.peak_in_use = max(self.peak_in_use, len(self.leases))
+                    return port
+                self.free.append(port)
+            self.exhausted_total += 1
+        raise RuntimeError(
+            f"❌ 没有找到可用端口！请检查 {self.min_port}-{self.max_port} 区间是否已被占用。"
+        )
+
+    def attach(self, port, pid):
+        """子进程启动后把 pid 绑定到租约上，用于进程退出后回收"""
+        with self._lock:
+            lease = self.leases.get(port)
+            if lease is not None:
+                lease.pid = pid
+
+    def confirm(self, port):
+        """子进程已确认监听端口，租约转为 active，不再受预留超时约束"""
+        with self._lock:
+            lease = self.leases.get(port)
+            if lease is not None:
+                lease.state = "active"
+
+    def adopt(self, port, pid):
+        """集成器重启后重新接管仍在运行的子进程所占端口"""
+        with self._lock:
+            if port in self.leases:
+                return
+            try:
+                self.free.remove(port)
+            except ValueError:
+                pass
+            lease = PortLease(port, pid)
+            lease.state = "active"
+            self.leases[port] = lease
+            self.peak_in_use = max(self.peak_in_use, len(self.leases))
+
+    def release(self, port, pid=None):
+        """
+        释放端口租约。给出 pid 时只在租约仍属于该进程时释放：租约可能已被回收并分配给新启动的子进程，
+        此时按旧实例释放会让同一端口被分配两次。
+        """
+        with self._lock:
+            lease = self.leases.get(port)
+            if pid is not None and (lease is None or lease.pid != pid):
+                return
+            self._release_locked(port)
+
+    def _release_locked(self, port):
+        if self.leases.pop(port, None) is not None and self.min_port <= port <= self.max_port:
+            self.free.append(port)
+
+    def _reclaim_locked(self, is_pid_alive):
+        now = time.time()
+        stale = [
+            lease.port for lease in self.leases.values()
+            if (lease.pid is not None and is_pid_alive is not None and not is_pid_alive(lease.pid))
+            or (lease.state == "reserved" and now - lease.reserved_at > self.lease_timeout)
+        ]
+        for port in stale:
+            self._release_locked(port)
+        return stale
+
+    def reclaim(self, is_pid_alive):
+        """
+        回收子进程已退出或预留超时的租约。
+
+        参数:
+            is_pid_alive (Callable[[int], bool]): pid 存活判断
+
+        返回:
+            List[int]: 被回收的端口
+        """
+        with self._lock:
+            return self._reclaim_locked(is_pid_alive)
+
+    def metrics(self):
+        """端口池使用指标"""
+        with self._lock:
+            reserved = sum(1 for lease in self.leases.values() if lease.state == "reserved")
+            return {
+                "pool_size": self.max_port - self.min_port + 1,
+                "free": len(self.free),
+                "reserved": reserved,
+                "active": len(self.leases) - reserved,
+                "peak_in_use": self.peak_in_use,
+                "acquire_total": self.acquire_total,
+                "exhausted_total": self.exhausted_total,
+            }
+
+
+# 模块级单例，供集成器所有会话共享
+port_leases = PortLeaseManager()
@@ -0,0 +1,96 @@
+import os
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# 工具页面共用的缓存资源：多页面共享服务中同一进程只加载一次，所有会话、所有页面共享；
+# 独立进程模式下同样可用，缓存范围为该工具进程（子应用启动时 PYTHONPATH 已包含代码目录，见 app_launcher.py）。
+# 表格类资源用 st.cache_data（每次返回副本，调用方修改不影响其他会话），连接等不可复制的对象用 st.cache_resource。
+
+# 缓存的表格版本数（按 路径+修改时间 区分），超过后淘汰最久未用的
+MAX_CACHED_TABLES = int(os.getenv("APP_SHARED_MAX_TABLES", "16"))
+# 数据库查询结果的缓存时间（秒）与条数
+QUERY_TTL_SECONDS = float(os.getenv("APP_SHARED_QUERY_TTL", "60"))
+MAX_CACHED_QUERIES = int(os.getenv("APP_SHARED_MAX_QUERIES", "256"))
+
+# 同一连接上的查询串行执行
+_sql_lock = threading.Lock()
+
+
+@st.cache_resource(show_spinner=False)
+def get_sqlite_connection(db_path):
+    """
+    共享的只读 SQLite 连接（可跨线程使用，查询经 read_sql 串行执行）。
+
+    参数:
+        db_path (str): 数据库文件的绝对路径
+    """
+    return sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+
+
+@st.cache_data(show_spinner=False, ttl=QUERY_TTL_SECONDS, max_entries=MAX_CACHED_QUERIES)
+def _read_sql(db_path, mtime, query, params):
+    conn = get_sqlite_connection(db_path)
+    with _sql_lock:
+        return pd.read_sql_query(query, conn, params=params)
+
+
+def read_sql(db_path, query, params=()):
+    """
+    在共享的只读连接上执行查询。
+
+    参数:
+        db_path (str): 数据库文件路径
+        query (str): SQL 语句
+        params (Iterable): 语句参数
+
+    返回:
+        pd.DataFrame: 查询结果（副本），按 (数据库, 修改时间, 语句, 参数) 缓存 QUERY_TTL_SECONDS 秒
+    """
+    db_path = os.path.abspath(db_path)
+    return _read_sql(db_path, os.path.getmtime(db_path), query, tuple(params))
+
+
+@st.cache_data(show_spinner=False, max_entries=MAX_CACHED_TABLES)
+def _load_csv_table(csv_path, mtime):
+    return pd.read_csv(csv_path)
+
+
+def load_pvt_table(csv_path):
+    """
+    读取气体 PVT 性质表（CSV）。文件修改后自动重新读取，旧版本按 MAX_CACHED_TABLES 淘汰。
+
+    返回:
+        pd.DataFrame: 表格副本
+    """
+    csv_path = os.path.abspath(csv_path)
+    return _load_csv_table(csv_path, os.path.getmtime(csv_path))
+
+
+@st.cache_data(show_spinner=False)
+def arps_type_curves(b_values, t_D_min_exp=-3, t_D_max_exp=3, n_points=500):
+    """
+    Fetkovich-Arps 无量纲典型曲线库，各 b 值的曲线只计算一次。
+
+    参数:
+        b_values (Tuple[float]): 递减指数
+        t_D_min_exp, t_D_max_exp (float): 无量纲时间范围 10^min ~ 10^max
+        n_points (int): 采样点数
+
+    返回:
+        Tuple[np.ndarray, Dict[float, Tuple[np.ndarray, np.ndarray]]]: (t_D, {b: (无量纲产量 q_D, 无量纲累计产量 N_pD)})
+    """
+    t_D = np.logspace(t_D_min_exp, t_D_max_exp, n_points)
+    curves = {}
+    for b in b_values:
+        if b == 1:
+            q_D = 1.0 / (1 + t_D)
+            N_pD = np.log(1 + t_D)
+        else:
+            q_D = 1.0 / ((1 + b * t_D) ** (1 / b))
+            N_pD = (1 / (1 - b)) * (1 - (1 + b * t_D) ** ((b - 1) / b))
+        curves[b] = (q_D, N_pD)
+    return t_D, curves
@@ -0,0 +1,173 @@
+# **********************************************************************************************
+# 集成器启动耗时检查：在全新的解释器中分别计时 `import streamlit`（基线）与 `import integrator2025`，
+# 用 -X importtime 列出耗时最多的模块，并确认应延迟导入的模块（pandas、PIL、启动服务等）没有在启动时被加载。
+# 超出导入耗时预算或延迟导入被破坏时以非零状态退出，可在 CI 中运行：
+#
+#     python -m integrator_modules.startup_benchmark --repeat 5 --budget-ms 300
+#     python -m integrator_modules.startup_benchmark --first-paint   # 另外用 AppTest 计时登录页首次渲染
+# **********************************************************************************************
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INTEGRATOR_MODULE = "integrator2025"
+INTEGRATOR_SCRIPT = "integrator2025.py"
+# 在 streamlit 本身之外额外允许的导入耗时（毫秒）
+IMPORT_BUDGET_MS = float(os.getenv("APP_IMPORT_BUDGET_MS", "300"))
+# 登录页首次渲染前不应导入的模块；streamlit 自身已导入的不计
+LAZY_MODULES = [
+    "pandas",
+    "PIL",
+    "openpyxl",
+    "streamlit.components.v1",
+    "integrator_modules.launch_service",
+    "integrator_modules.app_registry",
+    "integrator_modules.app_proxy",
+    "integrator_modules.worker_pool",
+]
+
+# 子进程中执行：计时导入并输出已加载的模块列表
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+__import__({module!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def time_import(module, importtime=False):
+    """
+    在全新的解释器中导入模块。
+
+    参数:
+        module (str): 模块名
+        importtime (bool): 是否附加 -X importtime，返回的 stderr 中包含逐模块耗时
+
+    返回:
+        Tuple[float, Set[str], str]: (导入秒数, 导入后 sys.modules 中的模块, stderr)
+
+    异常:
+        RuntimeError: 导入失败
+    """
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", _PROBE.format(module=module)]
+    result = subprocess.run(cmd, cwd=ROOT_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败：\n{result.stderr[-2000:]}")
+    payload = json.loads(result.stdout.strip().splitlines()[-1])
+    return payload["seconds"], set(payload["modules"]), result.stderr
+
+
+def parse_importtime(stderr, top=15):
+    """
+    解析 -X importtime 的输出。
+
+    返回:
+        List[Tuple[str, float]]: 按累计耗时降序的 (模块, 毫秒)
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = [part.strip() for part in line[len("import time:"):].split("|")]
+        if len(parts) != 3 or not parts[1].isdigit():
+            continue  # 表头行
+        rows.append((parts[2].strip(), int(parts[1]) / 1000))
+    return sorted(rows, key=lambda item: item[1], reverse=True)[:top]
+
+
+def median(values):
+    values = sorted(values)
+    mid = len(values) // 2
+    return values[mid] if len(values) % 2 else (values[mid - 1] + values[mid]) / 2
+
+
+def time_first_paint(timeout=60):
+    """用 AppTest 在进程内运行集成器脚本一次（未登录，即登录页），返回耗时秒数"""
+    from streamlit.testing.v1 import AppTest
+
+    os.chdir(ROOT_DIR)
+    at = AppTest.from_file(INTEGRATOR_SCRIPT, default_timeout=timeout)
+    start = time.perf_counter()
+    at.run()
+    elapsed = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(f"集成器脚本运行出错：{at.exception[0].message}")
+    return elapsed
+
+
+def run_benchmark(repeat=3, budget_ms=IMPORT_BUDGET_MS, first_paint=False, top=15):
+    """
+    参数:
+        repeat (int): 每项导入计时的重复次数，取中位数
+        budget_ms (float): 集成器相对 streamlit 基线允许的额外导入耗时（毫秒）
+        first_paint (bool): 是否同时计时登录页首次渲染
+        top (int): 列出耗时最多的模块数
+
+    返回:
+        dict: 报告，"ok" 为 False 表示超出预算或有应延迟导入的模块被提前加载
+    """
+    baseline = [time_import("streamlit")[0] for _ in range(repeat)]
+    integrator = [time_import(INTEGRATOR_MODULE)[0] for _ in range(repeat)]
+    _, baseline_modules, _ = time_import("streamlit")
+    _, modules, stderr = time_import(INTEGRATOR_MODULE, importtime=True)
+
+    extra_ms = (median(integrator) - median(baseline)) * 1000
+    eager = [name for name in LAZY_MODULES if name in modules and name not in baseline_modules]
+    report = {
+        "streamlit_import_ms": round(median(baseline) * 1000, 1),
+        "integrator_import_ms": round(median(integrator) * 1000, 1),
+        "extra_ms": round(extra_ms, 1),
+        "budget_ms": budget_ms,
+        "eager_lazy_modules": eager,
+        "new_modules": len(modules - baseline_modules),
+        "top_modules_ms": parse_importtime(stderr, top),
+    }
+    if first_paint:
+        report["first_paint_ms"] = round(time_first_paint() * 1000, 1)
+    report["ok"] = extra_ms <= budget_ms and not eager
+    return report
+
+
+def format_report(report):
+    lines = [
+        f"import streamlit: {report['streamlit_import_ms']} ms",
+        f"import {INTEGRATOR_MODULE}: {report['integrator_import_ms']} ms"
+        f"（比 streamlit 多 {report['extra_ms']} ms，预算 {report['budget_ms']} ms，新增模块 {report['new_modules']} 个）",
+    ]
+    if "first_paint_ms" in report:
+        lines.append(f"登录页首次渲染: {report['first_paint_ms']} ms")
+    lines.append(f"提前加载的延迟导入模块: {', '.join(report['eager_lazy_modules']) or '无'}")
+    lines.append("")
+    lines.append("累计耗时最多的模块（-X importtime）:")
+    for name, ms in report["top_modules_ms"]:
+        lines.append(f"  {ms:>9.1f} ms  {name}")
+    lines.append("")
+    lines.append("✅ 通过" if report["ok"] else "❌ 未通过")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="集成器启动导入耗时检查")
+    parser.add_argument("--repeat", type=int, default=3, help="每项导入计时的重复次数（取中位数）")
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS, help="相对 streamlit 允许的额外导入耗时")
+    parser.add_argument("--top", type=int, default=15, help="列出耗时最多的模块数")
+    parser.add_argument("--first-paint", action="store_true", help="同时用 AppTest 计时登录页首次渲染")
+    parser.add_argument("--json", help="另存 JSON 格式报告的路径")
+    args = parser.parse_args()
+    json_path = os.path.abspath(args.json) if args.json else None
+
+    report = run_benchmark(args.repeat, args.budget_ms, args.first_paint, args.top)
+    print(format_report(report))
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    sys.exit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
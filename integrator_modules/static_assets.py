@@ -0,0 +1,164 @@
+import base64
+import glob
+import hashlib
+import io
+import json
+import os
+from functools import lru_cache
+
+# 构建产物目录：Streamlit 开启 server.enableStaticServing 后，./static 下的文件通过 /app/static/ 对外提供
+STATIC_ROOT = "static"
+ASSET_DIR = os.path.join(STATIC_ROOT, "assets")
+MANIFEST_PATH = os.path.join(ASSET_DIR, "manifest.json")
+STATIC_URL_PREFIX = "app/static/assets"
+# 内联 base64 缓存的条目数上限
+INLINE_CACHE_SIZE = int(os.getenv("APP_INLINE_ASSET_CACHE_SIZE", "128"))
+
+ICON_SIZE = (50, 50)  # 图标在集成器页面上的显示尺寸
+# (源文件 glob, 最大尺寸, 输出格式, JPEG 质量)；尺寸按显示大小的 2 倍留余量，图标除外
+ASSET_SPECS = [
+    ("integrator_config/icons/*", ICON_SIZE, "PNG", None),
+    ("integrator_config/equipement.jpg", (1920, 1080), "JPEG", 80),
+    ("integrator_config/shiyou.png", (160, 160), "PNG", None),
+    ("integrator_config/yumen.png", (600, 300), "PNG", None),
+]
+
+MIME_TYPES = {".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".gif": "image/gif",
+              ".svg": "image/svg+xml", ".webp": "image/webp"}
+
+
+def _asset_key(path):
+    """清单中的键：统一为相对工作目录的规范路径（"./a/b.png" 与 "a/b.png" 视为同一文件）"""
+    return os.path.normpath(os.path.relpath(path)).replace(os.sep, "/")
+
+
+def _render(src_path, max_size, fmt, quality):
+    from PIL import Image
+
+    with Image.open(src_path) as img:
+        if fmt == "JPEG" and img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        elif fmt == "PNG" and img.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+            img = img.convert("RGBA")
+        if max_size == ICON_SIZE:
+            img = img.resize(ICON_SIZE, Image.LANCZOS)
+        else:
+            img.thumbnail(max_size, Image.LANCZOS)
+        buffer = io.BytesIO()
+        if fmt == "JPEG":
+            img.save(buffer, "JPEG", quality=quality, optimize=True, progressive=True)
+        else:
+            img.save(buffer, "PNG", optimize=True)
+        return buffer.getvalue()
+
+
+def build_assets(specs=ASSET_SPECS, asset_dir=ASSET_DIR):
+    """
+    构建步骤：按显示尺寸缩放图标、重新压缩背景和 Logo，输出带内容指纹的文件名并写出清单。
+
+    参数:
+        specs (list): 见 ASSET_SPECS
+        asset_dir (str): 输出目录
+
+    返回:
+        dict: 源文件 -> {"file": 指纹文件名, "size": 源文件大小, "mtime_ns": 源文件修改时间}
+    """
+    os.makedirs(asset_dir, exist_ok=True)
+    manifest = {}
+    for pattern, max_size, fmt, quality in specs:
+        for src_path in sorted(glob.glob(pattern)):
+            if not os.path.isfile(src_path) or os.path.splitext(src_path)[1].lower() not in MIME_TYPES:
+                continue
+            data = _render(src_path, max_size, fmt, quality)
+            stem = os.path.splitext(os.path.basename(src_path))[0]
+            ext = ".jpg" if fmt == "JPEG" else ".png"
+            file_name = f"{stem}.{hashlib.sha1(data).hexdigest()[:10]}{ext}"
+            with open(os.path.join(asset_dir, file_name), "wb") as f:
+                f.write(data)
+            stat = os.stat(src_path)
+            manifest[_asset_key(src_path)] = {"file": file_name, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            print(f"{src_path}: {stat.st_size} -> {len(data)} bytes ({file_name})")
+    # 清理上一次构建留下、已不在清单中的文件
+    keep = {entry["file"] for entry in manifest.values()} | {os.path.basename(MANIFEST_PATH)}
+    for name in os.listdir(asset_dir):
+        if name not in keep:
+            os.remove(os.path.join(asset_dir, name))
+    with open(os.path.join(asset_dir, os.path.basename(MANIFEST_PATH)), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+@lru_cache(maxsize=1)
+def _load_manifest(mtime_ns):
+    with open(MANIFEST_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_manifest():
+    """读取构建清单（按清单文件修改时间缓存），未构建时返回空字典"""
+    try:
+        return _load_manifest(os.stat(MANIFEST_PATH).st_mtime_ns)
+    except (OSError, ValueError):
+        return {}
+
+
+@lru_cache(maxsize=INLINE_CACHE_SIZE)
+def _encode_file(abs_path, mtime_ns):
+    with open(abs_path, "rb") as f:
+        return base64.b64encode(f.read()).decode()
+
+
+def encode_base64(path):
+    """
+    文件内容的 base64 编码，按 (路径, 修改时间) 在进程内 LRU 缓存，文件修改后自动失效。
+
+    异常:
+        FileNotFoundError: 文件不存在
+    """
+    abs_path = os.path.abspath(path)
+    return _encode_file(abs_path, os.stat(abs_path).st_mtime_ns)
+
+
+def static_url(path):
+    """
+    构建产物的静态 URL。文件名带内容指纹，附加的 ?v= 参数使 Streamlit（Tornado）返回长期缓存头。
+    源文件未构建、或构建后又被修改（如挂载卷替换了图标）时返回 None。
+    """
+    entry = load_manifest().get(_asset_key(path))
+    if entry is None:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    if stat.st_size != entry["size"] or stat.st_mtime_ns != entry["mtime_ns"]:
+        return None
+    if not os.path.exists(os.path.join(ASSET_DIR, entry["file"])):
+        return None
+    version = entry["file"].rsplit(".", 2)[-2]
+    return f"{STATIC_URL_PREFIX}/{entry['file']}?v={version}"
+
+
+def image_src(path, static_serving=True):
+    """
+    图片在 HTML 中使用的 src：优先使用带指纹的静态 URL，否则回退为（缓存的）data URI。
+
+    参数:
+        path (str): 源图片路径
+        static_serving (bool): Streamlit 是否开启了 server.enableStaticServing
+
+    异常:
+        FileNotFoundError: 需要内联但文件不存在
+    """
+    if static_serving:
+        url = static_url(path)
+        if url is not None:
+            return url
+    mime = MIME_TYPES.get(os.path.splitext(path)[1].lower(), "application/octet-stream")
+    return f"data:{mime};base64,{encode_base64(path)}"
+
+
+# **********************************************************************************************
+# 构建入口：python integrator_modules/static_assets.py（Dockerfile 中在复制项目文件后执行）
+if __name__ == "__main__":
+    build_assets()
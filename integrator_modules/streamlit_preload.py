@@ -0,0 +1,58 @@
+# 预加载启动器：先导入子应用共用的重量级模块，再进入 streamlit 命令行。
+# 用法与 streamlit 命令相同：python streamlit_preload.py run <app.py> --server.port ...
+# 预热池中的实例以此启动，用户打开页面时脚本中的 import 直接命中 sys.modules，首屏渲染不再等待导入。
+# 启动过程中向 stdout 输出 "[phase] <阶段>" 标记行，集成器据此统计各启动阶段耗时（见 app_logs.py）。
+import importlib
+import os
+import sys
+
+DEFAULT_PRELOAD_MODULES = "numpy,pandas,scipy.optimize,scipy.integrate,matplotlib.pyplot,altair,openpyxl,streamlit"
+
+
+def preload(module_names):
+    loaded = []
+    for name in module_names:
+        name = name.strip()
+        if not name:
+            continue
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except Exception as e:
+            print(f"⚠️ 预加载模块 {name} 失败: {e}")
+    return loaded
+
+
+def print_phase(phase):
+    print(f"[phase] {phase}", flush=True)
+
+
+def install_first_run_marker():
+    """在第一次执行用户脚本时输出 first_script_run 标记；Streamlit 内部接口变化时静默跳过"""
+    try:
+        from streamlit.runtime.scriptrunner.script_runner import ScriptRunner
+    except ImportError:
+        return
+    original = ScriptRunner._run_script
+    fired = []
+
+    def _run_script(self, *args, **kwargs):
+        if not fired:
+            fired.append(True)
+            print_phase("first_script_run")
+        return original(self, *args, **kwargs)
+
+    ScriptRunner._run_script = _run_script
+
+
+if __name__ == "__main__":
+    # 本目录不应出现在子应用的模块搜索路径中
+    if sys.path and os.path.abspath(sys.path[0]) == os.path.dirname(os.path.abspath(__file__)):
+        sys.path.pop(0)
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    preload(os.getenv("APP_PRELOAD_MODULES", DEFAULT_PRELOAD_MODULES).split(","))
+    print_phase("imports_done")
+    install_first_run_marker()
+    from streamlit.web.cli import main
+
+    sys.exit(main())
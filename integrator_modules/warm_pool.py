@@ -0,0 +1,121 @@
+import os
+import threading
+
+# 启动模式："spawn" 每次按需冷启动；"warm" 为常用子应用常驻若干个已就绪的预热实例，点击时直接领用
+LAUNCH_MODE = os.getenv("APP_LAUNCH_MODE", "spawn")
+# 预热配置，格式："app路径=数量;app路径=数量"
+WARM_POOL_SPEC = os.getenv(
+    "APP_WARM_POOL",
+    "EUR_Predict/eur_predict.py=1;fetkovich/fetkovich.py=1;数据标注工具/data_processing.py=1",
+)
+# 预热池补充检查周期（秒）
+REFILL_INTERVAL_SECONDS = float(os.getenv("APP_WARM_POOL_INTERVAL", "10"))
+
+
+def parse_warm_pool_spec(spec):
+    """
+    解析预热配置字符串。
+
+    返回:
+        Dict[str, int]: app 路径 -> 预热实例数
+    """
+    targets = {}
+    for item in spec.split(";"):
+        if "=" not in item:
+            continue
+        app_path, count = item.rsplit("=", 1)
+        if app_path.strip() and count.strip().isdigit():
+            targets[app_path.strip()] = int(count)
+    return targets
+
+
+class WarmPool:
+    """
+    预热池：为每个常用子应用保持 N 个已就绪、尚未分配用户的 Streamlit 实例。
+    实例被 AppRegistry.claim_warm 领用后立即在后台补充，领用者的启动耗时只剩一次查表。
+    """
+
+    def __init__(self, registry, spawn, targets, interval=REFILL_INTERVAL_SECONDS):
+        self.registry = registry
+        self.spawn = spawn  # (instance_id, app_path) -> (port, pid, proc)
+        self.targets = {app_path: n for app_path, n in targets.items() if os.path.exists(app_path) and n > 0}
+        self.interval = interval
+        self.claims = 0
+        self.last_error = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        registry.warm_listeners.append(self._on_claim)
+
+    def _on_claim(self, app_path):
+        if app_path in self.targets:
+            self.claims += 1
+            self._wake.set()
+
+    def refill(self):
+        """按配置补齐各子应用的预热实例，并等待新实例就绪"""
+        from integrator_modules.app_registry import AppInstance
+
+        started = []
+        for app_path, target in self.targets.items():
+            missing = target - len(self.registry.warm_instances(app_path))
+            for _ in range(max(missing, 0)):
+                instance_id = AppInstance(app_path, 0, 0).instance_id
+                port, pid, proc = self.spawn(instance_id, app_path)
+                instance = AppInstance(app_path, port, pid, text=os.path.basename(app_path), proc=proc,
+                                       instance_id=instance_id, warm=True)
+                started.append(self.registry.register(instance))
+        for instance in started:
+            try:
+                self.registry.wait_ready(instance)
+            except (TimeoutError, RuntimeError) as e:
+                self.last_error = str(e)
+                self.registry.terminate(instance.instance_id)
+        return started
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refill()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"❌ 预热池补充失败: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def start(self):
+        if self._thread is None and self.targets:
+            self._thread = threading.Thread(target=self._run, name="app-warm-pool", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def stats(self):
+        return {
+            app_path: {
+                "目标": target,
+                "就绪": sum(1 for inst in self.registry.warm_instances(app_path) if inst.ready),
+                "启动中": sum(1 for inst in self.registry.warm_instances(app_path) if not inst.ready),
+            }
+            for app_path, target in self.targets.items()
+        } | {"领用次数": self.claims, "最近错误": self.last_error}
+
+
+# 集成器进程内只启动一个预热池
+_warm_pool = None
+_warm_pool_lock = threading.Lock()
+
+
+def ensure_warm_pool_started(registry, spawn, spec=WARM_POOL_SPEC):
+    global _warm_pool
+    with _warm_pool_lock:
+        if _warm_pool is None:
+            _warm_pool = WarmPool(registry, spawn, parse_warm_pool_spec(spec)).start()
+        return _warm_pool
+
+
+def get_warm_pool():
+    return _warm_pool
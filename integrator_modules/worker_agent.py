@@ -0,0 +1,328 @@
+# **********************************************************************************************
+# worker 代理：在每台工作主机上常驻的小型守护进程，接受集成器的 HTTP 请求启动/停止 Streamlit 子应用，
+# 并上报本机负载。工作主机需有与集成器相同的代码目录（子应用按相对路径启动）。
+#
+#     APP_WORKER_TOKEN=<口令> python -m integrator_modules.worker_agent --listen 10.0.0.11:8600 --host 10.0.0.11 \
+#         --port-min 8502 --port-max 8599
+#
+# 集成器通过 APP_WORKERS=http://10.0.0.11:8600,... 使用这些代理，两边的 APP_WORKER_TOKEN 必须一致；未设置口令时代理拒绝启动。
+# --listen 默认只监听 127.0.0.1，跨主机使用时显式指定内网地址。代理只启动应用目录（及集成器内置工具）中登记的、
+# 位于代码目录下的脚本。/spawn 请求体中带有用户密码，代理只应暴露在内网或经 TLS 隧道访问。
+# 在同一台机器上用不同的 --listen 端口和端口区间启动多个代理即可在本机测试多主机调度。
+# **********************************************************************************************
+import argparse
+import hmac
+import json
+import os
+import signal
+import socket
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from integrator_modules.app_catalogue import APPS_CATALOGUE_PATH, get_app_catalogue
+from integrator_modules.app_launcher import start_streamlit_app
+from integrator_modules.app_logs import app_logs
+from integrator_modules.app_supervisor import count_established, read_proc_stats
+from integrator_modules.multipage import EXTRA_TOOLS, MULTIPAGE_ENTRY
+from integrator_modules.port_leases import PORT_MAX, PORT_MIN, PortLeaseManager
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKER_TOKEN = os.getenv("APP_WORKER_TOKEN", "")
+# 本 worker 可承载的子应用实例数，集成器据此计算负载
+WORKER_CAPACITY = int(os.getenv("APP_WORKER_CAPACITY", str(os.cpu_count() or 4)))
+MAINTENANCE_INTERVAL_SECONDS = 2.0
+# /logs 单次最多返回的行数
+MAX_LOG_LINES = 2000
+
+
+def allowed_app_paths():
+    """可由集成器远程启动的脚本：应用目录中的本地工具、"相关工具"按钮的工具与多页面共享服务入口"""
+    catalogue = get_app_catalogue(os.path.join(ROOT_DIR, APPS_CATALOGUE_PATH))
+    links = {entry.Link for entry in catalogue.entries if not entry.Link.startswith(("http://", "https://"))}
+    return links | {app_path for app_path, _ in EXTRA_TOOLS} | {MULTIPAGE_ENTRY}
+
+
+def resolve_app_path(app_path):
+    """
+    校验集成器请求启动的脚本路径。
+
+    返回:
+        str: 规范化后的相对路径（相对代码目录）
+
+    异常:
+        PermissionError: 绝对路径、跳出代码目录或未在应用目录中登记
+        FileNotFoundError: 脚本不存在
+    """
+    if not isinstance(app_path, str) or not app_path or os.path.isabs(app_path):
+        raise PermissionError(f"只能启动代码目录下的相对路径：{app_path}")
+    full_path = os.path.realpath(os.path.join(ROOT_DIR, app_path))
+    if os.path.commonpath([full_path, os.path.realpath(ROOT_DIR)]) != os.path.realpath(ROOT_DIR):
+        raise PermissionError(f"脚本不在代码目录下：{app_path}")
+    allowed = {os.path.normpath(path) for path in allowed_app_paths()}
+    if os.path.normpath(app_path) not in allowed:
+        raise PermissionError(f"脚本未在应用目录中登记：{app_path}")
+    if not os.path.exists(full_path):
+        raise FileNotFoundError(f"子应用文件不存在：{app_path}")
+    return os.path.normpath(app_path)
+
+
+def read_mem_available_mb():
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class WorkerAgent:
+    """
+    本机子应用进程管理：分配端口、启动/停止 Streamlit 子进程、回收已退出进程的端口并汇总负载。
+
+    参数:
+        host (str): 集成器（及浏览器直连时）访问本机子应用使用的地址
+        bind_address (str): 经反向代理访问时子应用监听的地址，需能被集成器访问
+        capacity (int): 可承载的实例数
+        leases (PortLeaseManager): 本机端口池
+    """
+
+    def __init__(self, host, bind_address="0.0.0.0", capacity=WORKER_CAPACITY, leases=None):
+        self.host = host
+        self.bind_address = bind_address
+        self.capacity = capacity
+        self.leases = leases or PortLeaseManager()
+        self.procs = {}  # pid -> (Popen, 端口, 实例ID)
+        self.exited = {}  # pid -> 返回码，最近退出的进程
+        self.spawn_total = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _pid_alive(self, pid):
+        entry = self.procs.get(pid)
+        return entry is not None and entry[0].poll() is None
+
+    def spawn(self, instance_id, app_path, text, user=None, password=None, base_url_path="", preload=False):
+        app_path = resolve_app_path(app_path)
+        with self._lock:
+            port = self.leases.acquire(is_pid_alive=self._pid_alive)
+            try:
+                proc = start_streamlit_app(app_path, port, text, user, password, base_url_path=base_url_path,
+                                           preload=preload, log_key=instance_id, address=self.bind_address)
+            except Exception:
+                self.leases.release(port)
+                raise
+            self.leases.attach(port, proc.pid)
+            self.procs[proc.pid] = (proc, port, instance_id)
+            self.spawn_total += 1
+        return port, proc.pid
+
+    def stop(self, pid, sig=signal.SIGTERM):
+        with self._lock:
+            entry = self.procs.get(pid)
+        if entry is None:
+            return False
+        proc = entry[0]
+        try:
+            proc.send_signal(sig)
+            proc.wait(timeout=5)
+        except ProcessLookupError:
+            pass
+        except Exception:
+            proc.kill()
+        self.maintain()
+        return True
+
+    def proc_info(self, pid):
+        with self._lock:
+            entry = self.procs.get(pid)
+            if entry is None:
+                return {"alive": False, "returncode": self.exited.get(pid)}
+            proc, port, instance_id = entry
+        returncode = proc.poll()
+        if returncode is not None:
+            return {"alive": False, "returncode": returncode}
+        info = {"alive": True, "port": port, "instance_id": instance_id, "established": count_established(port)}
+        stats = read_proc_stats(pid)
+        if stats is not None:
+            info["rss"], info["cpu"] = stats
+        return info
+
+    def maintain(self):
+        """回收已退出进程的端口；已在监听的端口租约转为 active"""
+        with self._lock:
+            for pid, (proc, port, _) in list(self.procs.items()):
+                returncode = proc.poll()
+                if returncode is not None:
+                    del self.procs[pid]
+                    self.exited[pid] = returncode
+                    self.leases.release(port, pid)
+                else:
+                    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                        s.settimeout(0.2)
+                        if s.connect_ex(("127.0.0.1" if self.bind_address == "0.0.0.0" else self.bind_address,
+                                         port)) == 0:
+                            self.leases.confirm(port)
+            while len(self.exited) > 200:
+                self.exited.pop(next(iter(self.exited)))
+
+    def status(self):
+        with self._lock:
+            instances = len(self.procs)
+        return {
+            "host": self.host,
+            "instances": instances,
+            "capacity": self.capacity,
+            "load_avg": round(os.getloadavg()[0], 2) if hasattr(os, "getloadavg") else None,
+            "cpu_count": os.cpu_count(),
+            "mem_available_mb": read_mem_available_mb(),
+            "spawn_total": self.spawn_total,
+            "ports": self.leases.metrics(),
+        }
+
+    def logs(self, instance_id, lines=100):
+        """
+        本机实例最近 lines 行日志与启动阶段耗时，供集成器的子应用日志面板显示。
+
+        返回:
+            dict: found 为 False 表示未捕获该实例的输出（未开启 APP_CAPTURE_LOGS 或日志已被清理）
+        """
+        capture = app_logs.get(instance_id)
+        if capture is None:
+            return {"found": False}
+        return {
+            "found": True,
+            "running": capture.running,
+            "returncode": capture.returncode,
+            "log_path": capture.log_path,
+            "lines": capture.tail(max(1, min(lines, MAX_LOG_LINES))),
+            "phases": capture.phase_timings(),
+        }
+
+    def _maintenance_loop(self):
+        while not self._stop.wait(MAINTENANCE_INTERVAL_SECONDS):
+            self.maintain()
+
+    def start_maintenance(self):
+        threading.Thread(target=self._maintenance_loop, name="worker-maintenance", daemon=True).start()
+
+    def shutdown(self):
+        """代理退出时终止所有子应用"""
+        self._stop.set()
+        for pid in list(self.procs):
+            self.stop(pid)
+
+
+def make_handler(agent, token=WORKER_TOKEN):
+    if not token:
+        raise ValueError("worker 代理必须配置 APP_WORKER_TOKEN")
+
+    class WorkerRequestHandler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _authorized(self):
+            if not hmac.compare_digest(self.headers.get("X-Worker-Token", "").encode("utf-8"), token.encode("utf-8")):
+                self._send(403, {"error": "口令错误"})
+                return False
+            return True
+
+        def do_GET(self):
+            if not self._authorized():
+                return
+            url = urlparse(self.path)
+            if url.path == "/status":
+                return self._send(200, agent.status())
+            if url.path == "/proc":
+                try:
+                    pid = int(parse_qs(url.query)["pid"][0])
+                except (KeyError, ValueError, IndexError):
+                    return self._send(400, {"error": "缺少 pid 参数"})
+                return self._send(200, agent.proc_info(pid))
+            if url.path == "/logs":
+                query = parse_qs(url.query)
+                try:
+                    instance_id = query["instance_id"][0]
+                    lines = int(query.get("lines", ["100"])[0])
+                except (KeyError, ValueError, IndexError):
+                    return self._send(400, {"error": "缺少 instance_id 参数"})
+                return self._send(200, agent.logs(instance_id, lines))
+            return self._send(404, {"error": f"未知路径 {url.path}"})
+
+        def do_POST(self):
+            if not self._authorized():
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length).decode("utf-8") or "{}")
+            except ValueError:
+                return self._send(400, {"error": "请求体不是合法的 JSON"})
+            path = urlparse(self.path).path
+            try:
+                if path == "/spawn":
+                    port, pid = agent.spawn(
+                        payload["instance_id"], payload["app_path"], payload.get("text") or payload["app_path"],
+                        user=payload.get("user"), password=payload.get("password"),
+                        base_url_path=payload.get("base_url_path", ""), preload=bool(payload.get("preload")),
+                    )
+                    return self._send(200, {"port": port, "pid": pid})
+                if path == "/stop":
+                    return self._send(200, {"stopped": agent.stop(int(payload["pid"]), payload.get("sig", signal.SIGTERM))})
+            except KeyError as e:
+                return self._send(400, {"error": f"缺少参数 {e}"})
+            except PermissionError as e:
+                return self._send(403, {"error": str(e)})
+            except (RuntimeError, OSError) as e:
+                return self._send(503, {"error": str(e)})
+            return self._send(404, {"error": f"未知路径 {path}"})
+
+        def log_message(self, format, *args):
+            pass
+
+    return WorkerRequestHandler
+
+
+def _raise_keyboard_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main():
+    parser = argparse.ArgumentParser(description="子应用 worker 代理")
+    parser.add_argument("--listen", default="127.0.0.1:8600", help="代理监听地址 host:port，跨主机使用时指定内网地址")
+    parser.add_argument("--host", default=os.getenv("SERVER_IP", "127.0.0.1"),
+                        help="集成器和浏览器访问本机子应用使用的地址")
+    parser.add_argument("--bind-address", default="0.0.0.0", help="经反向代理访问时子应用监听的地址")
+    parser.add_argument("--port-min", type=int, default=PORT_MIN, help="子应用端口区间下限")
+    parser.add_argument("--port-max", type=int, default=PORT_MAX, help="子应用端口区间上限")
+    parser.add_argument("--capacity", type=int, default=WORKER_CAPACITY, help="可承载的子应用实例数")
+    args = parser.parse_args()
+    if not WORKER_TOKEN:
+        sys.exit("❌ 未设置 APP_WORKER_TOKEN：worker 代理可在本机启动进程，必须配置与集成器一致的口令")
+
+    os.chdir(ROOT_DIR)
+    listen_host, listen_port = args.listen.rsplit(":", 1)
+    agent = WorkerAgent(args.host, bind_address=args.bind_address, capacity=args.capacity,
+                        leases=PortLeaseManager(args.port_min, args.port_max))
+    agent.start_maintenance()
+    server = ThreadingHTTPServer((listen_host, int(listen_port)), make_handler(agent))
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)  # docker stop 时同样终止所有子应用
+    print(f"🛠️ worker 代理已启动：{args.listen}，子应用端口 {args.port_min}-{args.port_max}，容量 {args.capacity}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        agent.shutdown()
+
+
+if __name__ == "__main__":
+    main()
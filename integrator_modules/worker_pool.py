@@ -0,0 +1,248 @@
+import json
+import os
+import signal
+import threading
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import urlencode
+
+# worker 代理地址列表（逗号分隔，如 http://10.0.0.11:8600,http://10.0.0.12:8600），为空时所有子应用在集成器本机启动
+WORKER_URLS = [url.strip().rstrip("/") for url in os.getenv("APP_WORKERS", "").split(",") if url.strip()]
+# 集成器与 worker 代理之间的共享口令，请求头 X-Worker-Token
+WORKER_TOKEN = os.getenv("APP_WORKER_TOKEN", "")
+# 集成器本机是否也参与子应用调度，以及本机可承载的实例数
+LOCAL_WORKER_ENABLED = os.getenv("APP_LOCAL_WORKER", "true").lower() in ("1", "true", "yes")
+LOCAL_CAPACITY = int(os.getenv("APP_LOCAL_CAPACITY", str(os.cpu_count() or 4)))
+# worker 负载信息的缓存时间（秒）
+STATUS_TTL_SECONDS = float(os.getenv("APP_WORKER_STATUS_TTL", "2"))
+# 远程进程存活状态的缓存时间（秒），避免健康检查频繁请求 worker
+PROC_STATUS_TTL_SECONDS = 1.0
+
+
+class WorkerUnavailable(RuntimeError):
+    """worker 代理无法访问或拒绝了请求"""
+
+
+class WorkerClient:
+    """worker 代理的 HTTP 客户端（见 worker_agent.py）"""
+
+    def __init__(self, url, token=WORKER_TOKEN, timeout=5):
+        self.url = url
+        self.token = token
+        self.timeout = timeout
+        self.host = None  # 代理上报的子应用访问地址，首次获取状态后填充
+
+    def _request(self, method, path, payload=None, timeout=None):
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        request = urllib.request.Request(self.url + path, data=data, method=method,
+                                         headers={"Content-Type": "application/json", "X-Worker-Token": self.token})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout or self.timeout) as resp:
+                return json.loads(resp.read().decode("utf-8"))
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read().decode("utf-8")).get("error", str(e))
+            except ValueError:
+                message = str(e)
+            raise WorkerUnavailable(f"worker {self.url}: {message}") from e
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            raise WorkerUnavailable(f"worker {self.url} 无法访问: {e}") from e
+
+    def status(self):
+        status = self._request("GET", "/status")
+        self.host = status.get("host") or self.host
+        return status
+
+    def spawn(self, instance_id, app_path, text, user=None, password=None, base_url_path="", preload=False):
+        """
+        在 worker 上启动子应用。
+
+        返回:
+            Tuple[int, int]: (端口, pid)
+
+        异常:
+            WorkerUnavailable: worker 无法访问，或端口池耗尽、脚本不存在等
+        """
+        result = self._request("POST", "/spawn", {
+            "instance_id": instance_id, "app_path": app_path, "text": text, "user": user,
+            "password": password, "base_url_path": base_url_path, "preload": preload,
+        }, timeout=30)
+        if self.host is None:
+            self.status()
+        return result["port"], result["pid"]
+
+    def stop(self, pid, sig=signal.SIGTERM):
+        return self._request("POST", "/stop", {"pid": pid, "sig": int(sig)}).get("stopped", False)
+
+    def proc_info(self, pid):
+        return self._request("GET", f"/proc?pid={int(pid)}")
+
+    def logs(self, instance_id, lines=100):
+        """worker 上实例最近 lines 行日志与启动阶段耗时（见 WorkerAgent.logs）"""
+        return self._request("GET", f"/logs?{urlencode({'instance_id': instance_id, 'lines': int(lines)})}",
+                             timeout=2)
+
+    def process(self, pid):
+        return RemoteProcess(self, pid)
+
+
+class RemoteProcess:
+    """
+    worker 上子进程的代理对象，提供与 subprocess.Popen 相同的 pid/poll/wait/terminate/kill 接口，
+    注册表与守护线程可以像对待本机子进程一样对待它。
+    """
+
+    def __init__(self, client, pid):
+        self.client = client
+        self.pid = pid
+        self.returncode = None
+        self._info = None
+        self._info_at = 0.0
+
+    @property
+    def worker_url(self):
+        return self.client.url
+
+    @property
+    def host(self):
+        return self.client.host
+
+    def info(self, max_age=PROC_STATUS_TTL_SECONDS):
+        """worker 上报的进程状态，按 max_age 缓存；worker 不可达时视为进程仍存活，交由健康检查判定"""
+        if self._info is None or time.time() - self._info_at > max_age:
+            try:
+                self._info = self.client.proc_info(self.pid)
+            except WorkerUnavailable:
+                self._info = {"alive": True}
+            self._info_at = time.time()
+        return self._info
+
+    def poll(self):
+        if self.returncode is None and not self.info().get("alive", False):
+            self.returncode = self._info.get("returncode")
+            if self.returncode is None:
+                self.returncode = -1
+        return self.returncode
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.time() + timeout
+        while self.poll() is None:
+            if deadline is not None and time.time() > deadline:
+                raise TimeoutError(f"worker {self.client.url} 上的进程 {self.pid} 未退出")
+            time.sleep(PROC_STATUS_TTL_SECONDS)
+        return self.returncode
+
+    def send_signal(self, sig):
+        self.client.stop(self.pid, sig)
+        self._info = None
+
+    def terminate(self):
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+    def stats(self):
+        """(RSS 字节数, CPU 秒数)，与 app_supervisor.read_proc_stats 一致；进程不存在时返回 None"""
+        info = self.info(max_age=0)
+        if not info.get("alive") or "rss" not in info:
+            return None
+        return info["rss"], info["cpu"]
+
+    def established(self):
+        return self.info().get("established", 0)
+
+
+class WorkerPool:
+    """
+    worker 代理池：定期获取各 worker 的负载（实例数/容量），把新实例放到负载最低的 worker 上。
+    集成器本机（LOCAL_WORKER_ENABLED）作为一个虚拟 worker 一起参与比较。
+    """
+
+    def __init__(self, urls=WORKER_URLS, token=WORKER_TOKEN, local_enabled=LOCAL_WORKER_ENABLED,
+                 local_capacity=LOCAL_CAPACITY, status_ttl=STATUS_TTL_SECONDS):
+        self.clients = {url: WorkerClient(url, token) for url in urls}
+        self.local_enabled = local_enabled or not self.clients
+        self.local_capacity = local_capacity
+        self.status_ttl = status_ttl
+        self.statuses = {}  # url -> 最近一次状态，不可达时为 None
+        self.errors = {}  # url -> 最近一次错误
+        self.placements = {}  # url（本机为 "local"）-> 放置次数
+        self._status_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.clients)
+
+    def client(self, url):
+        if url not in self.clients:
+            self.clients[url] = WorkerClient(url, WORKER_TOKEN)
+        return self.clients[url]
+
+    def refresh(self, force=False):
+        with self._lock:
+            if not force and time.time() - self._status_at < self.status_ttl:
+                return self.statuses
+            for url, client in self.clients.items():
+                try:
+                    self.statuses[url] = client.status()
+                    self.errors.pop(url, None)
+                except WorkerUnavailable as e:
+                    self.statuses[url] = None
+                    self.errors[url] = str(e)
+            self._status_at = time.time()
+            return self.statuses
+
+    @staticmethod
+    def _load(instances, capacity):
+        return instances / max(capacity, 1)
+
+    def place(self, local_instances=0):
+        """
+        选择负载最低的 worker。
+
+        参数:
+            local_instances (int): 集成器本机当前运行的子应用实例数
+
+        返回:
+            WorkerClient or None: None 表示在集成器本机启动
+
+        异常:
+            WorkerUnavailable: 不允许本机启动且所有 worker 均不可达
+        """
+        candidates = []
+        if self.local_enabled:
+            candidates.append((self._load(local_instances, self.local_capacity), "local"))
+        for url, status in self.refresh().items():
+            if status is not None:
+                candidates.append((self._load(status.get("instances", 0), status.get("capacity", 1)), url))
+        if not candidates:
+            raise WorkerUnavailable("❌ 没有可用的 worker 代理，请检查 APP_WORKERS 配置与代理进程")
+        _, choice = min(candidates, key=lambda item: item[0])
+        with self._lock:
+            self.placements[choice] = self.placements.get(choice, 0) + 1
+            # 在下一次刷新前先按本次放置累加，避免并发启动时全部落到同一个 worker
+            if choice != "local" and self.statuses.get(choice) is not None:
+                self.statuses[choice]["instances"] = self.statuses[choice].get("instances", 0) + 1
+        return None if choice == "local" else self.clients[choice]
+
+    def stats(self, local_instances=0):
+        """各 worker 的负载，用于系统监控页面展示"""
+        rows = []
+        if self.local_enabled:
+            rows.append({"worker": "本机", "状态": "在线", "实例数": local_instances, "容量": self.local_capacity,
+                         "负载(1分钟)": round(os.getloadavg()[0], 2) if hasattr(os, "getloadavg") else None,
+                         "可用内存(MB)": None, "放置次数": self.placements.get("local", 0)})
+        for url, status in self.refresh().items():
+            status = status or {}
+            rows.append({"worker": url, "状态": "在线" if url not in self.errors else self.errors[url],
+                         "实例数": status.get("instances"), "容量": status.get("capacity"),
+                         "负载(1分钟)": status.get("load_avg"), "可用内存(MB)": status.get("mem_available_mb"),
+                         "放置次数": self.placements.get(url, 0)})
+        return rows
+
+
+# 模块级单例，集成器所有会话共享
+worker_pool = WorkerPool()
@@ -1,19 +1,21 @@
 import streamlit as st
-import sqlite3
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 
 import numpy as np
 import pandas as pd
 import os,sys,base64
-sys.path.append(os.path.join(os.path.dirname(__file__), 'modules'))
+MODULES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'modules')
+if MODULES_DIR not in sys.path:  # 多页面共享服务中每次打开页面都会重新执行本脚本
+    sys.path.append(MODULES_DIR)
 from fetkovich_plot import create_gas_production_plot
+from integrator_modules.shared_resources import read_sql
 
-# 数据库连接函数
+WELLS_DB_PATH = 'EUR_Predict/database/gas_wells_production.db'
+
+# 数据库查询函数：共享的只读连接，查询结果缓存（见 integrator_modules/shared_resources.py）
 def get_well_data(well_name):
     """从数据库获取气井数据"""
-    conn = sqlite3.connect('EUR_Predict/database/gas_wells_production.db')
-
     query = """
     SELECT 
         p.record_date,
@@ -25,8 +27,7 @@ def get_well_data(well_name):
     ORDER BY p.record_date
     """
 
-    df = pd.read_sql_query(query, conn, params=(well_name,))
-    conn.close()
+    df = read_sql(WELLS_DB_PATH, query, params=(well_name,))
 
     # 转换日期格式
     df['record_date'] = pd.to_datetime(df['record_date'])
@@ -36,11 +37,8 @@ def get_well_data(well_name):
 
 def get_wells_list():
     """获取气井列表"""
-    conn = sqlite3.connect('EUR_Predict/database/gas_wells_production.db')
-
     query = "SELECT well_name FROM wells ORDER BY well_name"
-    df = pd.read_sql_query(query, conn)
-    conn.close()
+    df = read_sql(WELLS_DB_PATH, query)
 
     return df['well_name'].tolist()
 
@@ -1,13 +1,14 @@
 import numpy as np
 import pandas as pd
 
-
+# PVT 表经 st.cache_data 缓存：按文件修改时间区分版本，每次返回副本
+from integrator_modules.shared_resources import load_pvt_table
 
 
 class GasPVT:
     """气体PVT性质管理类，支持查询μg、Z、Ct"""
     def __init__(self, csv_path):
-        self.df = pd.read_csv(csv_path)
+        self.df = load_pvt_table(csv_path)
         self.p_values = self.df['p（MPa）'].values * 1e6  # 转换为Pa
         self.μg_values = self.df['μg（Pa·s）'].values
         self.Z_values = self.df['Z（-）'].values
@@ -6,6 +6,7 @@ from scipy.optimize import curve_fit
 from scipy.integrate import cumulative_trapezoid
 import io
 import math
+from integrator_modules.shared_resources import arps_type_curves
 
 # ----------------------
 # 页面配置 - 设置宽屏布局
@@ -376,8 +377,9 @@ if uploaded_file is not None:
             # 计算无量纲累计产量
             N_pDd_theoretical = calculate_dimensionless_cumulative_production(t_D_theoretical, q_Dd_theoretical)
 
-            # 生成理论曲线数据范围
-            t_D_range = np.logspace(-3, 3, 500)
+            # 定义b值范围，典型曲线库按b值缓存（见 integrator_modules/shared_resources.py），各会话共用
+            b_values = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+            t_D_range, type_curves = arps_type_curves(b_values)
 
             # 创建更宽的图表以适应宽屏
             plt.style.use('dark_background')
@@ -385,16 +387,12 @@ if uploaded_file is not None:
             fig.patch.set_facecolor('black')
             ax1.set_facecolor('black')
 
-            # 定义b值范围和颜色
-            b_values = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0]
+            # 定义颜色
             colors = plt.cm.plasma(np.linspace(0, 1, len(b_values)))
 
             # 绘制无量纲产量曲线（左Y轴）
             for i, b_val in enumerate(b_values):
-                if b_val == 1:
-                    q_D = 1.0 / (1 + t_D_range)
-                else:
-                    q_D = 1.0 / ((1 + b_val * t_D_range) **(1 / b_val))
+                q_D = type_curves[b_val][0]
                 ax1.loglog(t_D_range, q_D,
                            color=colors[i], linewidth=2, alpha=0.8,
                            label=f'Rate b={b_val:.1f}')
@@ -425,10 +423,7 @@ if uploaded_file is not None:
             # 绘制无量纲累计产量曲线（右Y轴）
             ax2 = ax1.twinx()
             for i, b_val in enumerate(b_values):
-                if b_val == 1:
-                    N_pD = np.log(1 + t_D_range)
-                else:
-                    N_pD = (1 / (1 - b_val)) * (1 - (1 + b_val * t_D_range)** ((b_val - 1) / b_val))
+                N_pD = type_curves[b_val][1]
                 ax2.loglog(t_D_range, N_pD,
                            color=colors[i], linewidth=2, alpha=0.8, linestyle='--',
                            label=f'Cumulative b={b_val:.1f}')
@@ -1,14 +1,81 @@
+import io
+import os
+
 import streamlit as st
 
+# 手册页面网页版本的最大宽度（像素）与 JPEG 压缩质量
+WEB_MAX_WIDTH = 1200
+WEB_JPEG_QUALITY = 75
+
+
+@st.cache_data(show_spinner=False, persist="disk")
+def _web_rendition(image_path, mtime_ns, max_width, quality):
+    from PIL import Image  # 仅在生成缩小版时导入，集成器启动时不必加载 PIL
+
+    with Image.open(image_path) as img:
+        if img.mode in ("RGBA", "LA", "P"):
+            img = img.convert("RGBA")
+            background = Image.new("RGB", img.size, (255, 255, 255))
+            background.paste(img, mask=img.split()[-1])
+            img = background
+        elif img.mode != "RGB":
+            img = img.convert("RGB")
+        if img.width > max_width:
+            img = img.resize((max_width, round(img.height * max_width / img.width)), Image.LANCZOS)
+        buffer = io.BytesIO()
+        img.save(buffer, "JPEG", quality=quality, optimize=True, progressive=True)
+        return buffer.getvalue()
+
+
+def get_web_rendition(image_path, max_width=WEB_MAX_WIDTH, quality=WEB_JPEG_QUALITY):
+    """
+    获取手册图像的网页尺寸压缩版本。每个文件只生成一次并持久化缓存到磁盘，原图修改后自动重新生成。
+
+    参数:
+        image_path (str): 原图路径
+        max_width (int): 最大宽度（像素）
+        quality (int): JPEG 压缩质量
+
+    返回:
+        bytes: JPEG 图像数据
+    """
+    return _web_rendition(image_path, os.stat(image_path).st_mtime_ns, max_width, quality)
+
 
-def show_help_images(image_dir_prefix, page_n):
+def _turn_page(key, step, page_n):
+    st.session_state[key] = min(max(st.session_state.get(key, 1) + step, 1), page_n)
+
+
+def show_help_images(image_dir_prefix, page_n, key="help_page"):
     """
-    循环展示用户手册图像，适用于多页文档。
+    分页展示用户手册图像，适用于多页文档。每次只加载当前页的网页尺寸版本，翻页时再加载下一页。
 
     参数:
         image_dir_prefix (str): 图像文件路径前缀
         page_n (int): 总页数
+        key (str): 页码控件的key，同一页面中有多份手册时需各不相同
     """
-    for i in range(page_n):
-        image_path = f"{image_dir_prefix}page{i+1}.png"
-        st.image(image_path)
+    if page_n <= 0:
+        return
+    if st.session_state.get(key, 1) > page_n:
+        st.session_state[key] = 1
+
+    col_prev, col_page, col_next = st.columns([1, 6, 1], vertical_alignment="bottom")
+    with col_prev:
+        st.button("◀ 上一页", key=f"{key}_prev", on_click=_turn_page, args=(key, -1, page_n),
+                  disabled=st.session_state.get(key, 1) <= 1, use_container_width=True)
+    with col_next:
+        st.button("下一页 ▶", key=f"{key}_next", on_click=_turn_page, args=(key, 1, page_n),
+                  disabled=st.session_state.get(key, 1) >= page_n, use_container_width=True)
+    with col_page:
+        page = st.select_slider("页码", options=list(range(1, page_n + 1)), key=key,
+                                label_visibility="collapsed") if page_n > 1 else 1
+
+    image_path = f"{image_dir_prefix}page{page}.png"
+    try:
+        with st.spinner(f"正在加载第 {page} 页..."):
+            image_data = get_web_rendition(image_path)
+    except FileNotFoundError:
+        st.warning(f"⚠️ 手册第 {page} 页图像未找到：{image_path}")
+        return
+    st.image(image_data, caption=f"第 {page} / {page_n} 页", use_container_width=True)